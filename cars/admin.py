@@ -1,8 +1,26 @@
 from django.contrib import admin
 
 from .models import Car, Make, Model, Trim
+from .response_cache import bump_versions
 
-admin.site.register(Make)
-admin.site.register(Model)
-admin.site.register(Trim)
+
+class CatalogAdmin(admin.ModelAdmin):
+    """Invalidates the cached catalog responses on every change."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_versions(Make, Model, Trim)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_versions(Make, Model, Trim)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_versions(Make, Model, Trim)
+
+
+admin.site.register(Make, CatalogAdmin)
+admin.site.register(Model, CatalogAdmin)
+admin.site.register(Trim, CatalogAdmin)
 admin.site.register(Car)
@@ -0,0 +1,64 @@
+"""
+ASGI handler of the project (see project/asgi.py).
+
+Django 3.2 iterates the streaming responses, e.g. of `/export/cars`, on the
+event loop, where the ORM queries of their sync generators are refused. The
+handler pulls their parts in a worker thread instead, a batch of up to
+`STREAMING_READ_SIZE` bytes at a time, so that the loop keeps serving the
+other requests while an export waits on the database.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+from django.db import close_old_connections
+
+STREAMING_READ_SIZE = 64 * 1024
+
+
+def read_parts(parts, size=STREAMING_READ_SIZE):
+    """
+    Returns the next parts of the iterator `parts`, up to about `size` bytes,
+    and whether it is exhausted.
+    """
+    batch, length = [], 0
+    for part in parts:
+        batch.append(part)
+        length += len(part)
+        if length >= size:
+            return batch, False
+    # The connection of the worker thread is released as at the end of a request.
+    close_old_connections()
+    return batch, True
+
+
+def response_headers(response):
+    headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode('ascii')
+        if isinstance(value, str):
+            value = value.encode('latin1')
+        headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+    return headers
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers(response),
+        })
+        parts = iter(response)
+        exhausted = False
+        while not exhausted:
+            batch, exhausted = await sync_to_async(read_parts, thread_sensitive=False)(parts)
+            if batch:
+                await send({'type': 'http.response.body', 'body': b''.join(batch), 'more_body': True})
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
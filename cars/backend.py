@@ -0,0 +1,73 @@
+"""GraphQL backend keeping parsed and validated documents in memory."""
+
+import threading
+from collections import OrderedDict
+from functools import partial
+from hashlib import sha256
+
+from graphql import parse, validate
+from graphql.backend.base import GraphQLDocument
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.execution import ExecutionResult, execute
+
+
+def document_hash(document_string):
+    """Returns the hash identifying a persisted query."""
+    return sha256(document_string.encode('utf-8')).hexdigest()
+
+
+class PersistedDocumentBackend(GraphQLCoreBackend):
+    """
+    Backend caching the documents it builds in a bounded LRU keyed by the
+    SHA-256 hash of their text.
+
+    Documents are validated once, when they enter the cache, so executing a
+    cached document skips both parsing and validation. Invalid documents are
+    never cached. The cache is local to the process and bound to `schema`.
+    """
+
+    def __init__(self, max_size=1000, executor=None):
+        super(PersistedDocumentBackend, self).__init__(executor=executor)
+        self.max_size = max_size
+        self.documents = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached document for the hash `key`, if any."""
+        with self.lock:
+            document = self.documents.get(key)
+            if document is not None:
+                self.documents.move_to_end(key)
+            return document
+
+    def put(self, key, document):
+        with self.lock:
+            self.documents[key] = document
+            self.documents.move_to_end(key)
+            while len(self.documents) > self.max_size:
+                self.documents.popitem(last=False)
+
+    def document_from_string(self, schema, document_string):
+        key = document_hash(document_string)
+        document = self.get(key)
+        if document is not None and document.schema is schema:
+            return document
+
+        document_ast = parse(document_string)
+        errors = validate(schema, document_ast)
+        if errors:
+            return GraphQLDocument(
+                schema=schema,
+                document_string=document_string,
+                document_ast=document_ast,
+                execute=lambda *args, **kwargs: ExecutionResult(errors=errors, invalid=True),
+            )
+
+        document = GraphQLDocument(
+            schema=schema,
+            document_string=document_string,
+            document_ast=document_ast,
+            execute=partial(execute, schema, document_ast, **self.execute_params),
+        )
+        self.put(key, document)
+        return document
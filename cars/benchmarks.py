@@ -0,0 +1,215 @@
+"""
+Benchmark of a fixed catalog of representative GraphQL operations, executed
+through the schema against a seeded catalog.
+
+Every operation is measured for its median wall time, its number of SQL
+queries, the number of model instances it fetched and the peak memory
+allocated while it ran. The queries and rows only depend on the code and
+the seeded catalog, and are compared to the baseline committed along with
+the code; the time and memory depend on the machine, and are only compared
+to a baseline recorded on the same machine.
+"""
+
+import random
+import statistics
+import time
+import tracemalloc
+from importlib import import_module
+from itertools import islice
+
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .bulk import delete_cars
+from .models import Car, CarSearch, Make, Model, Trim
+from .search import rebuild_fts
+from .transactions import atomic
+
+# Rows seeded at scale 1; every level has ten children per parent.
+VOLUMES = {'makes': 1000, 'models': 10000, 'trims': 100000, 'cars': 1000000}
+
+SEED_BATCH_SIZE = 5000
+
+TRIM_NAMES = ['Base', 'Sport', 'Limited', 'Touring', 'GT', 'Premium', 'Luxury', 'Hybrid', 'Quattro', 'xDrive']
+OWNERS = ['Ann', 'Bob', 'Eve', 'Joe', 'Sam', 'Kim', 'Lee', 'Max', 'Zoe', 'Ada']
+
+# Operation name -> (query, variables). Only ever append to the catalog: the baseline is keyed by name.
+OPERATIONS = {
+    'allCar nested page': ('''
+        query {
+          allCar(first: 100) {
+            edges { node { id owner year color trim { name model { name make { name } } } } }
+          }
+        }
+    ''', None),
+    'allCar filtered by make name': ('''
+        query($make: String) {
+          allCar(first: 100, makeName: $make) {
+            totalCount
+            edges { node { id owner trim { name } } }
+          }
+        }
+    ''', {'make': 'Make 1'}),
+    'allCar deep offset page': ('''
+        query {
+          allCar(first: 100, offset: 5000) { edges { node { id owner year } } }
+        }
+    ''', None),
+    'allCarKeyset page': ('''
+        query {
+          allCarKeyset(first: 100, year: 2015) { edges { cursor node { id owner year } } }
+        }
+    ''', None),
+    'allMake nested connections': ('''
+        query {
+          allMake(first: 20) {
+            edges { node { name models(first: 10) { edges { node { name trims(first: 10) {
+              edges { node { name } }
+            } } } } } }
+          }
+        }
+    ''', None),
+    'searchCars': ('''
+        query {
+          searchCars(query: "Ann Sport", first: 50) { edges { node { id owner } } }
+        }
+    ''', None),
+    'carStats by make and year': ('''
+        query {
+          carStats(groupBy: [MAKE, YEAR], filter: {color: "RED"}) { count year make { name } }
+        }
+    ''', None),
+}
+
+# Metrics of the committed baseline, and of the one recorded on the machine running the benchmark.
+GATED_METRICS = ('queries', 'rows')
+MACHINE_METRICS = ('time_ms', 'peak_memory_kb')
+
+# Increases below these are noise whatever the threshold.
+ABSOLUTE_TOLERANCES = {'time_ms': 2, 'queries': 0, 'rows': 0, 'peak_memory_kb': 64}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def seed_volumes(scale):
+    return {table: max(1, round(count * scale)) for table, count in VOLUMES.items()}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def seed(scale, on_table=None):
+    """
+    Replaces the catalog with `scale` times `VOLUMES` rows, deterministically
+    generated, then rebuilds the search tables. Returns the seeded volumes.
+    """
+    volumes = seed_volumes(scale)
+    rng = random.Random(0)
+    colors = [color for color, _ in Car.COLOR_CHOICES]
+
+    def parent(index, table):
+        return index * volumes[table] // volumes[next_table[table]] + 1
+
+    next_table = {'makes': 'models', 'models': 'trims', 'trims': 'cars'}
+    rows = {
+        'makes': (Make(id=index + 1, name=f'Make {index + 1}') for index in range(volumes['makes'])),
+        'models': (Model(id=index + 1, name=f'Model {index + 1}', make_id=parent(index, 'makes'))
+                   for index in range(volumes['models'])),
+        'trims': (Trim(id=index + 1, name=TRIM_NAMES[index % len(TRIM_NAMES)], model_id=parent(index, 'models'))
+                  for index in range(volumes['trims'])),
+        'cars': (Car(id=index + 1, trim_id=parent(index, 'trims'), owner=f'{rng.choice(OWNERS)} {index % 997}',
+                     color=rng.choice(colors), year=rng.randint(1990, 2021)) for index in range(volumes['cars'])),
+    }
+
+    with atomic(immediate=True):
+        delete_cars(Car._base_manager.all())
+        for model in (Trim, Model, Make):
+            model._base_manager.all()._raw_delete(model._base_manager.db)
+        for table, model in (('makes', Make), ('models', Model), ('trims', Trim), ('cars', Car)):
+            for batch in batched(rows[table], SEED_BATCH_SIZE):
+                model.objects.bulk_create(batch)
+            if on_table:
+                on_table(table, volumes[table])
+        # A single INSERT ... SELECT rather than car_search.rebuild(), which goes through the ORM.
+        CarSearch.objects.all()._raw_delete(CarSearch.objects.db)
+        with connection.cursor() as cursor:
+            cursor.execute(import_module('cars.migrations.0005_car_search').BACKFILL_SQL)
+        rebuild_fts()
+
+    return volumes
+
+
+def execute(schema, query, variables):
+    # A context per execution, so that the DataLoaders do not carry their cache over.
+    result = schema.execute(query, variables=variables, context=RequestFactory().post('/graphql'))
+    if result.errors:
+        raise BenchmarkError(result.errors[0])
+    return result
+
+
+def measure(schema, query, variables=None, repeat=5):
+    """Returns the metrics of executing `query`, its wall time being the median of `repeat` runs."""
+    rows = [0]
+
+    def count_row(sender, **kwargs):
+        rows[0] += 1
+
+    # CaptureQueriesContext counts the new entries of the query log, which is bounded.
+    connection.queries_log.clear()
+    post_init.connect(count_row, weak=False)
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            execute(schema, query, variables)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        post_init.disconnect(count_row)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        execute(schema, query, variables)
+        times.append(time.perf_counter() - start)
+
+    return {
+        'time_ms': round(statistics.median(times) * 1000, 2),
+        'queries': len(queries),
+        'rows': rows[0],
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_catalog(schema, repeat=5, operations=None):
+    return {
+        name: measure(schema, query, variables, repeat)
+        for name, (query, variables) in OPERATIONS.items()
+        if operations is None or name in operations
+    }
+
+
+def compare(results, baseline, threshold, metrics=GATED_METRICS):
+    """
+    Returns the regressions of `results` over `baseline`, as
+    `(operation, metric, baseline value, value)` tuples: the `metrics` that
+    grew by more than `threshold` (a ratio) and their absolute tolerance.
+    """
+    regressions = []
+    for name, values in results.items():
+        for metric in metrics:
+            value, reference = values.get(metric), baseline.get(name, {}).get(metric)
+            if value is None or reference is None:
+                continue
+            if value > reference * (1 + threshold) and value - reference > ABSOLUTE_TOLERANCES.get(metric, 0):
+                regressions.append((name, metric, reference, value))
+    return regressions
@@ -0,0 +1,53 @@
+"""Bulk writes bypassing the per-object ORM machinery."""
+
+from django.db.models import Max
+
+from .models import CarSearch
+
+# Cars deleted by statement, below the maximum number of SQLite query parameters.
+DELETE_BATCH_SIZE = 500
+
+
+def bulk_create_with_ids(model, objs, batch_size=None):
+    """
+    `bulk_create` setting the primary keys of `objs` also on the backends
+    that cannot return them, such as SQLite. Must run in a transaction, in
+    which the new rows are the ones past the highest primary key.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+
+    manager = model._default_manager
+    last_pk = manager.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    manager.bulk_create(objs, batch_size=batch_size)
+
+    if objs[0].pk is None:
+        pks = manager.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)
+        for obj, pk in zip(objs, pks):
+            obj.pk = pk
+    return objs
+
+
+def delete_cars(queryset, batch_size=DELETE_BATCH_SIZE):
+    """
+    Deletes the cars of `queryset` with one `DELETE` per table and batch of
+    `batch_size` cars instead of loading them to cascade, returning the
+    number of cars deleted.
+
+    The primary keys are read first: filters on the names of the catalog
+    go through `car_search`, so the queryset matches nothing once the search
+    rows are gone.
+    """
+    db = queryset.db
+    if not queryset.query.has_filters():
+        CarSearch.objects.all()._raw_delete(db)
+        return queryset._raw_delete(db)
+
+    pks = list(queryset.values_list('pk', flat=True))
+    deleted = 0
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start:start + batch_size]
+        CarSearch.objects.filter(car_id__in=batch)._raw_delete(db)
+        deleted += queryset.model._base_manager.filter(pk__in=batch)._raw_delete(db)
+    return deleted
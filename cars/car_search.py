@@ -0,0 +1,86 @@
+"""
+Maintenance of the `car_search` table, a denormalized copy of the cars and
+the names of their trim, model and make.
+
+Saving a car, trim, model or make through the ORM keeps the table in sync
+(see `cars.signals`); bulk writes that bypass the signals must call the
+functions below themselves. Deleted cars are removed by the foreign key
+cascade.
+"""
+
+from .models import Car, CarSearch
+from .transactions import atomic
+
+# CarSearch field -> Car lookup it is copied from.
+SEARCH_FIELDS = {
+    'owner': 'owner',
+    'color': 'color',
+    'year': 'year',
+    'trim_id': 'trim_id',
+    'trim_name': 'trim__name',
+    'model_id': 'trim__model_id',
+    'model_name': 'trim__model__name',
+    'make_id': 'trim__model__make_id',
+    'make_name': 'trim__model__make__name',
+}
+
+BATCH_SIZE = 500
+
+
+def search_rows(queryset):
+    """Returns the (unsaved) search rows of the cars in `queryset`."""
+    return [
+        CarSearch(car_id=row['pk'], **{field: row[lookup] for field, lookup in SEARCH_FIELDS.items()})
+        for row in queryset.values('pk', *SEARCH_FIELDS.values())
+    ]
+
+
+def sync_cars(car_ids):
+    """Rewrites the search rows of the given cars."""
+    car_ids = list(car_ids)
+    with atomic(immediate=True):
+        for start in range(0, len(car_ids), BATCH_SIZE):
+            batch = car_ids[start:start + BATCH_SIZE]
+            CarSearch.objects.filter(car_id__in=batch).delete()
+            CarSearch.objects.bulk_create(search_rows(Car.objects.filter(pk__in=batch)))
+
+
+def sync_trim(trim):
+    CarSearch.objects.filter(trim_id=trim.pk).update(
+        trim_name=trim.name,
+        model_id=trim.model_id,
+        model_name=trim.model.name,
+        make_id=trim.model.make_id,
+        make_name=trim.model.make.name,
+    )
+
+
+def sync_model(model):
+    CarSearch.objects.filter(model_id=model.pk).update(
+        model_name=model.name,
+        make_id=model.make_id,
+        make_name=model.make.name,
+    )
+
+
+def sync_make(make):
+    CarSearch.objects.filter(make_id=make.pk).update(make_name=make.name)
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Recreates the whole table from the cars, returning the number of rows."""
+    count = 0
+    last_pk = None
+    with atomic(immediate=True):
+        CarSearch.objects.all().delete()
+        while True:
+            queryset = Car.objects.order_by('pk')
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            rows = search_rows(queryset[:batch_size])
+            if not rows:
+                break
+            CarSearch.objects.bulk_create(rows)
+            count += len(rows)
+            last_pk = rows[-1].car_id
+    return count
@@ -0,0 +1,132 @@
+"""
+Deletion of catalog entries in the background.
+
+Deleting a make, model or trim marks it and the catalog entries below it as
+deleted, which hides them from the default managers, and queues a
+`DeletionJob`. The search rows of the cars below it are deleted at once, so
+that the names of the entry stop matching them. The jobs are run by the
+`run_deletion_jobs` command (`make deletion-worker`), kept running by the
+process supervisor of the deployment. It deletes the cars, trims and models
+of the entry bottom-up, in batches of raw deletes each committed on its own,
+so that no deletion ever loads the whole subtree in memory nor holds a long
+transaction.
+
+A worker claims a job, and renews its claim with every batch, by a
+conditional update of the job's `heartbeat_at`. The jobs that failed, or
+whose worker stopped renewing its claim for `HEARTBEAT_TIMEOUT`, are claimed
+again by the next poll, so that any number of workers may run at once.
+"""
+
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .bulk import delete_cars
+from .models import Car, CarSearch, DeletionJob, Make, Model, Trim
+from .response_cache import bump_versions
+from .transactions import atomic
+
+# Table of the deleted entry -> (model, lookups from Car, Trim and Model to the entry).
+DELETABLE = {
+    Make._meta.db_table: (Make, {Car: 'trim__model__make_id', Trim: 'model__make_id', Model: 'make_id'}),
+    Model._meta.db_table: (Model, {Car: 'trim__model_id', Trim: 'model_id'}),
+    Trim._meta.db_table: (Trim, {Car: 'trim_id'}),
+}
+
+# Model of the deleted entry -> CarSearch column of its id.
+SEARCH_COLUMNS = {Make: 'make_id', Model: 'model_id', Trim: 'trim_id'}
+
+# Progress counter of the job for the rows of each model.
+COUNTERS = {Car: 'cars_deleted', Trim: 'trims_deleted', Model: 'models_deleted'}
+
+BATCH_SIZE = 1000
+
+# Time after which the claim of a job that was not renewed is considered abandoned, and a failed job is retried.
+HEARTBEAT_TIMEOUT = timedelta(minutes=5)
+
+
+class ClaimLost(Exception):
+    """The job was claimed again by another worker."""
+
+
+def schedule_deletion(model, pk):
+    """
+    Marks the catalog entry `pk` of `model` and its descendants as deleted,
+    and returns the job deleting them, or None if there is no such entry.
+    """
+    model, lookups = DELETABLE[model._meta.db_table]
+    if not model.objects.filter(pk=pk).update(deleted=True):
+        return None
+
+    for child in (Model, Trim):
+        if child in lookups:
+            child.all_objects.filter(**{lookups[child]: pk}).update(deleted=True)
+    CarSearch.objects.filter(**{SEARCH_COLUMNS[model]: pk}).delete()
+
+    bump_versions(Make, Model, Trim)
+    return DeletionJob.objects.create(table=model._meta.db_table, object_id=pk)
+
+
+def run_job(job, batch_size=BATCH_SIZE):
+    """Runs `job` unless another worker claimed it, returning whether it ran."""
+    heartbeat_at = timezone.now()
+    claimed = DeletionJob.objects.filter(pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at).update(
+        status=DeletionJob.RUNNING, heartbeat_at=heartbeat_at, updated_at=heartbeat_at
+    )
+    if not claimed:
+        return False
+    job.status, job.heartbeat_at = DeletionJob.RUNNING, heartbeat_at
+
+    model, lookups = DELETABLE[job.table]
+    try:
+        for child in (Car, Trim, Model):
+            if child in lookups:
+                queryset = child._base_manager.filter(**{lookups[child]: job.object_id})
+                delete_in_batches(job, child, queryset, batch_size)
+
+        with atomic(immediate=True):
+            model._base_manager.filter(pk=job.object_id)._raw_delete(model._base_manager.db)
+            renew_claim(job, status=DeletionJob.DONE, finished_at=timezone.now(), error=None)
+    except ClaimLost:
+        return False
+    except Exception as e:
+        DeletionJob.objects.filter(pk=job.pk, heartbeat_at=job.heartbeat_at).update(
+            status=DeletionJob.FAILED, error=str(e), heartbeat_at=timezone.now(), updated_at=timezone.now()
+        )
+        raise
+
+    return True
+
+
+def renew_claim(job, **fields):
+    """Updates `fields` of the job and its heartbeat, raising `ClaimLost` if another worker claimed it since."""
+    heartbeat_at = timezone.now()
+    if not DeletionJob.objects.filter(pk=job.pk, status=DeletionJob.RUNNING, heartbeat_at=job.heartbeat_at).update(
+        heartbeat_at=heartbeat_at, updated_at=heartbeat_at, **fields
+    ):
+        raise ClaimLost()
+    job.heartbeat_at = heartbeat_at
+
+
+def delete_in_batches(job, model, queryset, batch_size):
+    while True:
+        with atomic(immediate=True):
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return
+            batch = model._base_manager.filter(pk__in=pks)
+            count = delete_cars(batch) if model is Car else batch._raw_delete(batch.db)
+            # Rolls the batch back when the claim was lost.
+            renew_claim(job, **{COUNTERS[model]: F(COUNTERS[model]) + count})
+
+
+def pending_jobs():
+    """
+    Returns the jobs to run: the queued ones, and the failed or running ones
+    whose heartbeat is older than `HEARTBEAT_TIMEOUT`.
+    """
+    stale = Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=timezone.now() - HEARTBEAT_TIMEOUT)
+    return DeletionJob.objects.filter(
+        Q(status=DeletionJob.PENDING) | Q(stale, status__in=[DeletionJob.FAILED, DeletionJob.RUNNING])
+    ).order_by('pk')
@@ -0,0 +1,70 @@
+"""Streaming serialization of the whole car inventory."""
+
+import csv
+import json
+
+from graphene.utils.str_converters import to_snake_case
+
+from .filters import car_filterset_class
+from .models import Car
+
+CHUNK_SIZE = 1000
+
+# Exported column -> Car lookup it is read from.
+EXPORT_COLUMNS = {
+    'id': 'id',
+    'owner': 'owner',
+    'color': 'color',
+    'year': 'year',
+    'trim_id': 'trim_id',
+    'trim': 'trim__name',
+    'model_id': 'trim__model_id',
+    'model': 'trim__model__name',
+    'make_id': 'trim__model__make_id',
+    'make': 'trim__model__make__name',
+}
+
+
+def filter_cars(params, request=None):
+    """
+    Returns the filterset of the cars matching `params`, which take the
+    same filters as `allCar`, in snake or camel case.
+    """
+    data = {to_snake_case(name): value for name, value in params.items()}
+    return car_filterset_class(data=data, queryset=Car.objects.all(), request=request)
+
+
+def iter_rows(queryset, after_id=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the rows of the cars in `queryset` ordered by id, starting after
+    `after_id`. Each chunk is a single query joining the catalog and seeking
+    on the id, so memory stays constant whatever the size of the table.
+    """
+    queryset = queryset.order_by('id').values_list(*EXPORT_COLUMNS.values())
+    while True:
+        chunk = queryset.filter(id__gt=after_id) if after_id is not None else queryset
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield dict(zip(EXPORT_COLUMNS, row))
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1][0]
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+class Echo(object):
+    """File-like object returning what is written to it, to stream from `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=list(EXPORT_COLUMNS))
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,297 @@
+"""Connection fields shared by the car nodes and the root query."""
+
+import json
+import operator
+from functools import partial, reduce
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q, QuerySet
+from graphene.relay import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
+from graphql import GraphQLError
+from graphql_relay.connection.arrayconnection import (
+    cursor_to_offset,
+    get_offset_with_default,
+    offset_to_cursor,
+)
+from graphql_relay.utils import base64, unbase64
+from promise import Promise
+
+from .loaders import get_loader
+from .optimizer import selects_total
+
+KEYSET_CURSOR_PREFIX = 'keyset:'
+
+
+class FilterConnectionField(DjangoFilterConnectionField):
+    """
+    Filter connection that does not count the filtered rows to slice a page.
+
+    Forward pages fetch `first + 1` rows to tell whether there is a next
+    page, and the total is only counted when the client selects
+    `totalCount`. Pages requested with `last` and no `before` cursor still
+    need the count to locate the end of the list.
+    """
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        iterable = maybe_queryset(iterable)
+        if not isinstance(iterable, QuerySet) or (args.get('last') is not None and not args.get('before')):
+            return super(FilterConnectionField, cls).resolve_connection(connection, args, iterable, max_limit)
+
+        offset = args.pop('offset', None)
+        after = args.get('after')
+        if offset:
+            if after:
+                offset += cursor_to_offset(after) + 1
+            # input offset starts at 1 while the graphene offset starts at 0
+            args['after'] = offset_to_cursor(offset - 1)
+
+        start = get_offset_with_default(args.get('after'), -1) + 1
+        first = args.get('first')
+        last = args.get('last')
+        if first is None and last is None:
+            first = max_limit
+
+        stop = get_offset_with_default(args.get('before'), None)
+        if first is not None:
+            stop = start + first + 1 if stop is None else min(stop, start + first + 1)
+        elif last is not None:
+            # One extra row before the page tells whether there is a previous page.
+            start = max(start, stop - last - 1)
+
+        nodes = list(iterable[start:stop]) if stop is None or stop > start else []
+
+        has_next_page = False
+        if first is not None and len(nodes) > first:
+            nodes = nodes[:first]
+            has_next_page = True
+
+        has_previous_page = False
+        if last is not None and len(nodes) > last:
+            start += len(nodes) - last
+            nodes = nodes[len(nodes) - last:]
+            has_previous_page = True
+
+        edges = [connection.Edge(node=node, cursor=offset_to_cursor(start + index)) for index, node in enumerate(nodes)]
+        connection = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            )
+        )
+        connection.iterable = iterable
+        return connection
+
+
+def page_stop(args, max_limit):
+    """
+    Returns the number of rows from the start of a list needed to resolve
+    the page of `args`, including the row telling whether there is a next
+    page, or None when every row is needed.
+    """
+    if args.get('last') is not None and not args.get('before'):
+        return None
+
+    start = get_offset_with_default(args.get('after'), -1) + 1 + (args.get('offset') or 0)
+    first = args.get('first')
+    if first is None and args.get('last') is None:
+        first = max_limit
+
+    stop = get_offset_with_default(args.get('before'), None)
+    if first is not None:
+        stop = start + first + 1 if stop is None else min(stop, start + first + 1)
+    return stop
+
+
+class RelatedConnectionField(FilterConnectionField):
+    """
+    Connection over a reverse foreign key (e.g. `MakeNode.models`).
+
+    Unfiltered connections reuse the rows prefetched by the query optimizer,
+    or are otherwise resolved through `loader`, so the children of every
+    parent in the page are fetched with a single query, limited to the rows
+    of the page unless the totals are selected. As soon as a filter argument
+    is given the field falls back to the related manager and the regular
+    filterset.
+    """
+
+    def __init__(self, type, loader, *args, **kwargs):
+        self.loader = loader
+        super(RelatedConnectionField, self).__init__(type, *args, **kwargs)
+
+    @staticmethod
+    def batched_resolver(parent_resolver, loader, filtering_args, max_limit, root, info, **args):
+        if any(arg in filtering_args for arg in args):
+            return parent_resolver(root, info, **args)
+
+        manager = parent_resolver(root, info, **args)
+        if manager.field.remote_field.get_cache_name() in getattr(root, '_prefetched_objects_cache', {}):
+            return list(manager.all())
+
+        # The totals are counted on the loaded list.
+        limit = None if selects_total(info.field_asts, info) else page_stop(args, max_limit)
+        return get_loader(info, loader, limit).load(root.pk)
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class):
+        # Batched and prefetched rows come as a (promise of a) list.
+        if Promise.is_thenable(iterable) or isinstance(iterable, list):
+            return iterable
+        return super(RelatedConnectionField, cls).resolve_queryset(
+            connection, iterable, info, args, filtering_args, filterset_class
+        )
+
+    def get_resolver(self, parent_resolver):
+        resolver = partial(self.batched_resolver, parent_resolver, self.loader, self.filtering_args, self.max_limit)
+        return super(RelatedConnectionField, self).get_resolver(resolver)
+
+
+class KeysetConnectionField(FilterConnectionField):
+    """
+    Filter connection paginated by seeking on `sort_key` instead of offsets.
+
+    Cursors are opaque and encode the sort key values and the primary key of
+    their node, so `after`/`before` turn into an indexed range condition and
+    fetching a deep page costs the same as fetching the first one. The
+    `offset` argument is not available on these connections.
+    """
+
+    def __init__(self, type, sort_key=(), *args, **kwargs):
+        self.sort_key = tuple(sort_key)
+        super(KeysetConnectionField, self).__init__(type, *args, **kwargs)
+        self._base_args.pop('offset', None)
+
+    @staticmethod
+    def encode_cursor(obj, keys):
+        values = [getattr(obj, f'keyset_{index}') for index in range(len(keys))]
+        return base64(KEYSET_CURSOR_PREFIX + json.dumps(values, cls=DjangoJSONEncoder))
+
+    @staticmethod
+    def decode_cursor(cursor, keys):
+        try:
+            prefix, values = unbase64(cursor).split(':', 1)
+            values = json.loads(values)
+        except (TypeError, ValueError):
+            raise GraphQLError(f'Invalid cursor {cursor}')
+
+        if prefix + ':' != KEYSET_CURSOR_PREFIX or not isinstance(values, list) or len(values) != len(keys):
+            raise GraphQLError(f'Invalid cursor {cursor}')
+
+        return values
+
+    @staticmethod
+    def seek_filter(keys, values, forward):
+        """
+        Returns the condition matching the rows sorted after (or before) the
+        given values, NULLs being sorted first.
+        """
+        conditions = []
+        equal = Q()
+        for key, value in zip(keys, values):
+            if value is None:
+                if forward:
+                    conditions.append(equal & Q(**{f'{key}__isnull': False}))
+                equal &= Q(**{f'{key}__isnull': True})
+            else:
+                if forward:
+                    conditions.append(equal & Q(**{f'{key}__gt': value}))
+                else:
+                    conditions.append(equal & (Q(**{f'{key}__lt': value}) | Q(**{f'{key}__isnull': True})))
+                equal &= Q(**{key: value})
+
+        return reduce(operator.or_, conditions, Q(pk__in=[]))
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None, sort_key=()):
+        queryset = maybe_queryset(iterable)
+        keys = sort_key + (queryset.model._meta.pk.attname, )
+        # Annotated so that the cursors never hit a column deferred by `.only()`.
+        queryset = queryset.annotate(**{f'keyset_{index}': F(key) for index, key in enumerate(keys)})
+
+        after = args.get('after')
+        before = args.get('before')
+        first = args.get('first')
+        last = args.get('last')
+
+        if after:
+            queryset = queryset.filter(cls.seek_filter(keys, cls.decode_cursor(after, keys), forward=True))
+        if before:
+            queryset = queryset.filter(cls.seek_filter(keys, cls.decode_cursor(before, keys), forward=False))
+
+        if last is not None and first is None:
+            ordering = [F(key).desc(nulls_last=True) for key in keys]
+            page = list(queryset.order_by(*ordering)[:last + 1])
+            has_previous_page = len(page) > last
+            page = page[:last][::-1]
+            has_next_page = False
+        else:
+            if first is None:
+                first = max_limit
+            ordering = [F(key).asc(nulls_first=True) for key in keys]
+            page = queryset.order_by(*ordering)
+            if first is not None:
+                page = list(page[:first + 1])
+                has_next_page = len(page) > first
+                page = page[:first]
+            else:
+                page = list(page)
+                has_next_page = False
+            if last is not None:
+                has_previous_page = len(page) > last
+                page = page[-last:] if last else []
+            else:
+                has_previous_page = False
+
+        edges = [connection.Edge(node=node, cursor=cls.encode_cursor(node, keys)) for node in page]
+        connection = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            )
+        )
+        connection.iterable = iterable
+        return connection
+
+    @classmethod
+    def connection_resolver(
+        cls, resolver, connection, default_manager, queryset_resolver, max_limit, enforce_first_or_last, sort_key,
+        root, info, **args
+    ):
+        first = args.get('first')
+        last = args.get('last')
+
+        if enforce_first_or_last and not (first or last):
+            raise GraphQLError(f'You must provide a `first` or `last` value to paginate the `{info.field_name}` '
+                               'connection.')
+
+        for name, value in (('first', first), ('last', last)):
+            if max_limit and value and value > max_limit:
+                raise GraphQLError(f'Requesting {value} records on the `{info.field_name}` connection exceeds the '
+                                   f'`{name}` limit of {max_limit} records.')
+
+        iterable = resolver(root, info, **args)
+        if iterable is None:
+            iterable = default_manager
+        iterable = queryset_resolver(connection, iterable, info, args)
+
+        return cls.resolve_connection(connection, args, iterable, max_limit=max_limit, sort_key=sort_key)
+
+    def get_resolver(self, parent_resolver):
+        return partial(
+            self.connection_resolver,
+            parent_resolver,
+            self.connection_type,
+            self.get_manager(),
+            self.get_queryset_resolver(),
+            self.max_limit,
+            self.enforce_first_or_last,
+            self.sort_key,
+        )
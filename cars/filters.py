@@ -0,0 +1,25 @@
+"""Filter sets of the connections that filter on more than model fields."""
+
+import django_filters
+from graphene_django.filter.utils import get_filterset_class
+
+from .models import Car
+
+
+class CarFilter(django_filters.FilterSet):
+    """
+    Filters the cars on their own fields and, through the denormalized
+    `car_search` table, on the names of their trim, model and make.
+    """
+
+    trim_name = django_filters.CharFilter(field_name='search__trim_name')
+    model_name = django_filters.CharFilter(field_name='search__model_name')
+    make_name = django_filters.CharFilter(field_name='search__make_name')
+
+    class Meta:
+        model = Car
+        fields = ['id', 'owner', 'color', 'year', 'trim']
+
+
+# CarFilter as exposed by `allCar`, i.e. filtering foreign keys by global ID.
+car_filterset_class = get_filterset_class(CarFilter)
@@ -0,0 +1,186 @@
+"""Bulk import of cars, and of the catalog entries they refer to, from a feed."""
+
+import csv
+import json
+import os
+
+from .bulk import bulk_create_with_ids
+from .car_search import sync_cars
+from .models import Car, Make, Model, Trim
+from .response_cache import bump_versions
+from .transactions import atomic
+
+COLORS = {color for color, _ in Car.COLOR_CHOICES}
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+def read_rows(path, file_format=None):
+    """
+    Yields the rows of a JSONL or CSV feed as dicts. The format is guessed
+    from the extension unless given.
+
+    A JSONL line that is not a JSON object is yielded as an `InvalidRow`, so
+    that it is skipped like any invalid row while the positions of the next
+    rows, and thereby the checkpoints, stay the same.
+    """
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+    with open(path, newline='', encoding='utf-8') as feed:
+        if file_format == 'csv':
+            yield from csv.DictReader(feed)
+        else:
+            for number, line in enumerate(feed, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = InvalidRow(f'invalid JSON on line {number}: {e}')
+                else:
+                    if not isinstance(row, dict):
+                        row = InvalidRow(f'line {number} is not a JSON object')
+                yield row
+
+
+def clean_row(row):
+    """Returns the `(make, model, trim, owner, color, year)` of a feed row."""
+    if isinstance(row, InvalidRow):
+        raise row
+
+    names = []
+    for key in ('make', 'model', 'trim'):
+        name = (row.get(key) or '').strip()
+        if not name:
+            raise InvalidRow(f'missing {key}')
+        names.append(name)
+
+    color = (row.get('color') or '').strip().upper() or None
+    if color is not None and color not in COLORS:
+        raise InvalidRow(f'unknown color {color}')
+
+    year = row.get('year')
+    if year in (None, ''):
+        year = None
+    else:
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            raise InvalidRow(f'invalid year {year}')
+        if not 1900 <= year <= 2100:
+            raise InvalidRow(f'year {year} out of range')
+
+    owner = row.get('owner') or None
+    return (*names, owner, color, year)
+
+
+class CatalogCache(object):
+    """
+    Ids of the makes, models and trims by name, loaded once, so that only
+    the entries missing from the catalog cost a query.
+    """
+
+    def __init__(self):
+        self.makes = {name: pk for pk, name in Make.objects.values_list('pk', 'name')}
+        self.models = {(make_id, name): pk for pk, make_id, name in Model.objects.values_list('pk', 'make_id', 'name')}
+        self.trims = {(model_id, name): pk for pk, model_id, name in Trim.objects.values_list('pk', 'model_id', 'name')}
+        self.created = set()
+
+    def trim_id(self, make, model, trim):
+        make_id = self.get_or_create(self.makes, make, Make, name=make)
+        model_id = self.get_or_create(self.models, (make_id, model), Model, make_id=make_id, name=model)
+        return self.get_or_create(self.trims, (model_id, trim), Trim, model_id=model_id, name=trim)
+
+    def get_or_create(self, cache, key, model, **fields):
+        if key not in cache:
+            obj, created = model.objects.get_or_create(**fields)
+            cache[key] = obj.pk
+            if created:
+                self.created.add(model)
+        return cache[key]
+
+
+class CarImporter(object):
+    """
+    Imports feed rows in chunks of `batch_size`, each written by a single
+    `bulk_create` in its own transaction. The number of rows committed is
+    saved to `checkpoint` after every chunk, so that an interrupted import
+    resumes right after the last committed chunk.
+    """
+
+    def __init__(self, batch_size=1000, checkpoint=None, on_chunk=None, on_invalid=None):
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.on_chunk = on_chunk
+        self.on_invalid = on_invalid
+        self.catalog = CatalogCache()
+        self.imported = 0
+        self.skipped = 0
+
+    def read_checkpoint(self):
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        return 0
+
+    def write_checkpoint(self, position):
+        if not self.checkpoint:
+            return
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            checkpoint.write(str(position))
+        os.replace(temporary, self.checkpoint)
+
+    def run(self, rows):
+        """Imports `rows`, skipping those committed by a previous run. Returns the position reached."""
+        position = self.read_checkpoint()
+        chunk = []
+        for index, row in enumerate(rows):
+            if index < position:
+                continue
+            chunk.append((index, row))
+            if len(chunk) == self.batch_size:
+                position = self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            position = self.import_chunk(chunk)
+
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        return position
+
+    def import_chunk(self, chunk):
+        self.catalog.created = set()
+        cars = []
+        try:
+            with atomic(immediate=True):
+                for index, row in chunk:
+                    try:
+                        make, model, trim, owner, color, year = clean_row(row)
+                    except InvalidRow as e:
+                        self.skipped += 1
+                        if self.on_invalid:
+                            self.on_invalid(index, e)
+                        continue
+                    cars.append(Car(trim_id=self.catalog.trim_id(make, model, trim), owner=owner, color=color,
+                                    year=year))
+
+                bulk_create_with_ids(Car, cars, batch_size=self.batch_size)
+                # bulk_create skips the signals: copy the new cars to car_search.
+                sync_cars(car.pk for car in cars)
+                if self.catalog.created:
+                    bump_versions(*self.catalog.created)
+        except Exception:
+            # The ids of the catalog entries created by the chunk were rolled back.
+            self.catalog = CatalogCache()
+            raise
+
+        self.imported += len(cars)
+        position = chunk[-1][0] + 1
+        self.write_checkpoint(position)
+        if self.on_chunk:
+            self.on_chunk(self.imported, position)
+        return position
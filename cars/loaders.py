@@ -0,0 +1,129 @@
+"""Per-request DataLoaders batching the relations between the car nodes."""
+
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from .models import Car, Make, Model, Trim
+
+
+class ObjectLoader(DataLoader):
+    """
+    Loads rows of `model` by primary key with a single `IN (...)` query.
+    Rows waiting for their deletion job are loaded too: the rows below them
+    stay listed until the job deletes them, and still point at them.
+    """
+
+    model = None
+
+    def batch_load_fn(self, keys):
+        # Keys may come straight from a decoded global ID, i.e. as strings.
+        keys = [self.model._meta.pk.to_python(key) for key in keys]
+        objects = self.model._base_manager.in_bulk(keys)
+        return Promise.resolve([objects.get(key) for key in keys])
+
+
+def first_rows(queryset, partition_by, limit):
+    """
+    Returns the SQL selecting the primary keys of the first `limit` rows of
+    `queryset` by primary key for every value of `partition_by`, to filter
+    on with `pk__in`: Django cannot filter on the window function itself.
+    """
+    pk = queryset.model._meta.pk
+    ranked = queryset.order_by().annotate(
+        position=Window(RowNumber(), partition_by=F(partition_by), order_by=F(pk.attname).asc())
+    ).values(pk.attname, 'position')
+    sql, params = ranked.query.sql_with_params()
+    column = connections[queryset.db].ops.quote_name(pk.column)
+    return RawSQL(f'SELECT {column} FROM ({sql}) WHERE "position" <= %s', (*params, limit))
+
+
+class RelatedListLoader(DataLoader):
+    """
+    Loads, for every key, the rows of `model` whose foreign key `field`
+    points at it, or only the first `limit` of them by primary key. All the
+    keys of a batch share a single `IN (...)` query.
+    """
+
+    model = None
+    field = None
+
+    def __init__(self, limit=None):
+        super(RelatedListLoader, self).__init__()
+        self.limit = limit
+
+    def batch_load_fn(self, keys):
+        attname = self.model._meta.get_field(self.field).attname
+        queryset = self.model._default_manager.filter(**{f'{self.field}__in': keys})
+        if self.limit is not None:
+            queryset = queryset.filter(pk__in=first_rows(queryset, attname, self.limit))
+        queryset = queryset.order_by('pk')
+
+        related = defaultdict(list)
+        for obj in queryset:
+            related[getattr(obj, attname)].append(obj)
+
+        return Promise.resolve([related[key] for key in keys])
+
+
+class MakeLoader(ObjectLoader):
+    model = Make
+
+
+class ModelLoader(ObjectLoader):
+    model = Model
+
+
+class TrimLoader(ObjectLoader):
+    model = Trim
+
+
+class ModelsByMakeLoader(RelatedListLoader):
+    model = Model
+    field = 'make'
+
+
+class TrimsByModelLoader(RelatedListLoader):
+    model = Trim
+    field = 'model'
+
+
+class CarsByTrimLoader(RelatedListLoader):
+    model = Car
+    field = 'trim'
+
+
+def get_loader(info, loader_class, *args):
+    """
+    Returns the `loader_class(*args)` instance bound to the current request,
+    so that every resolver of an operation shares the same batch and cache.
+    """
+    context = info.context
+    if context is None:
+        return loader_class(*args)
+
+    loaders = getattr(context, '_dataloaders', None)
+    if loaders is None:
+        loaders = context._dataloaders = {}
+
+    key = (loader_class, *args)
+    if key not in loaders:
+        loaders[key] = loader_class(*args)
+
+    return loaders[key]
+
+
+def load_related(info, instance, field_name, loader_class):
+    """
+    Returns the object `instance` points at through `field_name`, reusing it
+    when the queryset already joined it in with `select_related`.
+    """
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name)
+    return get_loader(info, loader_class).load(getattr(instance, field.attname))
@@ -0,0 +1,144 @@
+import json
+import math
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+
+DEFAULT_QUERY = '''
+query BenchmarkCars {
+  allCar(first: 20) {
+    edges {
+      node {
+        id
+        owner
+        year
+        trim {
+          name
+          model {
+            name
+            make {
+              name
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+
+def percentile(latencies, percent):
+    """Returns the `percent` percentile of the sorted `latencies` (nearest rank)."""
+    if not latencies:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(latencies)))
+    return latencies[rank - 1]
+
+
+def run_load(url, body, concurrency, duration, timeout=30):
+    """
+    Posts `body` to `url` from `concurrency` clients, each sending its next
+    request as soon as the previous one is answered, for `duration` seconds.
+    Returns the sorted latencies of the successful requests and the number
+    of failed ones.
+    """
+    deadline = time.monotonic() + duration
+    # The same token as cookie and header passes the CSRF check of the view.
+    csrf_token = get_random_string(64)
+    headers = {'Content-Type': 'application/json', 'Cookie': f'csrftoken={csrf_token}', 'X-CSRFToken': csrf_token}
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client():
+        while time.monotonic() < deadline:
+            request = Request(url, data=body, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urlopen(request, timeout=timeout) as response:
+                    response.read()
+                    failed = response.status != 200
+            except (HTTPError, URLError, OSError):
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                if failed:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sorted(latencies), errors[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load tests running GraphQL servers, e.g. the WSGI (`make run`) and ASGI (`make run-asgi`) deployments, '
+        'and prints the sustained requests per second and latency percentiles of each. Targets are given as '
+        '`label=url` pairs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='Servers to load test, as label=url.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Number of concurrent clients.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds each server is loaded for.')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of unmeasured load before each run.')
+        parser.add_argument('--query', help='File holding the GraphQL query to send, instead of a page of cars.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            label, separator, url = target.partition('=')
+            if not separator or not url:
+                raise CommandError(f'Invalid target {target}, expected label=url.')
+            targets.append((label, url))
+
+        query = DEFAULT_QUERY
+        if options['query']:
+            with open(options['query']) as query_file:
+                query = query_file.read()
+        body = json.dumps({'query': query}).encode('utf-8')
+
+        report = {}
+        for label, url in targets:
+            if options['warmup']:
+                run_load(url, body, options['concurrency'], options['warmup'])
+            latencies, errors = run_load(url, body, options['concurrency'], options['duration'])
+            report[label] = {
+                'requests': len(latencies),
+                'errors': errors,
+                'rps': round(len(latencies) / options['duration'], 1),
+                'p50_ms': self.milliseconds(percentile(latencies, 50)),
+                'p99_ms': self.milliseconds(percentile(latencies, 99)),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f'{options["concurrency"]} clients, {options["duration"]:g}s per server')
+        self.stdout.write(f'{"server":<16}{"requests":>10}{"errors":>8}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for label, row in report.items():
+            self.stdout.write(
+                f'{label:<16}{row["requests"]:>10}{row["errors"]:>8}{row["rps"]:>10}'
+                f'{self.format_ms(row["p50_ms"]):>10}{self.format_ms(row["p99_ms"]):>10}'
+            )
+
+    @staticmethod
+    def milliseconds(seconds):
+        return None if seconds is None else round(seconds * 1000, 2)
+
+    @staticmethod
+    def format_ms(value):
+        return '-' if value is None else f'{value:g}'
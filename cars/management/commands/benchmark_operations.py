@@ -0,0 +1,138 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings
+
+from cars.benchmarks import (
+    GATED_METRICS,
+    MACHINE_METRICS,
+    OPERATIONS,
+    BenchmarkError,
+    compare,
+    run_catalog,
+    seed,
+    seed_volumes,
+)
+from cars.models import Car, Make
+
+BENCHMARKS_DIR = settings.BASE_DIR.parent / 'benchmarks'
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the catalog of representative GraphQL operations of cars.benchmarks against a seeded copy of the '
+        'catalog, and compares their SQL queries and fetched rows to the committed baseline, and their wall time and '
+        'peak memory to the baseline recorded by the first run on this machine. Fails when a metric regressed by '
+        'more than the threshold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.01, help='Fraction of the full volumes (1k makes, '
+                            '10k models, 100k trims, 1M cars) to seed.')
+        parser.add_argument('--database', default=str(BENCHMARKS_DIR / 'benchmark.sqlite3'),
+                            help='SQLite file seeded once and reused by the next runs at the same scale.')
+        parser.add_argument('--baseline', default=str(BENCHMARKS_DIR / 'baseline.json'), help='Baseline file of '
+                            'the queries and rows, committed along with the code.')
+        parser.add_argument('--local-baseline', default=str(BENCHMARKS_DIR / 'local-baseline.json'),
+                            help='Baseline file of the time and memory on this machine, recorded when missing.')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Tolerated increase of every metric over '
+                            'the baseline, as a ratio.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs of each operation.')
+        parser.add_argument('--operation', action='append', choices=list(OPERATIONS), help='Operation to run, '
+                            'every one by default. May be repeated.')
+        parser.add_argument('--update-baseline', action='store_true', help='Store the results as the baselines.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        from project.schema import schema
+
+        baseline, local_baseline = None, None
+        if not options['update_baseline']:
+            baseline = self.read_baseline(options['baseline'], options['scale'])
+            local_baseline = self.read_baseline(options['local_baseline'], options['scale'])
+
+        # The benchmark never touches the configured databases.
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.close()
+        connection.settings_dict['NAME'] = options['database']
+        os.makedirs(os.path.dirname(os.path.abspath(options['database'])), exist_ok=True)
+
+        with override_settings(REPLICA_DATABASES=[]):
+            call_command('migrate', verbosity=0)
+            self.ensure_seeded(options['scale'])
+            try:
+                results = run_catalog(schema, repeat=options['repeat'], operations=options['operation'])
+            except BenchmarkError as e:
+                raise CommandError(f'An operation failed: {e}')
+
+        if options['update_baseline']:
+            self.write_baseline(options['baseline'], options['scale'], results, GATED_METRICS)
+        if options['update_baseline'] or local_baseline is None:
+            self.write_baseline(options['local_baseline'], options['scale'], results, MACHINE_METRICS)
+            self.stdout.write(f"Recorded the time and memory of this machine in {options['local_baseline']}.")
+
+        regressions = []
+        if baseline:
+            regressions += compare(results, baseline['operations'], options['threshold'], GATED_METRICS)
+        if local_baseline:
+            regressions += compare(results, local_baseline['operations'], options['threshold'], MACHINE_METRICS)
+
+        if options['json']:
+            self.stdout.write(json.dumps({'results': results, 'regressions': regressions}, indent=2))
+        else:
+            self.report(results, baseline, local_baseline)
+
+        if regressions:
+            for name, metric, reference, value in regressions:
+                self.stderr.write(f'{name}: {metric} went from {reference} to {value}')
+            raise CommandError(f'{len(regressions)} metrics regressed by more than {options["threshold"]:.0%}.')
+
+    def read_baseline(self, path, scale):
+        if not os.path.exists(path):
+            return None
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['scale'] != scale:
+            raise CommandError(f"The baseline {path} was recorded at scale {baseline['scale']}, not {scale}.")
+        return baseline
+
+    def write_baseline(self, path, scale, results, metrics):
+        operations = {name: {metric: values[metric] for metric in metrics} for name, values in results.items()}
+        with open(path, 'w') as baseline_file:
+            json.dump({'scale': scale, 'operations': operations}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+
+    def ensure_seeded(self, scale):
+        volumes = seed_volumes(scale)
+        if Make.objects.count() == volumes['makes'] and Car.objects.count() == volumes['cars']:
+            return
+
+        start = time.perf_counter()
+
+        def on_table(table, count):
+            self.stdout.write(f'Seeded {count} {table} ({time.perf_counter() - start:.1f}s)')
+
+        seed(scale, on_table=on_table)
+        self.stdout.write(f'Rebuilt the search tables ({time.perf_counter() - start:.1f}s)')
+
+    def report(self, results, *baselines):
+        reference = {}
+        for baseline in filter(None, baselines):
+            for name, metrics in baseline['operations'].items():
+                reference.setdefault(name, {}).update(metrics)
+        self.stdout.write(f'{"operation":<32}{"time ms":>16}{"queries":>12}{"rows":>14}{"peak KiB":>18}')
+        for name, metrics in results.items():
+            cells = []
+            for metric, width in (('time_ms', 16), ('queries', 12), ('rows', 14), ('peak_memory_kb', 18)):
+                value = f'{metrics[metric]:g}'
+                if metric in reference.get(name, {}):
+                    value += f' ({reference[name][metric]:g})'
+                cells.append(f'{value:>{width}}')
+            self.stdout.write(f'{name:<32}' + ''.join(cells))
+        if reference:
+            self.stdout.write('Baseline values in parentheses.')
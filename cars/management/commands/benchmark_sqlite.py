@@ -0,0 +1,160 @@
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.db.models import F
+
+from cars.models import Car, CarSearch
+from cars.transactions import atomic
+
+from .benchmark_http import percentile
+
+ALIAS = 'benchmark'
+
+# The stock backend as configured before the performance profile: rollback journal, one connection per request.
+PROFILES = {
+    'stock': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0, 'OPTIONS': {}},
+    'tuned': {
+        'ENGINE': 'project.sqlite',
+        'CONN_MAX_AGE': None,
+        'OPTIONS': {'pragmas': settings.SQLITE_PRAGMAS},
+    },
+}
+# Persistent journal mode of the copy of the database loaded with each profile.
+JOURNAL_MODES = {'stock': 'DELETE', 'tuned': 'WAL'}
+
+
+def read(alias, car_ids):
+    start = random.choice(car_ids)
+    queryset = Car.objects.using(alias).select_related('trim__model__make').filter(pk__gte=start).order_by('pk')
+    return list(queryset[:20])
+
+
+def write(alias, car_ids):
+    car_id = random.choice(car_ids)
+    owner = f'owner {random.randrange(1000000)}'
+    with atomic(using=alias, immediate=True):
+        Car.objects.using(alias).filter(pk=car_id).update(owner=owner, version=F('version') + 1)
+        CarSearch.objects.using(alias).filter(car_id=car_id).update(owner=owner)
+
+
+def worker(profile, name, kind, car_ids, deadline, results):
+    """Runs `read` or `write` as a separate process until `deadline`, as a server worker serving requests would."""
+    connections.close_all()
+    connections.databases[ALIAS] = dict(PROFILES[profile], NAME=name)
+    operation = read if kind == 'read' else write
+    persistent = PROFILES[profile]['CONN_MAX_AGE'] is None
+
+    latencies = []
+    errors = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            operation(ALIAS, car_ids)
+            latencies.append(time.perf_counter() - start)
+        except DatabaseError:
+            errors += 1
+        if not persistent:
+            connections[ALIAS].close()
+
+    results.put((kind, latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the read throughput and write latency of concurrent reader and writer processes on a copy of the '
+        'database, with the stock SQLite backend and with the tuned profile of project.sqlite (WAL, pragmas, '
+        'BEGIN IMMEDIATE and persistent connections).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Number of reading processes.')
+        parser.add_argument('--writers', type=int, default=2, help='Number of writing processes.')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds each profile is loaded for.')
+        parser.add_argument('--seed', type=int, default=0, help='Number of cars added to the copy beforehand.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            report = {}
+            for profile in PROFILES:
+                name = os.path.join(directory, f'{profile}.sqlite3')
+                car_ids = self.copy_database(name, options['seed'], JOURNAL_MODES[profile])
+                if not car_ids:
+                    raise CommandError('The car table is empty, add cars with --seed.')
+                report[profile] = self.run_profile(profile, name, car_ids, options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{options['readers']} readers, {options['writers']} writers, {options['duration']:g}s")
+        self.stdout.write(f'{"profile":<8}{"reads/s":>10}{"read p99":>10}{"writes/s":>10}{"write p50":>11}'
+                          f'{"write p99":>11}{"errors":>8}')
+        for profile, row in report.items():
+            self.stdout.write(
+                f'{profile:<8}{row["reads_per_second"]:>10}{row["read_p99_ms"]:>10}{row["writes_per_second"]:>10}'
+                f'{row["write_p50_ms"]:>11}{row["write_p99_ms"]:>11}{row["errors"]:>8}'
+            )
+
+    def copy_database(self, name, seed, journal_mode):
+        """Copies the database to `name`, in `journal_mode`, and returns the ids of its cars."""
+        source = connections['default']
+        source.ensure_connection()
+        target = sqlite3.connect(name)
+        source.connection.backup(target)
+        target.execute(f'PRAGMA journal_mode = {journal_mode}')
+
+        trim_ids = [row[0] for row in target.execute('SELECT id FROM trim')]
+        if seed and trim_ids:
+            rows = [(random.choice(trim_ids), f'owner {index}', 'RED', 2000 + index % 20) for index in range(seed)]
+            target.executemany('INSERT INTO car (trim_id, owner, color, year, version) VALUES (?, ?, ?, ?, 0)', rows)
+            target.commit()
+
+        car_ids = [row[0] for row in target.execute('SELECT id FROM car')]
+        target.close()
+        return car_ids
+
+    def run_profile(self, profile, name, car_ids, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.monotonic() + options['duration']
+        kinds = ['read'] * options['readers'] + ['write'] * options['writers']
+        processes = [
+            context.Process(target=worker, args=(profile, name, kind, car_ids, deadline, results)) for kind in kinds
+        ]
+        # The parent's connection must not be inherited by the processes.
+        connections.close_all()
+        for process in processes:
+            process.start()
+
+        latencies = {'read': [], 'write': []}
+        errors = 0
+        for _ in processes:
+            kind, kind_latencies, kind_errors = results.get()
+            latencies[kind] += kind_latencies
+            errors += kind_errors
+        for process in processes:
+            process.join()
+
+        reads = sorted(latencies['read'])
+        writes = sorted(latencies['write'])
+        return {
+            'reads_per_second': round(len(reads) / options['duration'], 1),
+            'read_p99_ms': self.milliseconds(percentile(reads, 99)),
+            'writes_per_second': round(len(writes) / options['duration'], 1),
+            'write_p50_ms': self.milliseconds(percentile(writes, 50)),
+            'write_p99_ms': self.milliseconds(percentile(writes, 99)),
+            'errors': errors,
+        }
+
+    @staticmethod
+    def milliseconds(seconds):
+        return None if seconds is None else round(seconds * 1000, 2)
@@ -0,0 +1,87 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from cars.models import Car
+
+
+class RollBack(Exception):
+    pass
+
+
+def car_queries(car):
+    """The `allCar` filters and orderings the indexes of `car` are meant for."""
+    return {
+        'owner': Car.objects.filter(owner=car.owner),
+        'year': Car.objects.filter(year=car.year),
+        'color': Car.objects.filter(color=car.color),
+        'color, year': Car.objects.filter(color=car.color, year=car.year),
+        'trim ordered by year': Car.objects.filter(trim_id=car.trim_id).order_by('year'),
+        'keyset on year': Car.objects.filter(year__gt=car.year).order_by('year', 'id')[:100],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Prints the query plan and timing of the filtered `allCar` queries with and without the indexes of the '
+        'car table, which are dropped in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Number of runs each query is timed over.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        car = Car.objects.order_by('pk').first()
+        if car is None:
+            self.stderr.write('The car table is empty.')
+            return
+
+        # Generated outside of the transaction: SQLite cannot open a schema editor inside one.
+        with connection.schema_editor(collect_sql=True) as editor:
+            for index in Car._meta.indexes:
+                editor.remove_index(Car, index)
+            drop_sql = editor.collected_sql
+
+        report = {label: {'after': self.measure(queryset, 'after', options['repeat'])}
+                  for label, queryset in car_queries(car).items()}
+
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for sql in drop_sql:
+                        cursor.execute(sql)
+                for label, queryset in car_queries(car).items():
+                    report[label]['before'] = self.measure(queryset, 'before', options['repeat'])
+                raise RollBack
+        except RollBack:
+            pass
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for label, plans in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name in ('before', 'after'):
+                self.stdout.write(f"  {name} ({plans[name]['ms']:.3f} ms):")
+                for line in plans[name]['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def measure(self, queryset, phase, repeat):
+        sql, params = queryset.query.sql_with_params()
+        # The phase comment keeps the statements prepared before the indexes were dropped from being reused.
+        sql = f'{sql} /* {phase} */'
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                cursor.execute(sql, params)
+                cursor.fetchall()
+            ms = (time.perf_counter() - start) * 1000 / repeat
+
+        return {'plan': plan, 'ms': ms}
@@ -0,0 +1,58 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cars.importer import CarImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports the cars of a JSONL or CSV feed of (make, model, trim, owner, color, year) rows, creating the '
+        'missing makes, models and trims. An interrupted import resumes from its checkpoint file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the feed.')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Format of the feed, by default guessed '
+                            'from its extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows written per transaction.')
+        parser.add_argument('--checkpoint', help='File recording the rows already imported, by default the path '
+                            'of the feed followed by .checkpoint.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and import every row.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be positive.')
+
+        checkpoint = options['checkpoint'] or f"{options['path']}.checkpoint"
+        start = time.perf_counter()
+
+        def on_chunk(imported, position):
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            self.stdout.write(f'{imported} cars imported, {position} rows read ({imported / elapsed:.0f} rows/s)')
+
+        def on_invalid(index, error):
+            self.stderr.write(f'Skipped row {index + 1}: {error}')
+
+        importer = CarImporter(
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint,
+            on_chunk=on_chunk,
+            on_invalid=on_invalid,
+        )
+        if options['restart']:
+            importer.write_checkpoint(0)
+        elif importer.read_checkpoint():
+            self.stdout.write(f'Resuming after row {importer.read_checkpoint()}.')
+
+        try:
+            importer.run(read_rows(options['path'], options['format']))
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(e)
+
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.imported} cars in {elapsed:.1f}s ({importer.imported / elapsed:.0f} rows/s), '
+            f'skipped {importer.skipped} invalid rows.'
+        ))
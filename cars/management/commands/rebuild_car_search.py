@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from cars.car_search import BATCH_SIZE, rebuild
+from cars.search import rebuild_fts
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the denormalized car_search table from the cars and their trim, model and make, and its '
+        'full-text index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Number of cars inserted per query.')
+
+    def handle(self, *args, **options):
+        count = rebuild(batch_size=options['batch_size'])
+        rebuild_fts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the search rows of {count} cars.'))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from cars.deletion import BATCH_SIZE, pending_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the queued deletions of makes, models and trims, deleting their subtree in batches. The failed and '
+        'abandoned jobs are retried once their heartbeat is older than the timeout, and any number of workers may run '
+        'at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Number of rows deleted per '
+                            'transaction.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty instead of polling it.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between two polls of the queue.')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                jobs = list(pending_jobs())
+            except DatabaseError as e:
+                # E.g. locked by a writer: polled again after the interval.
+                self.stderr.write(f'Failed to read the deletion queue: {e}')
+                jobs = []
+
+            for job in jobs:
+                try:
+                    if run_job(job, batch_size=options['batch_size']):
+                        self.stdout.write(f'Deleted {job.table} {job.object_id}.')
+                except Exception as e:
+                    self.stderr.write(f'Failed to delete {job.table} {job.object_id}: {e}')
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,49 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def snapshot(target):
+    """
+    Copies the primary database into the SQLite file `target` with the
+    online backup API. The copy is made in a single step, so the connections
+    reading from `target` see either the previous or the new snapshot.
+    """
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    replica = sqlite3.connect(target, timeout=settings.SQLITE_PRAGMAS['busy_timeout'] / 1000)
+    try:
+        primary.connection.backup(replica)
+    finally:
+        replica.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Copies the primary SQLite database into the read replicas of DATABASE_REPLICAS, once or every '
+        '`--interval` seconds, so that they can be tested locally.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help='Files to copy the database to, by default the replicas.')
+        parser.add_argument('--interval', type=float, help='Seconds between snapshots, which are taken forever.')
+
+    def handle(self, *args, **options):
+        targets = options['targets'] or [str(settings.DATABASES[alias]['NAME']) for alias in settings.REPLICA_DATABASES]
+        if not targets:
+            raise CommandError('No replica is configured, set DATABASE_REPLICAS or give the target files.')
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Snapshots are only available on SQLite.')
+
+        while True:
+            start = time.perf_counter()
+            for target in targets:
+                snapshot(target)
+            self.stdout.write(f'{len(targets)} replicas updated in {time.perf_counter() - start:.3f}s')
+
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,288 @@
+"""
+Per-operation metrics of the GraphQL view, exposed in the Prometheus text
+format by the `/metrics` view.
+
+The samples are added up in a SQLite file (`METRICS_DATABASE`) shared by
+every process of the server, so that `/metrics` reports the totals of all
+the gunicorn workers whichever answers the scrape. Each process buffers its
+samples and writes them at most every `METRICS_FLUSH_INTERVAL` seconds, as a
+write per request makes the workers queue up on the lock of the file.
+
+Operation names are chosen by the clients: only the first
+`METRICS_MAX_OPERATIONS` names seen by the server are used as labels, the
+others being reported as `other`. They are registered in the same file, so
+that the limit holds for every process, including the recycled workers.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Labels of the operations whose name is not a plain name, missing, or past METRICS_MAX_OPERATIONS names.
+INVALID_OPERATION = 'invalid'
+ANONYMOUS_OPERATION = 'anonymous'
+OTHER_OPERATION = 'other'
+OPERATION_NAME_RE = re.compile(r'^[_A-Za-z][_0-9A-Za-z]{0,63}$')
+
+METRICS = {
+    'graphql_requests_total': ('counter', 'GraphQL operations executed.'),
+    'graphql_request_duration_seconds': ('histogram', 'Time taken to execute and encode GraphQL operations.'),
+    'graphql_sql_queries_total': ('counter', 'SQL queries run by GraphQL operations.'),
+    'graphql_sql_duration_seconds_total': ('counter', 'Time spent in the SQL queries of GraphQL operations.'),
+    'graphql_resolver_errors_total': ('counter', 'Errors raised by GraphQL operations, by root field.'),
+    'graphql_response_size_bytes_total': ('counter', 'Size of the GraphQL responses.'),
+}
+
+CREATE_SQL = '''
+CREATE TABLE IF NOT EXISTS sample (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels)
+)
+'''
+
+CREATE_OPERATION_SQL = '''
+CREATE TABLE IF NOT EXISTS operation (
+    name TEXT NOT NULL PRIMARY KEY
+)
+'''
+
+REGISTER_OPERATION_SQL = '''
+INSERT OR IGNORE INTO operation (name) SELECT ? WHERE (SELECT COUNT(*) FROM operation) < ?
+'''
+
+INCREMENT_SQL = '''
+INSERT INTO sample (name, labels, value) VALUES (?, ?, ?)
+ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value
+'''
+
+
+class MetricsStore(object):
+    """Counters added up in a SQLite file by every thread and process."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.pending_pid = os.getpid()
+        self.flushed_at = time.monotonic()
+        self.operations = frozenset()
+        self.operations_full = False
+
+    def connect(self):
+        # Connections are neither shared between threads nor inherited by forked processes.
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None and self.local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+        conn.execute('PRAGMA journal_mode = WAL')
+        # Losing the last increments on a power loss is fine for metrics.
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute(CREATE_SQL)
+        conn.execute(CREATE_OPERATION_SQL)
+        self.local.conn = conn
+        self.local.pid = os.getpid()
+        return conn
+
+    def increment(self, samples):
+        """Adds the `(name, labels, value)` samples in a single transaction."""
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(INCREMENT_SQL, samples)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def add(self, samples):
+        """Buffers the samples, writing the buffer when it is older than `METRICS_FLUSH_INTERVAL`."""
+        with self.lock:
+            if self.pending_pid != os.getpid():
+                # Inherited from the parent process, which writes it itself.
+                self.pending = {}
+                self.pending_pid = os.getpid()
+            for name, labels, value in samples:
+                self.pending[name, labels] = self.pending.get((name, labels), 0) + value
+        if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            flushed_at, self.flushed_at = self.flushed_at, time.monotonic()
+        if not pending or self.pending_pid != os.getpid():
+            return
+        try:
+            self.increment([(name, labels, value) for (name, labels), value in pending.items()])
+        except sqlite3.Error:
+            # Kept, and written again by the next request, without going through `add`, which would flush again.
+            with self.lock:
+                for key, value in pending.items():
+                    self.pending[key] = self.pending.get(key, 0) + value
+                self.flushed_at = flushed_at
+            raise
+
+    def register_operation(self, name):
+        """
+        Returns whether `name` is one of the operations used as labels,
+        registering it when there are fewer than `METRICS_MAX_OPERATIONS`.
+        Once they are all registered, the names are only read once per
+        process.
+        """
+        if name in self.operations:
+            return True
+        if self.operations_full:
+            return False
+
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(REGISTER_OPERATION_SQL, (name, settings.METRICS_MAX_OPERATIONS))
+            operations = frozenset(row[0] for row in conn.execute('SELECT name FROM operation'))
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+        self.operations = operations
+        self.operations_full = len(operations) >= settings.METRICS_MAX_OPERATIONS
+        return name in operations
+
+    def collect(self):
+        self.flush()
+        return self.connect().execute('SELECT name, labels, value FROM sample ORDER BY name, labels').fetchall()
+
+
+_stores = {}
+
+
+def get_store():
+    path = str(settings.METRICS_DATABASE)
+    if path not in _stores:
+        _stores[path] = MetricsStore(path)
+    return _stores[path]
+
+
+def format_labels(**labels):
+    """Returns the labels in the exposition format, e.g. `operation="allCar",le="0.1"`."""
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+
+
+def operation_label(operation_name):
+    if not operation_name:
+        return ANONYMOUS_OPERATION
+    if not OPERATION_NAME_RE.match(operation_name):
+        return INVALID_OPERATION
+    try:
+        return operation_name if get_store().register_operation(operation_name) else OTHER_OPERATION
+    except sqlite3.Error:
+        logger.warning('Could not register the operation %s', operation_name, exc_info=True)
+        return OTHER_OPERATION
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class OperationMetrics(object):
+    """
+    Measures the execution of a GraphQL operation: wrapped around it, counts
+    and times the SQL queries run on every database.
+    """
+
+    def __init__(self, operation_name):
+        self.operation = operation_label(operation_name)
+        self.started = time.perf_counter()
+        self.sql_queries = 0
+        self.sql_duration = 0
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_queries += 1
+            self.sql_duration += time.perf_counter() - start
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.started
+
+    def extension(self):
+        return {
+            'operation': self.operation,
+            'durationMs': round(self.duration * 1000, 3),
+            'sqlQueries': self.sql_queries,
+            'sqlDurationMs': round(self.sql_duration * 1000, 3),
+        }
+
+    def samples(self, errors, response_size):
+        operation = format_labels(operation=self.operation)
+        duration = self.duration
+        samples = [
+            ('graphql_requests_total', operation, 1),
+            ('graphql_request_duration_seconds_sum', operation, duration),
+            ('graphql_request_duration_seconds_count', operation, 1),
+            ('graphql_sql_queries_total', operation, self.sql_queries),
+            ('graphql_sql_duration_seconds_total', operation, self.sql_duration),
+            ('graphql_response_size_bytes_total', operation, response_size),
+        ]
+        for bound in list(settings.METRICS_LATENCY_BUCKETS) + [float('inf')]:
+            labels = format_labels(operation=self.operation, le=format_bound(bound))
+            samples.append(('graphql_request_duration_seconds_bucket', labels, 1 if duration <= bound else 0))
+        for error in errors or []:
+            path = getattr(error, 'path', None)
+            labels = format_labels(operation=self.operation, field=path[0] if path else '')
+            samples.append(('graphql_resolver_errors_total', labels, 1))
+        return samples
+
+    def record(self, errors, response_size):
+        """Adds the measures of the operation to the store, never failing the request."""
+        try:
+            get_store().add(self.samples(errors, response_size))
+        except sqlite3.Error:
+            logger.warning('Could not record the metrics of %s', self.operation, exc_info=True)
+
+
+def exposition(rows):
+    """Renders the stored samples in the Prometheus text format."""
+    lines = []
+    families = {}
+    for name, labels, value in rows:
+        family = next((metric for metric in METRICS if name == metric or name.startswith(metric + '_')), name)
+        families.setdefault(family, []).append((name, labels, value))
+
+    for family in sorted(families):
+        if family in METRICS:
+            metric_type, help_text = METRICS[family]
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {metric_type}')
+        for name, labels, value in families[family]:
+            lines.append(f'{name}{{{labels}}} {value!r}' if labels else f'{name} {value!r}')
+    return '\n'.join(lines) + '\n'
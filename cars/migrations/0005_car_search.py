@@ -0,0 +1,66 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_SQL = '''
+INSERT INTO car_search (car_id, owner, color, year, trim_id, trim_name, model_id, model_name, make_id, make_name)
+SELECT car.id, car.owner, car.color, car.year, trim.id, trim.name, model.id, model.name, make.id, make.name
+FROM car
+INNER JOIN trim ON trim.id = car.trim_id
+INNER JOIN model ON model.id = trim.model_id
+INNER JOIN make ON make.id = model.make_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0004_table_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarSearch',
+            fields=[
+                ('car', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='cars.car')),
+                ('owner', models.CharField(blank=True, max_length=255, null=True)),
+                ('color', models.CharField(blank=True, choices=[('WHITE', 'WHITE'), ('BLACK', 'BLACK'), ('SILVER', 'SILVER'), ('BLUE', 'BLUE'), ('RED', 'RED')], max_length=6, null=True)),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('trim_id', models.IntegerField()),
+                ('trim_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('model_id', models.IntegerField()),
+                ('model_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('make_id', models.IntegerField()),
+                ('make_name', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'db_table': 'car_search',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='carsearch',
+            index=models.Index(fields=['make_name', 'model_name'], name='car_search_make_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carsearch',
+            index=models.Index(fields=['model_name'], name='car_search_model_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carsearch',
+            index=models.Index(fields=['trim_name'], name='car_search_trim_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carsearch',
+            index=models.Index(fields=['make_id'], name='car_search_make_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carsearch',
+            index=models.Index(fields=['model_id'], name='car_search_model_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carsearch',
+            index=models.Index(fields=['trim_id'], name='car_search_trim_id_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
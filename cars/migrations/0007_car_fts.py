@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# External content FTS5 index over car_search, kept in sync by triggers.
+# https://www.sqlite.org/fts5.html#external_content_tables
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE car_fts USING fts5(
+        owner, make_name, model_name, trim_name,
+        content='car_search', content_rowid='car_id', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER car_fts_insert AFTER INSERT ON car_search BEGIN
+        INSERT INTO car_fts (rowid, owner, make_name, model_name, trim_name)
+        VALUES (new.car_id, new.owner, new.make_name, new.model_name, new.trim_name);
+    END
+    """,
+    """
+    CREATE TRIGGER car_fts_delete AFTER DELETE ON car_search BEGIN
+        INSERT INTO car_fts (car_fts, rowid, owner, make_name, model_name, trim_name)
+        VALUES ('delete', old.car_id, old.owner, old.make_name, old.model_name, old.trim_name);
+    END
+    """,
+    """
+    CREATE TRIGGER car_fts_update AFTER UPDATE ON car_search BEGIN
+        INSERT INTO car_fts (car_fts, rowid, owner, make_name, model_name, trim_name)
+        VALUES ('delete', old.car_id, old.owner, old.make_name, old.model_name, old.trim_name);
+        INSERT INTO car_fts (rowid, owner, make_name, model_name, trim_name)
+        VALUES (new.car_id, new.owner, new.make_name, new.model_name, new.trim_name);
+    END
+    """,
+    "INSERT INTO car_fts (car_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS car_fts_update",
+    "DROP TRIGGER IF EXISTS car_fts_delete",
+    "DROP TRIGGER IF EXISTS car_fts_insert",
+    "DROP TABLE IF EXISTS car_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0006_car_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
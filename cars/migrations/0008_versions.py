@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0007_car_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='make',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trim',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
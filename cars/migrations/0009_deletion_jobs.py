@@ -0,0 +1,47 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0008_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('table', models.CharField(max_length=255)),
+                ('object_id', models.IntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('DONE', 'DONE'), ('FAILED', 'FAILED')], db_index=True, default='PENDING', max_length=7)),
+                ('cars_deleted', models.IntegerField(default=0)),
+                ('trims_deleted', models.IntegerField(default=0)),
+                ('models_deleted', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'deletion_job',
+            },
+        ),
+        migrations.AddField(
+            model_name='make',
+            name='deleted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='deleted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='trim',
+            name='deleted',
+            field=models.BooleanField(default=False),
+        ),
+    ]
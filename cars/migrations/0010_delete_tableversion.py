@@ -0,0 +1,16 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0009_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='TableVersion',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0010_delete_tableversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='make',
+            name='name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='model',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trim',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='make',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('name',), name='make_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='model',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('name', 'make'), name='model_name_make_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='trim',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('name', 'model'), name='trim_name_model_uniq'),
+        ),
+    ]
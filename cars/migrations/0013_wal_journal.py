@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        # Persistent: the connections opened afterwards use the same journal.
+        schema_editor.execute(f'PRAGMA journal_mode = {mode}')
+    return run
+
+
+class Migration(migrations.Migration):
+    # The journal mode cannot be changed within a transaction.
+    atomic = False
+
+    dependencies = [
+        ('cars', '0012_deletion_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE')),
+    ]
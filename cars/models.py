@@ -1,13 +1,30 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
+
+
+class CatalogManager(models.Manager):
+    """Default manager of the catalog, hiding the rows waiting for their deletion job."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted=False)
 
 
 class Make(models.Model):
     id = models.AutoField(primary_key=True)
-    name = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    name = models.CharField(max_length=255, null=True, blank=True)
+    version = models.PositiveIntegerField(default=0)
+    deleted = models.BooleanField(default=False)
+
+    objects = CatalogManager()
+    all_objects = models.Manager()
 
     class Meta:
         db_table = "make"
+        # Only the live rows hold the name, so that a deleted make can be created again before its job runs.
+        constraints = [
+            models.UniqueConstraint(fields=['name'], condition=Q(deleted=False), name='make_name_uniq'),
+        ]
 
     def __str__(self):
         return self.name
@@ -17,12 +34,17 @@ class Model(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255, null=True, blank=True)
     make = models.ForeignKey('Make', on_delete=models.CASCADE, related_name='models')
+    version = models.PositiveIntegerField(default=0)
+    deleted = models.BooleanField(default=False)
+
+    objects = CatalogManager()
+    all_objects = models.Manager()
 
     class Meta:
         db_table = "model"
-        unique_together = (
-            ('name', 'make'),
-        )
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'make'], condition=Q(deleted=False), name='model_name_make_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.make} {self.name}"
@@ -32,12 +54,17 @@ class Trim(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255, null=True, blank=True)
     model = models.ForeignKey('Model', on_delete=models.CASCADE, related_name='trims')
+    version = models.PositiveIntegerField(default=0)
+    deleted = models.BooleanField(default=False)
+
+    objects = CatalogManager()
+    all_objects = models.Manager()
 
     class Meta:
         db_table = "trim"
-        unique_together = (
-            ('name', 'model'),
-        )
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'model'], condition=Q(deleted=False), name='trim_name_model_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.model} {self.name}"
@@ -63,9 +90,85 @@ class Car(models.Model):
     year = models.IntegerField(validators=[MinValueValidator(
         1900), MaxValueValidator(2100)], null=True, blank=True, default=2015)
     trim = models.ForeignKey('Trim', on_delete=models.CASCADE, related_name='cars')
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "car"
+        # Match the filters and orderings of `allCar`; `color` alone is served by the `(color, year)` prefix.
+        indexes = [
+            models.Index(fields=['owner'], name='car_owner_idx'),
+            models.Index(fields=['year'], name='car_year_idx'),
+            models.Index(fields=['color', 'year'], name='car_color_year_idx'),
+            models.Index(fields=['trim', 'year'], name='car_trim_year_idx'),
+        ]
 
     def __str__(self):
         return f"{self.owner}'s {self.color.capitalize()} {self.year} {self.trim}"
+
+
+class CarSearch(models.Model):
+    """
+    Denormalized copy of every car along with the names of its trim, model
+    and make, so that cars can be filtered by those names without joining
+    the whole catalog. Maintained by `cars.car_search`.
+    """
+
+    car = models.OneToOneField('Car', on_delete=models.CASCADE, primary_key=True, related_name='search')
+    owner = models.CharField(max_length=255, null=True, blank=True)
+    color = models.CharField(max_length=6, choices=Car.COLOR_CHOICES, null=True, blank=True)
+    year = models.IntegerField(null=True, blank=True)
+    trim_id = models.IntegerField()
+    trim_name = models.CharField(max_length=255, null=True, blank=True)
+    model_id = models.IntegerField()
+    model_name = models.CharField(max_length=255, null=True, blank=True)
+    make_id = models.IntegerField()
+    make_name = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        db_table = "car_search"
+        indexes = [
+            models.Index(fields=['make_name', 'model_name'], name='car_search_make_model_idx'),
+            models.Index(fields=['model_name'], name='car_search_model_name_idx'),
+            models.Index(fields=['trim_name'], name='car_search_trim_name_idx'),
+            models.Index(fields=['make_id'], name='car_search_make_id_idx'),
+            models.Index(fields=['model_id'], name='car_search_model_id_idx'),
+            models.Index(fields=['trim_id'], name='car_search_trim_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner}'s {self.year} {self.make_name} {self.model_name} {self.trim_name}"
+
+
+class DeletionJob(models.Model):
+    """Background deletion of a catalog entry and everything below it, see `cars.deletion`."""
+
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'PENDING'),
+        (RUNNING, 'RUNNING'),
+        (DONE, 'DONE'),
+        (FAILED, 'FAILED'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    table = models.CharField(max_length=255)
+    object_id = models.IntegerField()
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    cars_deleted = models.IntegerField(default=0)
+    trims_deleted = models.IntegerField(default=0)
+    models_deleted = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    # Renewed by the worker running the job, see `cars.deletion`.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "deletion_job"
+
+    def __str__(self):
+        return f"Deletion of {self.table} {self.object_id} ({self.status})"
@@ -1,15 +1,27 @@
 import graphene
+from django.core.exceptions import ValidationError
+from django.db.models import F
 from graphene import relay
 from graphql import GraphQLError
 from graphql_relay import from_global_id
 
 from cars.models import Car, Trim
-from cars.types import CarNode
+from cars.types import CarFilterInput, CarNode
 
+from ..bulk import bulk_create_with_ids, delete_cars
+from ..car_search import sync_cars
+from ..filters import car_filterset_class
+from .updates import is_selected, parent_pk, update_row
 from .validations import validate_mutation
 
 colorType = graphene.Enum('carcolor', Car.COLOR_CHOICES)
 
+CAR_VALIDATIONS = {
+    'owner': {'max': 255, },
+    'color': {'max': 255, },
+    'year': {'max': 2100, 'min': 1900, },
+}
+
 
 class CarCreateData(graphene.InputObjectType):
     owner = graphene.String()
@@ -33,13 +45,7 @@ class CreateCar(relay.ClientIDMutation):
 
     @classmethod
     def mutate_and_get_payload(cls, root, info, data=None):
-        validate_dict = {
-            'owner': {'max': 255, },
-            'color': {'max': 255, },
-            'year': {'max': 2100, 'min': 1900, },
-        }
-
-        validate_mutation(validate_dict, data)
+        validate_mutation(CAR_VALIDATIONS, data)
 
         if data is None:
             raise GraphQLError(f'empty data')
@@ -49,7 +55,7 @@ class CreateCar(relay.ClientIDMutation):
         if trim is None:
             raise GraphQLError(f'Missing foreign key trimId')
         else:
-            trim = from_global_id(trim)[1]
+            trim = parent_pk(Trim, trim)
 
         obj = Car.objects.create(**data, trim_id=trim)
 
@@ -59,27 +65,23 @@ class CreateCar(relay.ClientIDMutation):
 class UpdateCar(relay.ClientIDMutation):
     class Input:
         id = graphene.ID(required=True)
+        expected_version = graphene.Int(description='Only update the car if it still has this version.')
         data = CarUpdateData()
 
     car = graphene.Field(CarNode)
 
     @classmethod
-    def mutate_and_get_payload(cls, root, info, id, data):
-        validate_dict = {
-            'owner': {'max': 255, },
-            'color': {'max': 255, },
-            'year': {'max': 2100, 'min': 1900, },
-        }
-
-        validate_mutation(validate_dict, data)
+    def mutate_and_get_payload(cls, root, info, id, data, expected_version=None):
+        validate_mutation(CAR_VALIDATIONS, data)
 
         trim = data.pop('trim', None)
         if trim is not None:
-            data['trim_id'] = from_global_id(trim)[1]
+            data['trim_id'] = parent_pk(Trim, trim)
 
-        obj, _ = Car.objects.update_or_create(pk=from_global_id(id)[1], defaults=data)
+        pk = update_row(Car, id, data, expected_version)
+        sync_cars([pk])
 
-        return UpdateCar(car=obj)
+        return UpdateCar(car=Car.objects.get(pk=pk) if is_selected(info, 'car') else None)
 
 
 class DeleteCar(relay.ClientIDMutation):
@@ -93,3 +95,170 @@ class DeleteCar(relay.ClientIDMutation):
         obj = Car.objects.get(pk=from_global_id(id)[1])
         obj.delete()
         return DeleteCar(ok=True)
+
+
+class CarBulkUpdateData(CarUpdateData):
+    id = graphene.ID(required=True)
+
+
+class CarItemError(graphene.ObjectType):
+    """Error of the item at `index` in the input list of a bulk mutation."""
+
+    index = graphene.Int(required=True)
+    message = graphene.String(required=True)
+
+
+def decode_car_ids(ids, errors):
+    """Returns the primary keys of the `ids`, reporting the unknown ones in `errors`."""
+    pks = []
+    for index, id in enumerate(ids):
+        try:
+            type_name, pk = from_global_id(id)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            type_name, pk = None, None
+        if type_name != CarNode._meta.name:
+            errors.append(CarItemError(index=index, message=f'Invalid car id {id}'))
+            pk = None
+        pks.append(pk)
+
+    existing = set(Car.objects.filter(pk__in=[pk for pk in pks if pk is not None]).values_list('pk', flat=True))
+    for index, pk in enumerate(pks):
+        if pk is not None and pk not in existing:
+            errors.append(CarItemError(index=index, message=f'Car {ids[index]} does not exist'))
+    return pks
+
+
+def decode_trim_ids(items, errors):
+    """Replaces the `trim` global IDs of `items` by `trim_id`, reporting the unknown trims in `errors`."""
+    for item in items:
+        trim = item.pop('trim', None)
+        if trim is not None:
+            try:
+                item['trim_id'] = int(from_global_id(trim)[1])
+            except (TypeError, ValueError):
+                item['trim_id'] = None
+
+    trim_ids = {item['trim_id'] for item in items if item.get('trim_id') is not None}
+    existing = set(Trim.objects.filter(pk__in=trim_ids).values_list('pk', flat=True))
+    for index, item in enumerate(items):
+        if 'trim_id' in item and item['trim_id'] not in existing:
+            errors.append(CarItemError(index=index, message='Trim does not exist'))
+
+
+def validate_items(items, errors):
+    for index, item in enumerate(items):
+        try:
+            validate_mutation(CAR_VALIDATIONS, item)
+        except GraphQLError as e:
+            errors.append(CarItemError(index=index, message=e.message))
+
+
+class CreateCars(relay.ClientIDMutation):
+    """
+    Creates every car of `data` with a single insert, or none of them when
+    any is invalid, in which case the errors of the items are returned.
+    """
+
+    class Input:
+        data = graphene.List(graphene.NonNull(CarCreateData), required=True)
+
+    cars = graphene.List(graphene.NonNull(CarNode))
+    errors = graphene.List(graphene.NonNull(CarItemError), required=True)
+
+    @classmethod
+    def mutate_and_get_payload(cls, root, info, data):
+        items = [dict(item) for item in data]
+        errors = []
+        validate_items(items, errors)
+        decode_trim_ids(items, errors)
+        if errors:
+            return CreateCars(cars=None, errors=sorted(errors, key=lambda error: error.index))
+
+        cars = bulk_create_with_ids(Car, [Car(**item) for item in items])
+        sync_cars(car.pk for car in cars)
+
+        return CreateCars(cars=cars, errors=[])
+
+
+class UpdateCars(relay.ClientIDMutation):
+    """
+    Updates every car of `data` with a single bulk update, or none of them
+    when any is invalid, in which case the errors of the items are returned.
+    """
+
+    class Input:
+        data = graphene.List(graphene.NonNull(CarBulkUpdateData), required=True)
+
+    cars = graphene.List(graphene.NonNull(CarNode))
+    errors = graphene.List(graphene.NonNull(CarItemError), required=True)
+
+    @classmethod
+    def mutate_and_get_payload(cls, root, info, data):
+        items = [dict(item) for item in data]
+        errors = []
+        pks = decode_car_ids([item.pop('id') for item in items], errors)
+        seen = set()
+        for index, pk in enumerate(pks):
+            if pk is not None and pk in seen:
+                errors.append(CarItemError(index=index, message='Car updated more than once'))
+            seen.add(pk)
+        validate_items(items, errors)
+        decode_trim_ids(items, errors)
+        if errors:
+            return UpdateCars(cars=None, errors=sorted(errors, key=lambda error: error.index))
+
+        cars = Car.objects.in_bulk(pks)
+        fields = set()
+        for pk, item in zip(pks, items):
+            for field, value in item.items():
+                setattr(cars[pk], field, value)
+                fields.add(field)
+
+        cars = [cars[pk] for pk in pks]
+        if fields:
+            Car.objects.bulk_update(cars, sorted(fields))
+        Car.objects.filter(pk__in=pks).update(version=F('version') + 1)
+        for car in cars:
+            car.version += 1
+        sync_cars(pks)
+
+        return UpdateCars(cars=cars, errors=[])
+
+
+class DeleteCars(relay.ClientIDMutation):
+    """
+    Deletes the cars of `ids`, or every car matching the `allCar` filters of
+    `filter`, which must set at least one condition, without loading them.
+    Unknown `ids` are reported as errors and nothing is deleted.
+    """
+
+    class Input:
+        ids = graphene.List(graphene.NonNull(graphene.ID))
+        filter = CarFilterInput()
+
+    deleted_count = graphene.Int()
+    errors = graphene.List(graphene.NonNull(CarItemError), required=True)
+
+    @classmethod
+    def mutate_and_get_payload(cls, root, info, ids=None, filter=None):
+        if (ids is None) == (filter is None):
+            raise GraphQLError('Either ids or filter must be given')
+
+        if ids is not None:
+            errors = []
+            pks = decode_car_ids(ids, errors)
+            if errors:
+                return DeleteCars(deleted_count=0, errors=sorted(errors, key=lambda error: error.index))
+            queryset = Car.objects.filter(pk__in=pks)
+        else:
+            conditions = {name: value for name, value in dict(filter).items() if value not in (None, '', [])}
+            if not conditions:
+                # An empty filter matches every car.
+                raise GraphQLError('filter must set at least one condition')
+            filterset = car_filterset_class(data=conditions, queryset=Car.objects.all(), request=info.context)
+            if not filterset.form.is_valid():
+                raise ValidationError(filterset.form.errors.as_json())
+            queryset = filterset.qs
+
+        return DeleteCars(deleted_count=delete_cars(queryset), errors=[])
@@ -4,8 +4,12 @@ from graphql import GraphQLError
 from graphql_relay import from_global_id
 
 from cars.models import Make
-from cars.types import MakeNode
+from cars.types import DeletionJobNode, MakeNode
 
+from ..car_search import sync_make
+from ..deletion import schedule_deletion
+from ..response_cache import bump_versions
+from .updates import is_selected, update_row
 from .validations import validate_mutation
 
 
@@ -35,6 +39,7 @@ class CreateMake(relay.ClientIDMutation):
             raise GraphQLError(f'empty data')
 
         obj = Make.objects.create(**data)
+        bump_versions(Make)
 
         return CreateMake(make=obj)
 
@@ -42,31 +47,44 @@ class CreateMake(relay.ClientIDMutation):
 class UpdateMake(relay.ClientIDMutation):
     class Input:
         id = graphene.ID(required=True)
+        expected_version = graphene.Int(description='Only update the make if it still has this version.')
         data = MakeUpdateData()
 
     make = graphene.Field(MakeNode)
 
     @classmethod
-    def mutate_and_get_payload(cls, root, info, id, data):
+    def mutate_and_get_payload(cls, root, info, id, data, expected_version=None):
         validate_dict = {
             'name': {'max': 255, },
         }
 
         validate_mutation(validate_dict, data)
 
-        obj, _ = Make.objects.update_or_create(pk=from_global_id(id)[1], defaults=data)
+        pk = update_row(Make, id, data, expected_version)
+        bump_versions(Make)
+        resync = 'name' in data
+        obj = Make.objects.get(pk=pk) if resync or is_selected(info, 'make') else None
+        if resync:
+            sync_make(obj)
 
         return UpdateMake(make=obj)
 
 
 class DeleteMake(relay.ClientIDMutation):
+    """
+    Hides the make and everything below it right away, and queues their
+    deletion, whose progress is reported by `deletionJob`.
+    """
+
     class Input:
         id = graphene.ID()
 
     ok = graphene.Boolean()
+    deletion_job = graphene.Field(DeletionJobNode)
 
     @classmethod
     def mutate_and_get_payload(cls, root, info, id):
-        obj = Make.objects.get(pk=from_global_id(id)[1])
-        obj.delete()
-        return DeleteMake(ok=True)
+        job = schedule_deletion(Make, from_global_id(id)[1])
+        if job is None:
+            raise GraphQLError('Make matching query does not exist.')
+        return DeleteMake(ok=True, deletion_job=job)
@@ -4,8 +4,12 @@ from graphql import GraphQLError
 from graphql_relay import from_global_id
 
 from cars.models import Make, Model
-from cars.types import ModelNode
+from cars.types import DeletionJobNode, ModelNode
 
+from ..car_search import sync_model
+from ..deletion import schedule_deletion
+from ..response_cache import bump_versions
+from .updates import is_selected, parent_pk, update_row
 from .validations import validate_mutation
 
 
@@ -41,9 +45,10 @@ class CreateModel(relay.ClientIDMutation):
         if make is None:
             raise GraphQLError(f'Missing foreign key makeId')
         else:
-            make = from_global_id(make)[1]
+            make = parent_pk(Make, make)
 
         obj = Model.objects.create(**data, make_id=make)
+        bump_versions(Model)
 
         return CreateModel(model=obj)
 
@@ -51,12 +56,13 @@ class CreateModel(relay.ClientIDMutation):
 class UpdateModel(relay.ClientIDMutation):
     class Input:
         id = graphene.ID(required=True)
+        expected_version = graphene.Int(description='Only update the model if it still has this version.')
         data = ModelUpdateData()
 
     model = graphene.Field(ModelNode)
 
     @classmethod
-    def mutate_and_get_payload(cls, root, info, id, data):
+    def mutate_and_get_payload(cls, root, info, id, data, expected_version=None):
         validate_dict = {
             'name': {'max': 255, },
         }
@@ -65,21 +71,33 @@ class UpdateModel(relay.ClientIDMutation):
 
         make = data.pop('make', None)
         if make is not None:
-            data['make_id'] = from_global_id(make)[1]
+            data['make_id'] = parent_pk(Make, make)
 
-        obj, _ = Model.objects.update_or_create(pk=from_global_id(id)[1], defaults=data)
+        pk = update_row(Model, id, data, expected_version)
+        bump_versions(Model)
+        resync = 'name' in data or 'make_id' in data
+        obj = Model.objects.get(pk=pk) if resync or is_selected(info, 'model') else None
+        if resync:
+            sync_model(obj)
 
         return UpdateModel(model=obj)
 
 
 class DeleteModel(relay.ClientIDMutation):
+    """
+    Hides the model and everything below it right away, and queues their
+    deletion, whose progress is reported by `deletionJob`.
+    """
+
     class Input:
         id = graphene.ID()
 
     ok = graphene.Boolean()
+    deletion_job = graphene.Field(DeletionJobNode)
 
     @classmethod
     def mutate_and_get_payload(cls, root, info, id):
-        obj = Model.objects.get(pk=from_global_id(id)[1])
-        obj.delete()
-        return DeleteModel(ok=True)
+        job = schedule_deletion(Model, from_global_id(id)[1])
+        if job is None:
+            raise GraphQLError('Model matching query does not exist.')
+        return DeleteModel(ok=True, deletion_job=job)
@@ -4,8 +4,12 @@ from graphql import GraphQLError
 from graphql_relay import from_global_id
 
 from cars.models import Model, Trim
-from cars.types import TrimNode
+from cars.types import DeletionJobNode, TrimNode
 
+from ..car_search import sync_trim
+from ..deletion import schedule_deletion
+from ..response_cache import bump_versions
+from .updates import is_selected, parent_pk, update_row
 from .validations import validate_mutation
 
 
@@ -41,9 +45,10 @@ class CreateTrim(relay.ClientIDMutation):
         if model is None:
             raise GraphQLError(f'Missing foreign key modelId')
         else:
-            model = from_global_id(model)[1]
+            model = parent_pk(Model, model)
 
         obj = Trim.objects.create(**data, model_id=model)
+        bump_versions(Trim)
 
         return CreateTrim(trim=obj)
 
@@ -51,12 +56,13 @@ class CreateTrim(relay.ClientIDMutation):
 class UpdateTrim(relay.ClientIDMutation):
     class Input:
         id = graphene.ID(required=True)
+        expected_version = graphene.Int(description='Only update the trim if it still has this version.')
         data = TrimUpdateData()
 
     trim = graphene.Field(TrimNode)
 
     @classmethod
-    def mutate_and_get_payload(cls, root, info, id, data):
+    def mutate_and_get_payload(cls, root, info, id, data, expected_version=None):
         validate_dict = {
             'name': {'max': 255, },
         }
@@ -65,21 +71,33 @@ class UpdateTrim(relay.ClientIDMutation):
 
         model = data.pop('model', None)
         if model is not None:
-            data['model_id'] = from_global_id(model)[1]
+            data['model_id'] = parent_pk(Model, model)
 
-        obj, _ = Trim.objects.update_or_create(pk=from_global_id(id)[1], defaults=data)
+        pk = update_row(Trim, id, data, expected_version)
+        bump_versions(Trim)
+        resync = 'name' in data or 'model_id' in data
+        obj = Trim.objects.get(pk=pk) if resync or is_selected(info, 'trim') else None
+        if resync:
+            sync_trim(obj)
 
         return UpdateTrim(trim=obj)
 
 
 class DeleteTrim(relay.ClientIDMutation):
+    """
+    Hides the trim and everything below it right away, and queues their
+    deletion, whose progress is reported by `deletionJob`.
+    """
+
     class Input:
         id = graphene.ID()
 
     ok = graphene.Boolean()
+    deletion_job = graphene.Field(DeletionJobNode)
 
     @classmethod
     def mutate_and_get_payload(cls, root, info, id):
-        obj = Trim.objects.get(pk=from_global_id(id)[1])
-        obj.delete()
-        return DeleteTrim(ok=True)
+        job = schedule_deletion(Trim, from_global_id(id)[1])
+        if job is None:
+            raise GraphQLError('Trim matching query does not exist.')
+        return DeleteTrim(ok=True, deletion_job=job)
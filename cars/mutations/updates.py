@@ -0,0 +1,51 @@
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from graphql import GraphQLError
+from graphql_relay import from_global_id
+
+from cars.optimizer import collect_selections
+
+
+def decode_pk(model, id):
+    """Returns the primary key of `model` in the global ID `id`, or None if it is malformed."""
+    try:
+        return model._meta.pk.to_python(from_global_id(id)[1])
+    except (TypeError, ValueError, ValidationError):
+        return None
+
+
+def parent_pk(model, id):
+    """
+    Returns the primary key of the row of `model` with global ID `id` that a
+    new or updated row is about to point at. Rows waiting for their deletion
+    job are refused, as the job would fail to delete them under the new row.
+    """
+    pk = decode_pk(model, id)
+    if pk is None or not model.objects.filter(pk=pk).exists():
+        raise GraphQLError(f'{model.__name__} matching query does not exist.')
+    return pk
+
+
+def update_row(model, id, data, expected_version=None):
+    """
+    Updates the fields of `data` of the row with global ID `id` with a single
+    `UPDATE`, bumping its version, and returns its primary key. When
+    `expected_version` is given the row is only updated if it still has that
+    version, so that concurrent writes are detected without locking.
+    """
+    pk = decode_pk(model, id)
+    queryset = model.objects.filter(pk=pk)
+    if expected_version is not None:
+        queryset = queryset.filter(version=expected_version)
+
+    if pk is None or not queryset.update(**data, version=F('version') + 1):
+        if pk is not None and expected_version is not None and model.objects.filter(pk=pk).exists():
+            raise GraphQLError(f'{model.__name__} has been modified since version {expected_version}.')
+        raise GraphQLError(f'{model.__name__} matching query does not exist.')
+
+    return pk
+
+
+def is_selected(info, field_name):
+    """Tells whether the client selected `field_name` on the payload of the mutation."""
+    return field_name in collect_selections(info.field_asts, info, None)
@@ -0,0 +1,110 @@
+"""
+Detection of the N+1 queries of the GraphQL operations: the same SQL
+statement run from the same place again and again within an operation,
+typically once per row of a list by a relation resolved without a
+DataLoader.
+
+Statements are fingerprinted by their SQL, its literals and lists of
+parameters normalized, and by their call site, the innermost frame outside
+of Django that ran them. A fingerprint repeated more than
+`N_PLUS_ONE_THRESHOLD` times is logged, or raised when `N_PLUS_ONE_RAISE`
+is set, as it is in the tests.
+"""
+
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+
+import django
+import graphene_django.debug
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Frames of these packages, which run or record the queries, are not call sites.
+LIBRARY_DIRS = (os.path.dirname(django.__file__), os.path.dirname(graphene_django.debug.__file__))
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Arguments of the database execute wrappers, e.g. cars.metrics.OperationMetrics, which are not call sites.
+WRAPPER_ARGUMENTS = ('execute', 'sql', 'params', 'many', 'context')
+
+NORMALIZATIONS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+class RepeatedQueriesError(Exception):
+    pass
+
+
+def normalize_sql(sql):
+    """Returns `sql` with its literals and parameters replaced by `?`, and its `IN` lists by `IN (...)`."""
+    for pattern, replacement in NORMALIZATIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def is_execute_wrapper(code):
+    return code.co_varnames[code.co_argcount - len(WRAPPER_ARGUMENTS):code.co_argcount] == WRAPPER_ARGUMENTS
+
+
+def call_site():
+    """Returns the innermost frame outside of `LIBRARY_DIRS` and of the execute wrappers, as `path:line in function`."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(LIBRARY_DIRS) and not is_execute_wrapper(frame.f_code):
+            if filename.startswith(ROOT_DIR):
+                filename = os.path.relpath(filename, ROOT_DIR)
+            return f'{filename}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryDetector(object):
+    """
+    Counts the fingerprints of the SQL statements run on every database
+    while it is entered, e.g. around the execution of an operation.
+    """
+
+    def __init__(self, threshold=None):
+        self.threshold = settings.N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        self.counts = Counter()
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.counts[context['connection'].alias, normalize_sql(sql), call_site()] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    def repeated(self):
+        """Returns the `((alias, sql, call site), count)` of the fingerprints repeated more than the threshold."""
+        return [(fingerprint, count) for fingerprint, count in self.counts.most_common() if count > self.threshold]
+
+    def describe(self):
+        return '\n'.join(
+            f'{count} times on {alias} from {site}: {sql}' for (alias, sql, site), count in self.repeated()
+        )
+
+    def report(self, operation_name):
+        """Logs the repeated queries, or raises `RepeatedQueriesError` when `N_PLUS_ONE_RAISE` is set."""
+        if not self.repeated():
+            return
+        message = f'Repeated queries in operation {operation_name or "(anonymous)"}:\n{self.describe()}'
+        if settings.N_PLUS_ONE_RAISE:
+            raise RepeatedQueriesError(message)
+        logger.warning(message)
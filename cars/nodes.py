@@ -0,0 +1,65 @@
+"""Batched resolution of relay nodes from their global IDs."""
+
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from graphene import ID, Field, List, NonNull, relay
+from graphql_relay import from_global_id
+
+
+def resolve_nodes(info, global_ids):
+    """
+    Returns the nodes identified by `global_ids`, in the same order, with
+    None for the IDs that are invalid or do not match any row. The IDs are
+    grouped by type, so that each type is fetched with a single query.
+    """
+    keys = [decode_global_id(info, global_id) for global_id in global_ids]
+
+    pks_by_type = defaultdict(set)
+    for key in keys:
+        if key is not None:
+            pks_by_type[key[0]].add(key[1])
+
+    objects = {}
+    for node_type, pks in pks_by_type.items():
+        model = node_type._meta.model
+        queryset = node_type.get_queryset(model._default_manager, info)
+        for pk, obj in queryset.in_bulk(pks).items():
+            objects[node_type, pk] = obj
+
+    return [objects.get(key) if key is not None else None for key in keys]
+
+
+def decode_global_id(info, global_id):
+    """Returns the `(node type, primary key)` of `global_id`, or None if invalid."""
+    try:
+        type_name, pk = from_global_id(global_id)
+    except (TypeError, ValueError):
+        return None
+
+    graphql_type = info.schema.get_type(type_name) if type_name else None
+    node_type = getattr(graphql_type, 'graphene_type', None)
+    model = getattr(getattr(node_type, '_meta', None), 'model', None)
+    if model is None or relay.Node not in node_type._meta.interfaces:
+        return None
+
+    try:
+        return node_type, model._meta.pk.to_python(pk)
+    except ValidationError:
+        return None
+
+
+class NodesField(Field):
+    """Root field fetching a list of nodes of any type by their global IDs."""
+
+    def __init__(self, **kwargs):
+        super(NodesField, self).__init__(
+            List(relay.Node),
+            ids=List(NonNull(ID), required=True),
+            resolver=self.node_resolver,
+            **kwargs
+        )
+
+    @staticmethod
+    def node_resolver(root, info, ids):
+        return resolve_nodes(info, ids)
@@ -0,0 +1,208 @@
+"""
+Rewrites node querysets after the GraphQL selection set, so that a page of
+nodes and the relations selected on it are fetched by a handful of queries:
+foreign keys are followed with `select_related`, unfiltered reverse
+connections that need every row (for their totals or a `last` page) are
+prefetched and every table is restricted with `.only()` to the requested
+columns. The other reverse connections are left to the DataLoaders, which
+only fetch the rows of their page.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.relay import Connection
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.registry import get_global_registry
+from graphql.language.ast import FragmentSpread, InlineFragment
+from graphql.type import GraphQLObjectType
+
+PAGINATION_ARGS = {'first', 'last', 'before', 'after', 'offset'}
+TOTAL_FIELDS = {'totalCount', 'approximateTotalCount'}
+
+
+class QueryPlan(object):
+    """Columns, joins and prefetches needed to resolve a selection."""
+
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = []
+        self.restrict = True
+
+    def merge(self, other):
+        self.only |= other.only
+        self.select_related |= other.select_related
+        self.prefetch_related += other.prefetch_related
+        self.restrict = self.restrict and other.restrict
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.restrict:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def optimize_queryset(queryset, info):
+    """
+    Returns `queryset` rewritten for the fields selected by the field being
+    resolved, which may either be a connection or a single node.
+    """
+    queryset = queryset.all()
+    type_name = type_name_for(queryset.model)
+
+    if is_connection(info.return_type):
+        selections = connection_node_selections(collect_selections(info.field_asts, info, None), info, type_name)
+    else:
+        selections = collect_selections(info.field_asts, info, type_name)
+
+    plan = plan_selections(queryset.model, selections, info)
+    relation = reverse_relation(queryset.model, info)
+    if relation is not None:
+        # Read by the related manager to set the parent of every row: deferred, it would be fetched row by row.
+        plan.only.add(relation.field.name)
+    return plan.apply(queryset)
+
+
+def reverse_relation(model, info):
+    """
+    Returns the relation resolved by the field being resolved when it is a
+    reverse foreign key to `model` (e.g. `MakeNode.models`), or None.
+    """
+    parent_type = getattr(info.parent_type, 'graphene_type', None)
+    parent_model = getattr(getattr(parent_type, '_meta', None), 'model', None)
+    if parent_model is None:
+        return None
+    try:
+        relation = parent_model._meta.get_field(to_snake_case(info.field_name))
+    except FieldDoesNotExist:
+        return None
+    return relation if relation.one_to_many and relation.related_model is model else None
+
+
+def is_connection(graphql_type):
+    while hasattr(graphql_type, 'of_type'):
+        graphql_type = graphql_type.of_type
+    graphene_type = getattr(graphql_type, 'graphene_type', None)
+    return isinstance(graphene_type, type) and issubclass(graphene_type, Connection)
+
+
+def type_name_for(model):
+    node_type = get_global_registry().get_type_for_model(model)
+    return node_type._meta.name if node_type else None
+
+
+def collect_selections(field_asts, info, type_name, selections=None):
+    """
+    Merges the sub-selections of `field_asts`, following fragment spreads and
+    inline fragments that apply to `type_name`, into a dict mapping each
+    selected field name to the list of its ASTs.
+    """
+    if selections is None:
+        selections = {}
+
+    for field_ast in field_asts:
+        if field_ast.selection_set is None:
+            continue
+        for selection in field_ast.selection_set.selections:
+            if isinstance(selection, FragmentSpread):
+                fragment = info.fragments[selection.name.value]
+                if applies_to(fragment, info, type_name):
+                    collect_selections([fragment], info, type_name, selections)
+            elif isinstance(selection, InlineFragment):
+                if applies_to(selection, info, type_name):
+                    collect_selections([selection], info, type_name, selections)
+            else:
+                selections.setdefault(selection.name.value, []).append(selection)
+
+    return selections
+
+
+def applies_to(fragment, info, type_name):
+    if fragment.type_condition is None or type_name is None:
+        return True
+    condition = fragment.type_condition.name.value
+    # Fragments on interfaces (e.g. `... on Node`) apply to every node type.
+    if not isinstance(info.schema.get_type(condition), GraphQLObjectType):
+        return True
+    return condition == type_name
+
+
+def selects_total(field_asts, info):
+    """Tells whether the totals of the connections of `field_asts` are selected."""
+    return not TOTAL_FIELDS.isdisjoint(collect_selections(field_asts, info, None))
+
+
+def needs_every_row(field_asts, info):
+    """Tells whether resolving the connections of `field_asts` takes every row rather than a page of them."""
+    if selects_total(field_asts, info):
+        return True
+    for field_ast in field_asts:
+        arguments = {argument.name.value for argument in field_ast.arguments}
+        if 'last' in arguments and 'before' not in arguments:
+            return True
+    return False
+
+
+def connection_node_selections(selections, info, type_name):
+    edges = collect_selections(selections.get('edges', []), info, None)
+    return collect_selections(edges.get('node', []), info, type_name)
+
+
+def plan_selections(model, selections, info, prefix=''):
+    plan = QueryPlan()
+    plan.only.add(prefix + model._meta.pk.name)
+
+    for name, field_asts in selections.items():
+        if name.startswith('__'):
+            continue
+
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            # Not a model column (e.g. a custom resolver): fetch every column.
+            plan.restrict = False
+            continue
+
+        if field.many_to_one or (field.one_to_one and field.concrete):
+            plan.only.add(prefix + field.name)
+            plan.select_related.add(prefix + field.name)
+            related_model = field.related_model
+            sub_selections = collect_selections(field_asts, info, type_name_for(related_model))
+            plan.merge(plan_selections(related_model, sub_selections, info, prefix + field.name + '__'))
+        elif field.one_to_many:
+            prefetch = plan_connection(field, field_asts, info, prefix)
+            if prefetch is not None:
+                plan.prefetch_related.append(prefetch)
+        elif field.concrete:
+            plan.only.add(prefix + field.name)
+        else:
+            plan.restrict = False
+
+    return plan
+
+
+def plan_connection(field, field_asts, info, prefix):
+    """
+    Returns the `Prefetch` for a reverse connection that needs every row, or
+    None when it is filtered, in which case it keeps being resolved by the
+    filterset, or paginated, in which case the DataLoader fetches its page.
+    """
+    for field_ast in field_asts:
+        if any(argument.name.value not in PAGINATION_ARGS for argument in field_ast.arguments):
+            return None
+    if not needs_every_row(field_asts, info):
+        return None
+
+    related_model = field.related_model
+    type_name = type_name_for(related_model)
+    selections = connection_node_selections(collect_selections(field_asts, info, None), info, type_name)
+
+    plan = plan_selections(related_model, selections, info)
+    # The related rows are matched to their parent through this column.
+    plan.only.add(field.field.name)
+    queryset = plan.apply(related_model._default_manager.order_by('pk'))
+
+    return Prefetch(prefix + field.name, queryset=queryset)
@@ -0,0 +1,165 @@
+"""Static cost and depth analysis of GraphQL operations."""
+
+from graphene.relay import Connection
+from graphql import GraphQLError
+from graphql.language.ast import (
+    FragmentDefinition,
+    FragmentSpread,
+    InlineFragment,
+    IntValue,
+    Variable,
+)
+from graphql.type.definition import GraphQLInterfaceType, GraphQLObjectType
+from graphql.validation.rules.base import ValidationRule
+
+# The fields wrapping the nodes of a connection do not count towards depth.
+CONNECTION_WRAPPERS = {'edges', 'node'}
+# Resolved from the schema rather than the database, and nested deeply by the standard introspection query.
+INTROSPECTION_FIELDS = {'__schema', '__type', '__typename'}
+
+
+class QueryCost(object):
+    """Estimated number of resolved fields and nesting depth of an operation."""
+
+    def __init__(self, cost=0, depth=0):
+        self.cost = cost
+        self.depth = depth
+
+
+class QueryCostEstimator(object):
+    """
+    Estimates the cost of a selection set: every field costs one, and the
+    cost of everything selected below a connection is multiplied by the
+    number of nodes it may return, i.e. its `first`/`last` argument or
+    `default_page_size` when none is given.
+    """
+
+    def __init__(self, schema, fragments, variables, default_page_size):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables or {}
+        self.default_page_size = default_page_size
+
+    def estimate(self, operation):
+        if operation.operation == 'mutation':
+            root_type = self.schema.get_mutation_type()
+        elif operation.operation == 'subscription':
+            root_type = self.schema.get_subscription_type()
+        else:
+            root_type = self.schema.get_query_type()
+        return self.selection_set_cost(operation.selection_set, root_type, set())
+
+    def selection_set_cost(self, selection_set, parent_type, visited_fragments):
+        total = QueryCost()
+        if selection_set is None:
+            return total
+
+        for selection in selection_set.selections:
+            if isinstance(selection, FragmentSpread):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited_fragments:
+                    continue
+                cost = self.selection_set_cost(
+                    fragment.selection_set, self.fragment_type(fragment, parent_type), visited_fragments | {name}
+                )
+            elif isinstance(selection, InlineFragment):
+                cost = self.selection_set_cost(
+                    selection.selection_set, self.fragment_type(selection, parent_type), visited_fragments
+                )
+            else:
+                cost = self.field_cost(selection, parent_type, visited_fragments)
+
+            total.cost += cost.cost
+            total.depth = max(total.depth, cost.depth)
+
+        return total
+
+    def field_cost(self, field, parent_type, visited_fragments):
+        if field.name.value in INTROSPECTION_FIELDS:
+            return QueryCost()
+
+        field_def = None
+        if isinstance(parent_type, (GraphQLObjectType, GraphQLInterfaceType)):
+            field_def = parent_type.fields.get(field.name.value)
+        field_type = unwrap(field_def.type) if field_def is not None else None
+
+        children = self.selection_set_cost(field.selection_set, field_type, visited_fragments)
+        multiplier = self.page_size(field) if is_connection(field_type) else 1
+        depth = children.depth if field.name.value in CONNECTION_WRAPPERS else children.depth + 1
+
+        return QueryCost(cost=1 + multiplier * children.cost, depth=depth)
+
+    def fragment_type(self, fragment, parent_type):
+        if fragment.type_condition is None:
+            return parent_type
+        return self.schema.get_type(fragment.type_condition.name.value)
+
+    def page_size(self, field):
+        sizes = [self.argument_value(argument.value) for argument in field.arguments
+                 if argument.name.value in ('first', 'last')]
+        sizes = [size for size in sizes if size is not None]
+        return min(sizes) if sizes else self.default_page_size
+
+    def argument_value(self, value):
+        if isinstance(value, Variable):
+            value = self.variables.get(value.name.value)
+            return value if isinstance(value, int) else None
+        if isinstance(value, IntValue):
+            return int(value.value)
+        return None
+
+
+def unwrap(graphql_type):
+    while hasattr(graphql_type, 'of_type'):
+        graphql_type = graphql_type.of_type
+    return graphql_type
+
+
+def is_connection(graphql_type):
+    graphene_type = getattr(graphql_type, 'graphene_type', None)
+    return isinstance(graphene_type, type) and issubclass(graphene_type, Connection)
+
+
+class QueryCostRule(ValidationRule):
+    """
+    Rejects the operation to execute, `operation_name`, when its estimated
+    cost or depth exceed `max_cost` or `max_depth`, and records its estimate
+    in `costs`, keyed by operation name.
+    """
+
+    def __init__(self, context, operation_name=None, variables=None, default_page_size=100, max_cost=None,
+                 max_depth=None, costs=None):
+        super(QueryCostRule, self).__init__(context)
+        self.operation_name = operation_name
+        self.variables = variables
+        self.default_page_size = default_page_size
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.costs = costs if costs is not None else {}
+
+    def enter_OperationDefinition(self, node, key, parent, path, ancestors):
+        name = node.name.value if node.name else None
+        if self.operation_name and name != self.operation_name:
+            return False
+
+        fragments = {
+            definition.name.value: definition for definition in self.context.get_ast().definitions
+            if isinstance(definition, FragmentDefinition)
+        }
+        estimator = QueryCostEstimator(self.context.get_schema(), fragments, self.variables, self.default_page_size)
+        cost = estimator.estimate(node)
+        self.costs[name] = cost
+
+        if self.max_cost is not None and cost.cost > self.max_cost:
+            self.context.report_error(GraphQLError(
+                f'The operation has an estimated cost of {cost.cost}, which exceeds the maximum of {self.max_cost}.',
+                [node]
+            ))
+        if self.max_depth is not None and cost.depth > self.max_depth:
+            self.context.report_error(GraphQLError(
+                f'The operation has a depth of {cost.depth}, which exceeds the maximum of {self.max_depth}.',
+                [node]
+            ))
+
+        return False
@@ -0,0 +1,116 @@
+"""
+Routing of the reads to the read replicas and of the writes to the primary.
+
+Each request reads from a single database, picked by
+`ReplicaStickinessMiddleware`: a random replica, or the primary for the
+admin and for the clients that wrote less than
+`REPLICA_STICKINESS_SECONDS` ago, so that they read their own writes
+whatever the lag of the replicas. Mutations read from the primary too, as
+do the reads made outside of a request, e.g. by the management commands,
+which would otherwise miss their own writes.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+
+STICKINESS_COOKIE = 'primary_until'
+
+_read_database = ContextVar('read_database', default=None)
+
+
+@contextmanager
+def reading_from(alias):
+    """Routes the reads made within the block to `alias`, or to the primary when None."""
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def pick_replica():
+    return random.choice(settings.REPLICA_DATABASES) if settings.REPLICA_DATABASES else DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter(object):
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return _read_database.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def is_admin(request):
+    return request.path.startswith(reverse('admin:index'))
+
+
+def is_sticky(request):
+    try:
+        return float(request.COOKIES.get(STICKINESS_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaStickinessMiddleware(object):
+    """
+    Picks the database the request reads from (`request.read_database`), and
+    keeps the client reading from the primary for a while after a request
+    that wrote to it sets `request.wrote_to_primary`.
+
+    Both sync and async, so that under ASGI the requests are not serialized
+    through the single thread Django runs the sync middlewares in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes the instance itself a coroutine function to Django, as `MiddlewareMixin` does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        self.process_request(request)
+        with reading_from(request.read_database):
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        with reading_from(request.read_database):
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_request(self, request):
+        request.read_database = DEFAULT_DB_ALIAS if is_admin(request) or is_sticky(request) else pick_replica()
+
+    def process_response(self, request, response):
+        if getattr(request, 'wrote_to_primary', False) or (is_admin(request) and request.method == 'POST'):
+            response.set_cookie(
+                STICKINESS_COOKIE,
+                str(time.time() + settings.REPLICA_STICKINESS_SECONDS),
+                max_age=settings.REPLICA_STICKINESS_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
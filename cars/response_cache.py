@@ -0,0 +1,186 @@
+"""
+Cache of the responses to read-only operations over the catalog tables.
+
+Responses are keyed by the normalized operation, its variables and the
+version of every table it reads. The versions live in the cache too, so a
+hit does not query the database, and are replaced once the transaction
+writing to their tables commits, which makes the previous responses
+unreachable instead of serving them stale. Misses are executed on the
+primary, so that a lagging replica never stores the rows of before a write
+under the version following it.
+"""
+
+import json
+from hashlib import sha256
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from graphql.execution import ExecutionResult
+from graphql.language.ast import (
+    FragmentDefinition,
+    FragmentSpread,
+    InlineFragment,
+    OperationDefinition,
+)
+from graphql.language.printer import print_ast
+from graphql.type.definition import (
+    GraphQLInterfaceType,
+    GraphQLObjectType,
+    GraphQLUnionType,
+)
+
+from .models import Make, Model, Trim
+from .replicas import reading_from
+
+CACHE_ALIAS = 'graphql'
+
+# Tables rarely written to, whose responses are worth caching.
+CACHEABLE_TABLES = {Make._meta.db_table, Model._meta.db_table, Trim._meta.db_table}
+
+
+class UncacheableOperation(Exception):
+    pass
+
+
+def version_key(table):
+    return f'graphql-version:{table}'
+
+
+def new_version():
+    return uuid4().hex
+
+
+def bump_versions(*models):
+    """
+    Invalidates the cached responses reading from the tables of `models`
+    once the current transaction commits: the responses computed until then
+    may still hold the rows of before the write.
+    """
+    keys = [version_key(model._meta.db_table) for model in models]
+    transaction.on_commit(lambda: get_cache().set_many({key: new_version() for key in keys}, timeout=None))
+
+
+def get_versions(tables):
+    cache = get_cache()
+    keys = {table: version_key(table) for table in tables}
+    versions = cache.get_many(keys.values())
+    for key in keys.values():
+        if key not in versions:
+            # Never bumped or evicted: a new version, under which no response is stored yet.
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return {table: versions[key] for table, key in keys.items()}
+
+
+def operation_tables(schema, document_ast, operation_name):
+    """
+    Returns the tables a query operation reads from, or None when the
+    operation is not a query or cannot be cached.
+    """
+    fragments = {}
+    operation = None
+    for definition in document_ast.definitions:
+        if isinstance(definition, FragmentDefinition):
+            fragments[definition.name.value] = definition
+        elif isinstance(definition, OperationDefinition):
+            name = definition.name.value if definition.name else None
+            if operation_name is None or name == operation_name:
+                operation = definition
+
+    if operation is None or operation.operation != 'query':
+        return None
+
+    tables = set()
+    try:
+        collect_tables(schema, schema.get_query_type(), operation.selection_set, fragments, tables, set())
+    except UncacheableOperation:
+        return None
+    return tables
+
+
+def collect_tables(schema, parent_type, selection_set, fragments, tables, visited_fragments):
+    if selection_set is None:
+        return
+
+    for selection in selection_set.selections:
+        if isinstance(selection, FragmentSpread):
+            name = selection.name.value
+            if name in fragments and name not in visited_fragments:
+                fragment = fragments[name]
+                fragment_type = schema.get_type(fragment.type_condition.name.value)
+                collect_tables(schema, fragment_type, fragment.selection_set, fragments, tables,
+                               visited_fragments | {name})
+        elif isinstance(selection, InlineFragment):
+            fragment_type = parent_type
+            if selection.type_condition is not None:
+                fragment_type = schema.get_type(selection.type_condition.name.value)
+            collect_tables(schema, fragment_type, selection.selection_set, fragments, tables, visited_fragments)
+        else:
+            if not isinstance(parent_type, (GraphQLObjectType, GraphQLInterfaceType)):
+                continue
+            field = parent_type.fields.get(selection.name.value)
+            if field is None:
+                continue
+            field_type = field.type
+            while hasattr(field_type, 'of_type'):
+                field_type = field_type.of_type
+            field_tables = type_tables(schema, field_type)
+            # Root fields not backed by a model (e.g. aggregates) may read from any table.
+            if not field_tables and parent_type is schema.get_query_type():
+                raise UncacheableOperation
+            tables.update(field_tables)
+            collect_tables(schema, field_type, selection.selection_set, fragments, tables, visited_fragments)
+
+
+def type_tables(schema, graphql_type):
+    """Returns the tables backing `graphql_type`, its nodes or all its implementations."""
+    if isinstance(graphql_type, (GraphQLInterfaceType, GraphQLUnionType)):
+        types = schema.get_possible_types(graphql_type)
+    else:
+        types = [graphql_type]
+
+    tables = set()
+    for possible_type in types:
+        graphene_meta = getattr(getattr(possible_type, 'graphene_type', None), '_meta', None)
+        node = getattr(graphene_meta, 'node', None)
+        if node is not None:
+            graphene_meta = node._meta
+        model = getattr(graphene_meta, 'model', None)
+        if model is not None:
+            tables.add(model._meta.db_table)
+    return tables
+
+
+def cache_key(document_ast, operation_name, variables, versions):
+    payload = json.dumps(
+        [print_ast(document_ast), operation_name, variables or {}, sorted(versions.items())],
+        sort_keys=True,
+        default=str,
+    )
+    return f'graphql-response:{sha256(payload.encode("utf-8")).hexdigest()}'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def execute_cached(schema, document, operation_name, variables, execute):
+    """
+    Returns the cached result of the operation when it only reads from the
+    cacheable tables, and otherwise (or on a miss) the result of `execute`.
+    """
+    tables = operation_tables(schema, document.document_ast, operation_name)
+    if not tables or not tables <= CACHEABLE_TABLES:
+        return execute()
+
+    key = cache_key(document.document_ast, operation_name, variables, get_versions(tables))
+    data = get_cache().get(key)
+    if data is not None:
+        return ExecutionResult(data=data)
+
+    with reading_from(DEFAULT_DB_ALIAS):
+        result = execute()
+    if result is not None and not result.errors and not result.invalid:
+        get_cache().set(key, result.data)
+    return result
@@ -0,0 +1,39 @@
+"""Retries of the operations that could not write because the database was locked."""
+
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError
+
+
+def is_lock_error(error):
+    error = getattr(error, 'original_error', error)
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+def backoff_delays(retries, delay, max_delay):
+    """Yields `retries` exponentially growing delays, jittered so that the waiting processes do not retry at once."""
+    for attempt in range(retries):
+        yield random.uniform(0.5, 1) * min(max_delay, delay * 2 ** attempt)
+
+
+def execute_with_retries(execute):
+    """
+    Returns the result of `execute`, executed again after a backoff while it
+    is rejected because its transaction could not take the write lock.
+
+    Such an operation was rejected as a whole (`invalid`) before any of its
+    resolvers ran, so executing it again cannot apply it twice.
+    """
+    delays = backoff_delays(
+        settings.DATABASE_LOCK_RETRIES, settings.DATABASE_LOCK_RETRY_DELAY, settings.DATABASE_LOCK_RETRY_MAX_DELAY
+    )
+    while True:
+        result = execute()
+        if result is None or not result.invalid or not any(is_lock_error(error) for error in result.errors or []):
+            return result
+        delay = next(delays, None)
+        if delay is None:
+            return result
+        time.sleep(delay)
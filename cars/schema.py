@@ -1,11 +1,21 @@
 from graphene import ObjectType, relay
-from graphene_django.filter import DjangoFilterConnectionField
 
-from .mutations.car import CreateCar, DeleteCar, UpdateCar
+from .fields import FilterConnectionField, KeysetConnectionField
+from .mutations.car import (
+    CreateCar,
+    CreateCars,
+    DeleteCar,
+    DeleteCars,
+    UpdateCar,
+    UpdateCars,
+)
 from .mutations.make import CreateMake, DeleteMake, UpdateMake
 from .mutations.model import CreateModel, DeleteModel, UpdateModel
 from .mutations.trim import CreateTrim, DeleteTrim, UpdateTrim
-from .types import CarNode, MakeNode, ModelNode, TrimNode
+from .nodes import NodesField
+from .search import SearchConnectionField
+from .stats import CarStatsField
+from .types import CarNode, DeletionJobNode, MakeNode, ModelNode, TrimNode
 
 
 class Query(ObjectType):
@@ -13,11 +23,19 @@ class Query(ObjectType):
     model = relay.Node.Field(ModelNode)
     trim = relay.Node.Field(TrimNode)
     car = relay.Node.Field(CarNode)
+    nodes = NodesField()
+    deletion_job = relay.Node.Field(DeletionJobNode)
 
-    all_make = DjangoFilterConnectionField(MakeNode)
-    all_model = DjangoFilterConnectionField(ModelNode)
-    all_trim = DjangoFilterConnectionField(TrimNode)
-    all_car = DjangoFilterConnectionField(CarNode)
+    all_make = FilterConnectionField(MakeNode)
+    all_model = FilterConnectionField(ModelNode)
+    all_trim = FilterConnectionField(TrimNode)
+    all_car = FilterConnectionField(CarNode)
+
+    all_car_keyset = KeysetConnectionField(CarNode, sort_key=('year', ))
+
+    search_cars = SearchConnectionField(CarNode)
+
+    car_stats = CarStatsField()
 
 
 class Mutation(ObjectType):
@@ -35,3 +53,7 @@ class Mutation(ObjectType):
     delete_model = DeleteModel.Field()
     delete_trim = DeleteTrim.Field()
     delete_car = DeleteCar.Field()
+
+    create_cars = CreateCars.Field()
+    update_cars = UpdateCars.Field()
+    delete_cars = DeleteCars.Field()
@@ -0,0 +1,143 @@
+"""
+Full-text search over the car owners and the names of their trim, model and
+make, backed by the SQLite FTS5 table `car_fts` indexing `car_search`.
+"""
+
+import json
+import re
+
+from django.db import connection, connections, router
+from django.db.models.expressions import RawSQL
+from graphene import Field, Int, String
+from graphene.relay import PageInfo
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+
+from .models import Car, CarSearch
+
+SEARCH_CURSOR_PREFIX = 'search:'
+
+MATCH_SQL = 'SELECT rowid FROM car_fts WHERE car_fts MATCH %s'
+
+PAGE_SQL = (
+    'SELECT rowid, rank FROM car_fts WHERE car_fts MATCH %s{seek} '
+    'ORDER BY rank, rowid LIMIT %s'
+)
+
+SEEK_SQL = ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+
+
+def match_expression(text):
+    """
+    Turns free text into an FTS5 query matching the rows containing every
+    word of `text`, or a word starting with it.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def rebuild_fts():
+    """Reindexes `car_fts` from the content of `car_search`."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO car_fts (car_fts) VALUES ('rebuild')")
+
+
+def search_page(expression, first, after=None):
+    """
+    Returns the `(car id, rank)` of the best `first` matches of `expression`,
+    ranked by bm25, following the match `after` (a `(rank, car id)` pair).
+    """
+    params = [expression]
+    seek = ''
+    if after is not None:
+        rank, pk = after
+        seek = SEEK_SQL
+        params += [rank, rank, pk]
+    params.append(first)
+
+    with connections[router.db_for_read(CarSearch)].cursor() as cursor:
+        cursor.execute(PAGE_SQL.format(seek=seek), params)
+        return cursor.fetchall()
+
+
+def encode_cursor(rank, pk):
+    return base64(SEARCH_CURSOR_PREFIX + json.dumps([rank, pk]))
+
+
+def decode_cursor(cursor):
+    try:
+        prefix, values = unbase64(cursor).split(':', 1)
+        rank, pk = json.loads(values)
+    except (TypeError, ValueError):
+        raise GraphQLError(f'Invalid cursor {cursor}')
+
+    if prefix + ':' != SEARCH_CURSOR_PREFIX or not isinstance(rank, (int, float)) or not isinstance(pk, int):
+        raise GraphQLError(f'Invalid cursor {cursor}')
+
+    return rank, pk
+
+
+class SearchConnectionField(Field):
+    """
+    Connection of the cars matching a full-text `query`, best matches first.
+
+    Pages are sought on the `(rank, id)` of the last match through the FTS
+    index, so their latency does not depend on the size of the table nor on
+    how deep the page is.
+    """
+
+    def __init__(self, node_type, **kwargs):
+        self.node_type = node_type
+        super(SearchConnectionField, self).__init__(
+            node_type._meta.connection,
+            query=String(required=True),
+            first=Int(),
+            after=String(),
+            resolver=self.search_resolver,
+            **kwargs
+        )
+
+    def search_resolver(self, root, info, query, first=None, after=None):
+        node_type = self.node_type
+        max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        if first is None:
+            first = max_limit
+        elif first < 0:
+            raise GraphQLError('Argument "first" must be a non-negative integer')
+        elif max_limit and first > max_limit:
+            raise GraphQLError(f'Requesting {first} records on the `{info.field_name}` connection exceeds the '
+                               f'`first` limit of {max_limit} records.')
+
+        if connection.vendor != 'sqlite':
+            raise GraphQLError('Full-text search is not available on this database.')
+
+        expression = match_expression(query)
+        matches = Car.objects.none()
+        rows = []
+        if expression:
+            matches = Car.objects.filter(pk__in=RawSQL(MATCH_SQL, [expression]))
+            rows = search_page(expression, first + 1, decode_cursor(after) if after else None)
+
+        has_next_page = len(rows) > first
+        rows = rows[:first]
+        nodes = node_type.get_queryset(Car.objects, info).in_bulk([pk for pk, _ in rows])
+
+        connection_type = node_type._meta.connection
+        edges = [
+            connection_type.Edge(node=nodes[pk], cursor=encode_cursor(rank, pk))
+            for pk, rank in rows if pk in nodes
+        ]
+        page = connection_type(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=bool(after),
+                has_next_page=has_next_page,
+            )
+        )
+        page.iterable = matches
+        return page
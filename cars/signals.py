@@ -0,0 +1,30 @@
+"""Keeps the denormalized tables in sync with the edits made through the ORM."""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .car_search import sync_cars, sync_make, sync_model, sync_trim
+from .models import Car, Make, Model, Trim
+
+
+@receiver(post_save, sender=Car)
+def car_saved(sender, instance, **kwargs):
+    sync_cars([instance.pk])
+
+
+@receiver(post_save, sender=Trim)
+def trim_saved(sender, instance, created, **kwargs):
+    if not created:
+        sync_trim(instance)
+
+
+@receiver(post_save, sender=Model)
+def model_saved(sender, instance, created, **kwargs):
+    if not created:
+        sync_model(instance)
+
+
+@receiver(post_save, sender=Make)
+def make_saved(sender, instance, created, **kwargs):
+    if not created:
+        sync_make(instance)
@@ -0,0 +1,37 @@
+"""Row count estimates read from the database's table statistics."""
+
+from django.db import DatabaseError, connections, router
+
+
+def estimate_row_count(model):
+    """
+    Returns the number of rows of `model`'s table according to the table
+    statistics, or None when the database has none. The estimate can lag
+    behind the real count until the statistics are refreshed (`ANALYZE`).
+    """
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute('SELECT table_rows FROM information_schema.tables '
+                               'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+            elif connection.vendor == 'sqlite':
+                # The first number of a statistics row is the number of rows of its index, or of the table when
+                # `idx` is NULL. Partial indexes count fewer rows, so the largest one is the table's.
+                cursor.execute('SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+        except DatabaseError:
+            # SQLite only creates sqlite_stat1 on the first ANALYZE.
+            return None
+
+    if row is None or row[0] is None:
+        return None
+
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
@@ -0,0 +1,88 @@
+"""Car counts aggregated by the database, for the dashboards."""
+
+import graphene
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Min
+
+from .filters import car_filterset_class
+from .loaders import MakeLoader, ModelLoader, TrimLoader, get_loader
+from .models import Car
+from .types import CarFilterInput, MakeNode, ModelNode, TrimNode
+
+
+class CarStatsGroupBy(graphene.Enum):
+    """Columns the cars can be grouped by; the catalog ids come from `car_search`."""
+
+    COLOR = 'color'
+    YEAR = 'year'
+    TRIM = 'trim_id'
+    MODEL = 'search__model_id'
+    MAKE = 'search__make_id'
+
+
+class CarStatsBucket(graphene.ObjectType):
+    """Aggregates of the cars sharing the values of the grouped by columns."""
+
+    color = graphene.String()
+    year = graphene.Int()
+    trim = graphene.Field(TrimNode)
+    model = graphene.Field(ModelNode)
+    make = graphene.Field(MakeNode)
+    count = graphene.Int(required=True)
+    min_year = graphene.Int()
+    max_year = graphene.Int()
+
+    def resolve_color(self, info):
+        return self.get(CarStatsGroupBy.COLOR.value)
+
+    def resolve_year(self, info):
+        return self.get(CarStatsGroupBy.YEAR.value)
+
+    def resolve_trim(self, info):
+        return load_bucket_object(info, self.get(CarStatsGroupBy.TRIM.value), TrimLoader)
+
+    def resolve_model(self, info):
+        return load_bucket_object(info, self.get(CarStatsGroupBy.MODEL.value), ModelLoader)
+
+    def resolve_make(self, info):
+        return load_bucket_object(info, self.get(CarStatsGroupBy.MAKE.value), MakeLoader)
+
+
+def load_bucket_object(info, pk, loader_class):
+    if pk is None:
+        return None
+    return get_loader(info, loader_class).load(pk)
+
+
+def car_stats(info, group_by, filter=None):
+    """
+    Returns the count and year range of the cars matching `filter`, grouped
+    by the `group_by` columns with a single `GROUP BY` query.
+    """
+    filterset = car_filterset_class(data=dict(filter or {}), queryset=Car.objects.all(), request=info.context)
+    if not filterset.form.is_valid():
+        raise ValidationError(filterset.form.errors.as_json())
+
+    aggregates = {'count': Count('pk'), 'min_year': Min('year'), 'max_year': Max('year')}
+    if not group_by:
+        return [filterset.qs.aggregate(**aggregates)]
+
+    lookups = list(dict.fromkeys(group_by))
+    return list(filterset.qs.values(*lookups).annotate(**aggregates).order_by(*lookups))
+
+
+class CarStatsField(graphene.Field):
+    """Root field aggregating the cars in the database instead of paging through them."""
+
+    def __init__(self, **kwargs):
+        super(CarStatsField, self).__init__(
+            graphene.List(graphene.NonNull(CarStatsBucket)),
+            group_by=graphene.List(graphene.NonNull(CarStatsGroupBy), required=True),
+            filter=CarFilterInput(),
+            resolver=self.stats_resolver,
+            **kwargs
+        )
+
+    @staticmethod
+    def stats_resolver(root, info, group_by, filter=None):
+        return car_stats(info, group_by, filter)
@@ -1,5 +1,29 @@
+from .async_view_test import *
+from .benchmarks_test import *
+from .bulk_mutation_test import *
+from .car_search_test import *
 from .car_test import *
+from .connection_test import *
+from .deletion_test import *
+from .export_test import *
+from .import_test import *
+from .indexes_test import *
+from .keyset_test import *
+from .loaders_test import *
 from .make_test import *
+from .metrics_test import *
 from .model_test import *
+from .n_plus_one_test import *
+from .nodes_test import *
+from .optimizer_test import *
+from .persisted_query_test import *
+from .query_cost_test import *
+from .replicas_test import *
+from .response_cache_test import *
+from .search_test import *
+from .sqlite_test import *
+from .stats_test import *
+from .tracing_test import *
 from .trim_test import *
+from .update_mutation_test import *
 from .validate_mutation_test import *
@@ -0,0 +1,131 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import (
+    AsyncRequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+)
+
+from cars.asgi import ASGIHandler
+from cars.management.commands.benchmark_http import percentile, run_load
+from cars.urls import document_backend
+from cars.views import CarsGraphQLView, offload_view
+
+from .factories import CarFactory
+
+
+class AsyncView_Test(TransactionTestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='graphql-test')
+        self.addCleanup(self.executor.shutdown)
+        self.threads = []
+
+        def view(request):
+            self.threads.append(threading.current_thread().name)
+            return CarsGraphQLView.as_view(backend=document_backend)(request)
+
+        self.view = offload_view(view, self.executor)
+        self.car = CarFactory(owner='Ann')
+
+    async def post(self, query):
+        request = AsyncRequestFactory().post('/graphql', {'query': query}, content_type='application/json')
+        response = await self.view(request)
+        return json.loads(response.content)
+
+    async def test_executes_in_pool(self):
+        """The async view answers with the result of the sync view, executed by a pool thread"""
+        content = await self.post('{ allCar { edges { node { owner trim { name } } } } }')
+
+        self.assertEqual(content['data']['allCar']['edges'][0]['node']['owner'], 'Ann')
+        self.assertEqual(len(self.threads), 1)
+        self.assertTrue(self.threads[0].startswith('graphql-test'))
+
+    async def test_errors(self):
+        """Invalid operations are reported as by the sync view"""
+        content = await self.post('{ allCar { edges { node { unknown } } } }')
+
+        self.assertIn('errors', content)
+
+
+class ASGIExport_Test(TransactionTestCase):
+    def setUp(self):
+        self.cars = CarFactory.create_batch(size=3)
+
+    async def get(self, path, query_string=b''):
+        """Sends a GET request to the ASGI application and returns the messages it sent back."""
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query_string, 'headers': [],
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await ASGIHandler()(scope, receive, send)
+        return messages
+
+    async def test_export_streams(self):
+        """The export streams the cars, its generator querying the database from a worker thread"""
+        messages = await self.get('/export/cars')
+
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn((b'Content-Type', b'application/x-ndjson'), messages[0]['headers'])
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [car.pk for car in self.cars])
+        self.assertNotIn('more_body', messages[-1])
+
+    async def test_other_responses(self):
+        """The other responses are sent as by Django"""
+        messages = await self.get('/export/cars', b'format=xml')
+
+        self.assertEqual(messages[0]['status'], 400)
+        self.assertEqual(messages[1]['body'], b'Unknown export format xml.')
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200 if self.path == '/graphql' else 500)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class BenchmarkHttp_Test(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def test_percentile(self):
+        """Percentiles are taken by nearest rank"""
+        latencies = list(range(1, 101))
+
+        self.assertEqual(percentile(latencies, 50), 50)
+        self.assertEqual(percentile(latencies, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertIsNone(percentile([], 99))
+
+    def test_run_load(self):
+        """Successful and failed requests are told apart"""
+        latencies, errors = run_load(f'{self.url}/graphql', b'{}', concurrency=2, duration=0.2)
+        self.assertTrue(latencies)
+        self.assertEqual(errors, 0)
+        self.assertEqual(latencies, sorted(latencies))
+
+        latencies, errors = run_load(f'{self.url}/other', b'{}', concurrency=2, duration=0.2)
+        self.assertEqual(latencies, [])
+        self.assertTrue(errors)
@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from cars.benchmarks import (
+    MACHINE_METRICS,
+    OPERATIONS,
+    compare,
+    run_catalog,
+    seed,
+)
+from cars.models import Car, CarSearch, Make, Model, Trim
+from project.schema import schema
+
+
+class Benchmarks_Test(TestCase):
+    def test_seed(self):
+        """The catalog is seeded with ten children per parent"""
+        volumes = seed(0.001)
+
+        self.assertEqual(volumes, {'makes': 1, 'models': 10, 'trims': 100, 'cars': 1000})
+        self.assertEqual(Make.objects.count(), 1)
+        self.assertEqual(Model.objects.count(), 10)
+        self.assertEqual(Trim.objects.filter(model_id=1).count(), 10)
+        self.assertEqual(Car.objects.filter(trim_id=1).count(), 10)
+        self.assertEqual(CarSearch.objects.count(), 1000)
+
+    def test_catalog(self):
+        """Every operation of the catalog runs, with the metrics of the baseline"""
+        seed(0.001)
+
+        results = run_catalog(schema, repeat=1)
+
+        self.assertEqual(set(results), set(OPERATIONS))
+        for metrics in results.values():
+            self.assertEqual(set(metrics), {'time_ms', 'queries', 'rows', 'peak_memory_kb'})
+        self.assertEqual(results['allCar nested page']['queries'], 1)
+        self.assertEqual(results['allCar nested page']['rows'], 404)
+
+    def test_compare(self):
+        """Only the increases over both the threshold and the absolute tolerance are regressions"""
+        baseline = {'op': {'time_ms': 10, 'queries': 2, 'rows': 100, 'peak_memory_kb': 100}}
+        results = {'op': {'time_ms': 11.5, 'queries': 3, 'rows': 120, 'peak_memory_kb': 150}}
+
+        self.assertEqual(compare(results, baseline, 0.25), [('op', 'queries', 2, 3)])
+        self.assertEqual(compare(results, baseline, 0.5), [])
+        self.assertEqual(compare(results, {}, 0.25), [])
+
+    def test_compare_machine_metrics(self):
+        """The time and memory are only compared when asked for, i.e. to the baseline of the same machine"""
+        baseline = {'op': {'time_ms': 10, 'queries': 2, 'rows': 100, 'peak_memory_kb': 100}}
+        results = {'op': {'time_ms': 20, 'queries': 2, 'rows': 100, 'peak_memory_kb': 200}}
+
+        self.assertEqual(compare(results, baseline, 0.25), [])
+        self.assertEqual(compare(results, baseline, 0.25, MACHINE_METRICS),
+                         [('op', 'time_ms', 10, 20), ('op', 'peak_memory_kb', 100, 200)])
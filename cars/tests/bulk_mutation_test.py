@@ -0,0 +1,164 @@
+import json
+
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import to_global_id
+
+from cars.models import Car, CarSearch
+
+from .factories import CarFactory, TrimFactory
+
+CREATE_CARS = """
+    mutation($input: CreateCarsInput!) {
+        createCars(input: $input) {
+            cars { id owner year }
+            errors { index message }
+        }
+    }
+    """
+
+UPDATE_CARS = """
+    mutation($input: UpdateCarsInput!) {
+        updateCars(input: $input) {
+            cars { id owner color }
+            errors { index message }
+        }
+    }
+    """
+
+DELETE_CARS = """
+    mutation($input: DeleteCarsInput!) {
+        deleteCars(input: $input) {
+            deletedCount
+            errors { index message }
+        }
+    }
+    """
+
+
+class BulkCarMutation_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        self.trim = TrimFactory()
+        self.trim_id = to_global_id('TrimNode', self.trim.pk)
+
+    def mutate(self, query, name, input_data):
+        response = self.query(query, input_data=input_data)
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data'][name]
+
+    def test_create_cars(self):
+        """Every car is created by a single insert and copied to car_search"""
+        data = [{'owner': f'Owner {index}', 'year': 2000 + index, 'trim': self.trim_id} for index in range(3)]
+
+        with self.assertNumQueries(11):
+            result = self.mutate(CREATE_CARS, 'createCars', {'data': data})
+
+        self.assertEqual(result['errors'], [])
+        self.assertEqual([car['owner'] for car in result['cars']], ['Owner 0', 'Owner 1', 'Owner 2'])
+        self.assertEqual(Car.objects.count(), 3)
+        ids = {to_global_id('CarNode', pk) for pk in Car.objects.values_list('pk', flat=True)}
+        self.assertEqual({car['id'] for car in result['cars']}, ids)
+        self.assertEqual(CarSearch.objects.count(), 3)
+
+    def test_create_cars_all_or_nothing(self):
+        """Invalid items are reported and no car is created"""
+        data = [
+            {'owner': 'Valid', 'trim': self.trim_id},
+            {'owner': 'Too old', 'year': 1800, 'trim': self.trim_id},
+            {'owner': 'No trim', 'trim': to_global_id('TrimNode', 0)},
+        ]
+
+        result = self.mutate(CREATE_CARS, 'createCars', {'data': data})
+
+        self.assertIsNone(result['cars'])
+        self.assertEqual([error['index'] for error in result['errors']], [1, 2])
+        self.assertEqual(result['errors'][0]['message'], 'Value in field year outside constraints')
+        self.assertEqual(Car.objects.count(), 0)
+
+    def test_update_cars(self):
+        """Cars are updated by a single bulk update"""
+        cars = CarFactory.create_batch(size=2, color='RED')
+        data = [
+            {'id': to_global_id('CarNode', cars[0].pk), 'owner': 'Ann'},
+            {'id': to_global_id('CarNode', cars[1].pk), 'color': 'BLUE'},
+        ]
+
+        result = self.mutate(UPDATE_CARS, 'updateCars', {'data': data})
+
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(Car.objects.get(pk=cars[0].pk).owner, 'Ann')
+        self.assertEqual(Car.objects.get(pk=cars[0].pk).color, 'RED')
+        self.assertEqual(Car.objects.get(pk=cars[1].pk).color, 'BLUE')
+        self.assertEqual(Car.objects.get(pk=cars[1].pk).owner, cars[1].owner)
+        self.assertEqual(CarSearch.objects.get(car=cars[0]).owner, 'Ann')
+
+    def test_update_cars_errors(self):
+        """Unknown and duplicated cars are reported and nothing is updated"""
+        car = CarFactory()
+        data = [
+            {'id': to_global_id('CarNode', car.pk), 'owner': 'Ann'},
+            {'id': to_global_id('CarNode', car.pk), 'owner': 'Bob'},
+            {'id': to_global_id('CarNode', 0), 'owner': 'Eve'},
+            {'id': to_global_id('TrimNode', car.pk), 'owner': 'Joe'},
+        ]
+
+        result = self.mutate(UPDATE_CARS, 'updateCars', {'data': data})
+
+        self.assertEqual(sorted(error['index'] for error in result['errors']), [1, 2, 3])
+        self.assertEqual(Car.objects.get(pk=car.pk).owner, car.owner)
+
+    def test_delete_cars_by_ids(self):
+        """Cars are deleted by ids along with their search rows"""
+        cars = CarFactory.create_batch(size=3)
+        ids = [to_global_id('CarNode', car.pk) for car in cars[:2]]
+
+        result = self.mutate(DELETE_CARS, 'deleteCars', {'ids': ids})
+
+        self.assertEqual(result, {'deletedCount': 2, 'errors': []})
+        self.assertEqual(list(Car.objects.values_list('pk', flat=True)), [cars[2].pk])
+        self.assertEqual(list(CarSearch.objects.values_list('car_id', flat=True)), [cars[2].pk])
+
+        result = self.mutate(DELETE_CARS, 'deleteCars', {'ids': ids + [to_global_id('CarNode', cars[2].pk)]})
+        self.assertEqual([error['index'] for error in result['errors']], [0, 1])
+        self.assertEqual(Car.objects.count(), 1)
+
+    def test_delete_cars_by_filter(self):
+        """Cars matching the allCar filters are deleted without listing their ids"""
+        CarFactory.create_batch(size=3, trim=self.trim, color='RED')
+        CarFactory(trim=self.trim, color='BLUE')
+
+        result = self.mutate(DELETE_CARS, 'deleteCars', {'filter': {'color': 'RED', 'trim': self.trim_id}})
+
+        self.assertEqual(result['deletedCount'], 3)
+        self.assertEqual(list(Car.objects.values_list('color', flat=True)), ['BLUE'])
+        self.assertEqual(CarSearch.objects.count(), 1)
+
+    def test_delete_cars_by_catalog_names(self):
+        """Filters on the catalog names, which go through the search rows, delete the matching cars"""
+        other_trim = TrimFactory()
+        deleted = CarFactory.create_batch(size=2, trim=self.trim)
+        kept = CarFactory(trim=other_trim, owner='Keeper')
+
+        for filter in ({'makeName': self.trim.model.make.name}, {'modelName': self.trim.model.name}):
+            result = self.mutate(DELETE_CARS, 'deleteCars', {'filter': filter})
+            self.assertEqual(result['deletedCount'], len(deleted))
+            self.assertEqual(list(Car.objects.values_list('pk', flat=True)), [kept.pk])
+            self.assertEqual(list(CarSearch.objects.values_list('car_id', flat=True)), [kept.pk])
+            deleted = CarFactory.create_batch(size=2, trim=self.trim)
+
+        response = self.query('{ searchCars(query: "keeper") { totalCount } }')
+        self.assertEqual(json.loads(response.content)['data']['searchCars']['totalCount'], 1)
+
+    def test_delete_cars_rejects_empty_filter(self):
+        """An empty filter, which would match every car, is rejected"""
+        CarFactory.create_batch(size=2)
+
+        for filter in ({}, {'color': None}):
+            response = self.query(DELETE_CARS, input_data={'filter': filter})
+            self.assertResponseHasErrors(response)
+        self.assertEqual(Car.objects.count(), 2)
+
+    def test_delete_cars_requires_ids_or_filter(self):
+        """Exactly one of ids and filter must be given"""
+        response = self.query(DELETE_CARS, input_data={})
+        self.assertResponseHasErrors(response)
@@ -0,0 +1,85 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.models import CarSearch
+
+from .factories import CarFactory, MakeFactory, ModelFactory, TrimFactory
+
+CARS_BY_NAME_QUERY = """
+    query($makeName: String, $modelName: String) {
+        allCar(makeName: $makeName, modelName: $modelName) {
+            edges {
+                node {
+                    owner
+                }
+            }
+        }
+    }
+    """
+
+
+class CarSearch_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        self.audi = MakeFactory(name='Audi')
+        self.a4 = ModelFactory(make=self.audi, name='A4')
+        self.a6 = ModelFactory(make=self.audi, name='A6')
+        self.a4_car = CarFactory(trim=TrimFactory(model=self.a4), owner='Ann')
+        self.a6_car = CarFactory(trim=TrimFactory(model=self.a6), owner='Bob')
+        self.other_car = CarFactory(owner='Eve')
+
+    def owners(self, **variables):
+        response = self.query(CARS_BY_NAME_QUERY, variables=variables)
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        return sorted(edge['node']['owner'] for edge in content['data']['allCar']['edges'])
+
+    def test_saved_cars_are_copied(self):
+        """Saving a car writes its search row with the catalog names"""
+        search = CarSearch.objects.get(car=self.a4_car)
+
+        self.assertEqual(search.owner, 'Ann')
+        self.assertEqual(search.trim_id, self.a4_car.trim_id)
+        self.assertEqual(search.model_name, 'A4')
+        self.assertEqual(search.make_id, self.audi.pk)
+        self.assertEqual(search.make_name, 'Audi')
+
+    def test_renames_are_propagated(self):
+        """Renaming a make or moving a trim updates the search rows"""
+        self.audi.name = 'Audi AG'
+        self.audi.save()
+        trim = self.a4_car.trim
+        trim.model = self.a6
+        trim.save()
+
+        search = CarSearch.objects.get(car=self.a4_car)
+        self.assertEqual(search.make_name, 'Audi AG')
+        self.assertEqual(search.model_id, self.a6.pk)
+        self.assertEqual(search.model_name, 'A6')
+
+    def test_deleted_cars_are_removed(self):
+        """Deleting a model removes the search rows of its cars"""
+        self.a4.delete()
+
+        self.assertFalse(CarSearch.objects.filter(car_id=self.a4_car.pk).exists())
+        self.assertTrue(CarSearch.objects.filter(car_id=self.a6_car.pk).exists())
+
+    def test_filter_by_names(self):
+        """allCar can be filtered by make and model names"""
+        self.assertEqual(self.owners(makeName='Audi'), ['Ann', 'Bob'])
+        self.assertEqual(self.owners(makeName='Audi', modelName='A6'), ['Bob'])
+        self.assertEqual(self.owners(modelName='A8'), [])
+
+    def test_rebuild_command(self):
+        """The rebuild command recreates the rows of every car"""
+        CarSearch.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_car_search', batch_size=2, stdout=out)
+
+        self.assertIn('3 cars', out.getvalue())
+        self.assertEqual(CarSearch.objects.count(), 3)
+        self.assertEqual(CarSearch.objects.get(car=self.a6_car).model_name, 'A6')
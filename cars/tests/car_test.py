@@ -12,11 +12,12 @@ from cars.models import Car, Trim
 from cars.types import CarNode, TrimNode
 
 from .factories import CarFactory, TrimFactory
+from .queries import QueryCountMixin
 
 faker = Factory.create()
 
 
-class Car_Test(GraphQLTestCase):
+class Car_Test(QueryCountMixin, GraphQLTestCase):
     def setUp(self):
         self.GRAPHQL_URL = "/graphql"
         CarFactory.create_batch(size=3)
@@ -62,7 +63,8 @@ class Car_Test(GraphQLTestCase):
         Create 3 objects, fetch all using allCar query and check that the 3 objects are returned following
         Relay standards.
         """
-        response = self.query(
+        response = self.assertMaxQueries(
+            1, self.query,
             """
             query {
                 allCar{
@@ -0,0 +1,150 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.models import Make
+from cars.statistics import estimate_row_count
+
+from .factories import CarFactory, MakeFactory
+
+
+class Connection_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        CarFactory.create_batch(size=5, color='RED')
+        CarFactory.create_batch(size=2, color='BLUE')
+
+    def test_count_is_skipped(self):
+        """
+        Fetch a page without selecting the total and check that no COUNT query is issued.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(
+                """
+                query {
+                    allCar(first: 3){
+                        pageInfo{
+                            hasNextPage
+                            hasPreviousPage
+                        }
+                        edges{
+                            node{
+                                id
+                            }
+                        }
+                    }
+                }
+                """
+            )
+        self.assertResponseNoErrors(response)
+        self.assertEquals(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        connection_data = json.loads(response.content)['data']['allCar']
+        self.assertEquals(len(connection_data['edges']), 3)
+        self.assertTrue(connection_data['pageInfo']['hasNextPage'])
+        self.assertFalse(connection_data['pageInfo']['hasPreviousPage'])
+
+    def test_last_page(self):
+        """
+        Fetch the page holding the last rows and check that there is no next page.
+        """
+        response = self.query(
+            """
+            query {
+                allCar(first: 3, offset: 5){
+                    pageInfo{
+                        hasNextPage
+                    }
+                    edges{
+                        node{
+                            id
+                        }
+                    }
+                }
+            }
+            """
+        )
+        self.assertResponseNoErrors(response)
+        connection_data = json.loads(response.content)['data']['allCar']
+        self.assertEquals(len(connection_data['edges']), 2)
+        self.assertFalse(connection_data['pageInfo']['hasNextPage'])
+
+    def test_total_count(self):
+        """
+        Select the exact and approximate totals of a filtered connection and check both are exact.
+        """
+        response = self.query(
+            """
+            query {
+                allCar(first: 1, color: "RED"){
+                    totalCount
+                    approximateTotalCount
+                }
+            }
+            """
+        )
+        self.assertResponseNoErrors(response)
+        connection_data = json.loads(response.content)['data']['allCar']
+        self.assertEquals(connection_data['totalCount'], 5)
+        self.assertEquals(connection_data['approximateTotalCount'], 5)
+
+    def test_approximate_total_count(self):
+        """
+        Select the approximate total of an unfiltered connection and check that it comes from the table statistics.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE car')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(
+                """
+                query {
+                    allCar(first: 1){
+                        approximateTotalCount
+                    }
+                }
+                """
+            )
+        self.assertResponseNoErrors(response)
+        self.assertFalse(any('COUNT' in query['sql'] for query in queries))
+        connection_data = json.loads(response.content)['data']['allCar']
+        self.assertEquals(connection_data['approximateTotalCount'], 7)
+
+    def test_estimate_with_partial_index(self):
+        """
+        Analyze a table with a partial index holding only some of its rows and check that the estimate is the
+        number of rows of the table.
+        """
+        MakeFactory.create_batch(size=3, deleted=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE make')
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 'make' AND idx = 'make_name_uniq'")
+            self.assertEquals(int(cursor.fetchone()[0].split()[0]), 7)
+
+        self.assertEquals(estimate_row_count(Make), 10)
+
+    def test_backward_page(self):
+        """
+        Fetch the last rows before a cursor and check that only the rows right before it are returned.
+        """
+        response = self.query(
+            """
+            query {
+                allCar(last: 2, before: "YXJyYXljb25uZWN0aW9uOjU="){
+                    pageInfo{
+                        hasPreviousPage
+                    }
+                    edges{
+                        cursor
+                    }
+                }
+            }
+            """
+        )
+        self.assertResponseNoErrors(response)
+        connection_data = json.loads(response.content)['data']['allCar']
+        self.assertEquals([edge['cursor'] for edge in connection_data['edges']],
+                          ['YXJyYXljb25uZWN0aW9uOjM=', 'YXJyYXljb25uZWN0aW9uOjQ='])
+        self.assertTrue(connection_data['pageInfo']['hasPreviousPage'])
@@ -0,0 +1,260 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.utils import timezone
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import to_global_id
+
+from cars.deletion import HEARTBEAT_TIMEOUT, pending_jobs, run_job
+from cars.importer import CarImporter
+from cars.models import Car, CarSearch, DeletionJob, Make, Model, Trim
+
+from .factories import CarFactory, MakeFactory, ModelFactory, TrimFactory
+
+DELETE_MAKE = """
+    mutation($input: DeleteMakeInput!) {
+        deleteMake(input: $input) {
+            ok
+            deletionJob { id status }
+        }
+    }
+    """
+
+DELETION_JOB = """
+    query($id: ID!) {
+        deletionJob(id: $id) {
+            status
+            carsDeleted
+            trimsDeleted
+            modelsDeleted
+            finishedAt
+        }
+    }
+    """
+
+
+class Deletion_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        self.make = MakeFactory(name='Audi')
+        for model in ModelFactory.create_batch(size=2, make=self.make):
+            for trim in TrimFactory.create_batch(size=2, model=model):
+                CarFactory.create_batch(size=3, trim=trim)
+        self.other_car = CarFactory()
+
+    def delete_make(self):
+        response = self.query(DELETE_MAKE, input_data={'id': to_global_id('MakeNode', self.make.pk)})
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']['deleteMake']
+
+    def test_delete_hides_subtree_and_queues_job(self):
+        """Deleting a make hides it and its models and trims before anything is deleted"""
+        with self.assertNumQueries(7):
+            result = self.delete_make()
+
+        self.assertTrue(result['ok'])
+        self.assertEqual(result['deletionJob']['status'], 'PENDING')
+        self.assertFalse(Make.objects.filter(pk=self.make.pk).exists())
+        self.assertEqual(Model.objects.filter(make_id=self.make.pk).count(), 0)
+        self.assertEqual(Trim.objects.filter(model__make_id=self.make.pk).count(), 0)
+        self.assertEqual(Car.objects.count(), 13)
+
+        response = self.query(DELETE_MAKE, input_data={'id': to_global_id('MakeNode', self.make.pk)})
+        self.assertResponseHasErrors(response)
+
+    def test_job_deletes_subtree_in_batches(self):
+        """The job deletes the cars, trims and models bottom-up and reports its progress"""
+        job_id = self.delete_make()['deletionJob']['id']
+
+        out = StringIO()
+        call_command('run_deletion_jobs', once=True, batch_size=5, stdout=out)
+
+        self.assertIn(f'Deleted make {self.make.pk}', out.getvalue())
+        self.assertEqual(list(Car.objects.all()), [self.other_car])
+        self.assertEqual(list(CarSearch.objects.values_list('car_id', flat=True)), [self.other_car.pk])
+        self.assertFalse(Trim.all_objects.filter(model__make_id=self.make.pk).exists())
+        self.assertFalse(Model.all_objects.filter(make_id=self.make.pk).exists())
+        self.assertFalse(Make.all_objects.filter(pk=self.make.pk).exists())
+
+        response = self.query(DELETION_JOB, variables={'id': job_id})
+        self.assertResponseNoErrors(response)
+        job = json.loads(response.content)['data']['deletionJob']
+        self.assertEqual(job['status'], 'DONE')
+        self.assertEqual((job['carsDeleted'], job['trimsDeleted'], job['modelsDeleted']), (12, 4, 2))
+        self.assertIsNotNone(job['finishedAt'])
+
+    def test_job_runs_once(self):
+        """A job claimed by a worker is not run again"""
+        self.delete_make()
+        job = DeletionJob.objects.get()
+
+        self.assertTrue(run_job(job))
+        self.assertFalse(run_job(job))
+
+    def test_abandoned_jobs_are_claimed_again(self):
+        """A job whose worker stopped renewing its heartbeat is run by the next worker, but not before"""
+        self.delete_make()
+        DeletionJob.objects.update(status=DeletionJob.RUNNING, heartbeat_at=timezone.now())
+        self.assertEqual(list(pending_jobs()), [])
+
+        DeletionJob.objects.update(heartbeat_at=timezone.now() - HEARTBEAT_TIMEOUT * 2)
+        abandoned, job = DeletionJob.objects.get(), DeletionJob.objects.get()
+        self.assertEqual(list(pending_jobs()), [job])
+
+        self.assertTrue(run_job(job))
+        self.assertFalse(run_job(abandoned))
+        self.assertEqual(DeletionJob.objects.get().status, DeletionJob.DONE)
+        self.assertEqual(list(Car.objects.all()), [self.other_car])
+
+    def test_worker_stops_when_its_job_is_claimed_again(self):
+        """A worker whose job was claimed again by another one rolls its batch back and stops"""
+        self.delete_make()
+        job = DeletionJob.objects.get()
+
+        def claim_again(queryset):
+            DeletionJob.objects.update(heartbeat_at=timezone.now())
+            return queryset._raw_delete(queryset.db)
+
+        with mock.patch('cars.deletion.delete_cars', side_effect=claim_again):
+            self.assertFalse(run_job(job, batch_size=5))
+
+        self.assertEqual(Car.objects.count(), 13)
+        self.assertEqual(DeletionJob.objects.get().status, DeletionJob.RUNNING)
+
+    def test_deleted_make_name_matches_no_car(self):
+        """The cars of a deleted make no longer match its name, which another make may reuse"""
+        self.delete_make()
+        car = CarFactory(trim=TrimFactory(model=ModelFactory(make=MakeFactory(name='Audi'))))
+
+        response = self.query(
+            """
+            query {
+                allCar(makeName: "Audi") { edges { node { id } } }
+            }
+            """
+        )
+        self.assertResponseNoErrors(response)
+        self.assertEqual([edge['node']['id'] for edge in json.loads(response.content)['data']['allCar']['edges']],
+                         [to_global_id('CarNode', car.pk)])
+
+    def test_deleted_model_hidden_from_make(self):
+        """A model waiting for its deletion is not listed under its make"""
+        model = Model.objects.filter(make=self.make).first()
+        response = self.query(
+            """
+            mutation($input: DeleteModelInput!) {
+                deleteModel(input: $input) { ok }
+            }
+            """,
+            input_data={'id': to_global_id('ModelNode', model.pk)}
+        )
+        self.assertResponseNoErrors(response)
+
+        response = self.query(
+            """
+            query {
+                allMake(name: "Audi") { edges { node { models { edges { node { id } } } } } }
+            }
+            """
+        )
+        self.assertResponseNoErrors(response)
+        makes = json.loads(response.content)['data']['allMake']['edges']
+        ids = [edge['node']['id'] for make in makes for edge in make['node']['models']['edges']]
+        self.assertEqual(len(ids), 1)
+        self.assertNotIn(to_global_id('ModelNode', model.pk), ids)
+
+    def test_deleted_names_can_be_reused(self):
+        """A deleted make can be created again, by a mutation or an import, before its job runs"""
+        self.delete_make()
+        response = self.query(
+            """
+            mutation($input: CreateMakeInput!) {
+                createMake(input: $input) { make { id } }
+            }
+            """,
+            input_data={'data': {'name': 'Audi'}}
+        )
+        self.assertResponseNoErrors(response)
+        CarImporter().run([{'make': 'Audi', 'model': 'A4', 'trim': 'Quattro', 'owner': 'Ann', 'color': 'RED',
+                            'year': 2015}])
+
+        run_job(DeletionJob.objects.get())
+
+        make = Make.objects.get(name='Audi')
+        self.assertEqual(json.loads(response.content)['data']['createMake']['make']['id'],
+                         to_global_id('MakeNode', make.pk))
+        self.assertEqual(list(Car.objects.filter(trim__model__make=make).values_list('owner', flat=True)), ['Ann'])
+        self.assertEqual(Make.all_objects.count(), Make.objects.count())
+
+    def test_deleted_parents_are_refused(self):
+        """Cars, models and trims can neither be created under nor moved to an entry waiting for its deletion"""
+        car = Car.objects.filter(trim__model__make=self.make).first()
+        trim, model = car.trim, car.trim.model
+        self.delete_make()
+
+        mutations = [
+            ('createCar', 'CreateCarInput', {'data': {'trim': to_global_id('TrimNode', trim.pk)}}),
+            ('createTrim', 'CreateTrimInput', {'data': {'name': 'New', 'model': to_global_id('ModelNode', model.pk)}}),
+            ('createModel', 'CreateModelInput',
+             {'data': {'name': 'New', 'make': to_global_id('MakeNode', self.make.pk)}}),
+            ('updateCar', 'UpdateCarInput', {'id': to_global_id('CarNode', self.other_car.pk),
+                                             'data': {'trim': to_global_id('TrimNode', trim.pk)}}),
+        ]
+        for name, input_type, input_data in mutations:
+            response = self.query(
+                f"""
+                mutation($input: {input_type}!) {{
+                    {name}(input: $input) {{ clientMutationId }}
+                }}
+                """,
+                input_data=input_data
+            )
+            self.assertResponseHasErrors(response)
+            self.assertIn('matching query does not exist', json.loads(response.content)['errors'][0]['message'])
+
+        self.assertTrue(run_job(DeletionJob.objects.get()))
+        self.assertEqual(list(Car.objects.all()), [self.other_car])
+
+    def test_cars_under_deleted_trim_keep_their_trim(self):
+        """Cars stay listed with their trim, model and make until the job deletes them"""
+        trim = Trim.objects.filter(model__make=self.make).first()
+        response = self.query(
+            """
+            mutation($input: DeleteTrimInput!) {
+                deleteTrim(input: $input) { ok }
+            }
+            """,
+            input_data={'id': to_global_id('TrimNode', trim.pk)}
+        )
+        self.assertResponseNoErrors(response)
+
+        response = self.query(
+            """
+            query($trim: ID!) {
+                allCar(trim: $trim) { edges { node { trim { name model { make { name } } } } } }
+            }
+            """,
+            variables={'trim': to_global_id('TrimNode', trim.pk)}
+        )
+        self.assertResponseNoErrors(response)
+        cars = json.loads(response.content)['data']['allCar']['edges']
+        self.assertEqual(len(cars), 3)
+        for car in cars:
+            self.assertEqual(car['node']['trim']['name'], trim.name)
+            self.assertEqual(car['node']['trim']['model']['make']['name'], 'Audi')
+
+        # The payload of the mutation is not optimized: its trim is loaded by the DataLoader.
+        response = self.query(
+            """
+            mutation($input: UpdateCarInput!) {
+                updateCar(input: $input) { car { owner trim { name model { make { name } } } } }
+            }
+            """,
+            input_data={'id': to_global_id('CarNode', trim.cars.first().pk), 'data': {'owner': 'Ann'}}
+        )
+        self.assertResponseNoErrors(response)
+        car = json.loads(response.content)['data']['updateCar']['car']
+        self.assertEqual((car['owner'], car['trim']['name']), ('Ann', trim.name))
+        self.assertEqual(car['trim']['model']['make']['name'], 'Audi')
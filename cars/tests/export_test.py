@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from graphql_relay import to_global_id
+
+from cars.export import iter_rows
+from cars.models import Car
+
+from .factories import CarFactory, MakeFactory, ModelFactory, TrimFactory
+
+
+class Export_Test(TestCase):
+    def setUp(self):
+        self.trim = TrimFactory(model=ModelFactory(make=MakeFactory(name='Audi'), name='A4'), name='Quattro')
+        self.cars = [CarFactory(trim=self.trim, color='RED') for _ in range(3)]
+        self.cars += [CarFactory(color='BLUE') for _ in range(2)]
+
+    def export(self, **params):
+        response = self.client.get('/export/cars', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        """Every car is exported with its catalog names, ordered by id"""
+        rows = [json.loads(line) for line in self.export().splitlines()]
+
+        self.assertEqual([row['id'] for row in rows], [car.pk for car in self.cars])
+        self.assertEqual(rows[0]['owner'], self.cars[0].owner)
+        self.assertEqual((rows[0]['make'], rows[0]['model'], rows[0]['trim']), ('Audi', 'A4', 'Quattro'))
+
+    def test_csv(self):
+        """The CSV export has a header and a line per car"""
+        rows = list(csv.DictReader(io.StringIO(self.export(format='csv'))))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['color'], 'RED')
+        self.assertEqual(rows[0]['trim_id'], str(self.trim.pk))
+
+    def test_filters_and_resume(self):
+        """Exports take the allCar filters and resume after the given id"""
+        rows = self.export(color='RED', trim=to_global_id('TrimNode', self.trim.pk), after_id=self.cars[0].pk)
+        self.assertEqual([json.loads(line)['id'] for line in rows.splitlines()], [self.cars[1].pk, self.cars[2].pk])
+
+        rows = self.export(makeName='Audi')
+        self.assertEqual(len(rows.splitlines()), 3)
+
+    def test_invalid_parameters(self):
+        """Unknown formats and invalid filters are rejected"""
+        self.assertEqual(self.client.get('/export/cars', {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/export/cars', {'after_id': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/export/cars', {'year': 'x'}).status_code, 400)
+
+    def test_chunks(self):
+        """Rows are fetched in chunks seeking on the id"""
+        with self.assertNumQueries(3):
+            rows = list(iter_rows(Car.objects.all(), chunk_size=2))
+
+        self.assertEqual([row['id'] for row in rows], [car.pk for car in self.cars])
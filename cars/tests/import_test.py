@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from cars.importer import CarImporter, read_rows
+from cars.models import Car, CarSearch, Make, Model, Trim
+
+from .factories import MakeFactory
+
+FEED = [
+    {'make': 'Audi', 'model': 'A4', 'trim': 'Quattro', 'owner': 'Ann', 'color': 'red', 'year': 2015},
+    {'make': 'Audi', 'model': 'A4', 'trim': 'Quattro', 'owner': 'Bob', 'color': 'BLUE', 'year': '2016'},
+    {'make': 'Audi', 'model': 'A6', 'trim': 'Base', 'owner': 'Eve', 'color': '', 'year': ''},
+    {'make': 'BMW', 'model': 'X5', 'trim': 'xDrive', 'owner': 'Joe', 'color': 'PINK', 'year': 2015},
+    {'make': 'BMW', 'model': 'X5', 'trim': 'xDrive', 'owner': 'Sam', 'color': 'WHITE', 'year': 2020},
+]
+
+
+class ImportCars_Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.audi = MakeFactory(name='Audi')
+
+    def write_feed(self, name, rows):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as feed:
+            if name.endswith('.csv'):
+                feed.write('make,model,trim,owner,color,year\n')
+                for row in rows:
+                    feed.write(','.join(str(row[key]) for key in ('make', 'model', 'trim', 'owner', 'color', 'year')))
+                    feed.write('\n')
+            else:
+                for row in rows:
+                    feed.write(json.dumps(row) + '\n')
+        return path
+
+    def import_cars(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_cars', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_jsonl(self):
+        """Cars are imported along with the missing catalog entries"""
+        with mock.patch('cars.importer.bump_versions') as bump_versions:
+            out, err = self.import_cars(self.write_feed('feed.jsonl', FEED), batch_size=2)
+
+        self.assertIn('Imported 4 cars', out)
+        self.assertIn('rows/s', out)
+        self.assertIn('Skipped row 4: unknown color PINK', err)
+        self.assertEqual(Make.objects.count(), 2)
+        self.assertEqual(Make.objects.get(name='Audi'), self.audi)
+        self.assertEqual(Model.objects.filter(make=self.audi).count(), 2)
+        self.assertEqual(Trim.objects.count(), 3)
+
+        car = Car.objects.get(owner='Ann')
+        self.assertEqual((car.color, car.year, car.trim.name), ('RED', 2015, 'Quattro'))
+        self.assertIsNone(Car.objects.get(owner='Eve').year)
+
+        self.assertEqual(CarSearch.objects.count(), 4)
+        self.assertEqual(CarSearch.objects.get(car__owner='Sam').make_name, 'BMW')
+        self.assertTrue(any(Make in call.args for call in bump_versions.call_args_list))
+
+    def test_import_csv(self):
+        """CSV feeds are read from their header"""
+        path = self.write_feed('feed.csv', FEED)
+        self.assertEqual(len(list(read_rows(path))), 5)
+
+        self.import_cars(path)
+        self.assertEqual(Car.objects.count(), 4)
+
+    def test_malformed_jsonl_lines(self):
+        """Malformed JSONL lines are skipped and counted with their line number, the next rows keeping their position"""
+        path = self.write_feed('feed.jsonl', FEED[:2])
+        with open(path, 'a') as feed:
+            feed.write('\n{"make": "Audi", "model"\n["Audi", "A4"]\n')
+            feed.write(json.dumps(FEED[4]) + '\n')
+
+        out, err = self.import_cars(path, batch_size=2)
+
+        self.assertIn('Imported 3 cars', out)
+        self.assertIn('skipped 2 invalid rows', out)
+        self.assertIn('Skipped row 3: invalid JSON on line 4', err)
+        self.assertIn('Skipped row 4: line 5 is not a JSON object', err)
+        self.assertEqual(sorted(Car.objects.values_list('owner', flat=True)), ['Ann', 'Bob', 'Sam'])
+        self.assertEqual(len(list(read_rows(path))), 5)
+
+    def test_resume_after_failure(self):
+        """An import failing midway resumes after the last committed chunk"""
+        path = self.write_feed('feed.jsonl', FEED)
+        checkpoint = path + '.checkpoint'
+        importer = CarImporter(batch_size=2, checkpoint=checkpoint)
+
+        original = importer.import_chunk
+        calls = []
+
+        def failing_import_chunk(chunk):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('Connection lost')
+            return original(chunk)
+
+        with mock.patch.object(importer, 'import_chunk', failing_import_chunk):
+            with self.assertRaises(RuntimeError):
+                importer.run(read_rows(path))
+
+        self.assertEqual(Car.objects.count(), 2)
+        with open(checkpoint) as f:
+            self.assertEqual(f.read(), '2')
+
+        out, _ = self.import_cars(path)
+
+        self.assertIn('Resuming after row 2', out)
+        self.assertEqual(sorted(Car.objects.values_list('owner', flat=True)), ['Ann', 'Bob', 'Eve', 'Sam'])
+        self.assertFalse(os.path.exists(checkpoint))
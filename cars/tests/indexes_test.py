@@ -0,0 +1,27 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from cars.models import Car
+
+from .factories import CarFactory
+
+
+class CarIndexes_Test(TransactionTestCase):
+    def test_explain_car_indexes(self):
+        """Filtered car queries use the indexes, which are restored after the comparison"""
+        CarFactory.create_batch(size=5)
+
+        out = StringIO()
+        call_command('explain_car_indexes', repeat=1, json=True, stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertIn('car_color_year_idx', report['color, year']['after']['plan'])
+        self.assertNotIn('car_color_year_idx', report['color, year']['before']['plan'])
+        self.assertIn('car_owner_idx', report['owner']['after']['plan'])
+
+        # Dropping the indexes was rolled back.
+        plan = Car.objects.filter(owner='Ann').explain()
+        self.assertIn('car_owner_idx', plan)
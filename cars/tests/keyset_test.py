@@ -0,0 +1,83 @@
+import json
+
+from graphene_django.utils.testing import GraphQLTestCase
+
+from .factories import CarFactory
+
+KEYSET_QUERY = """
+    query($first: Int, $after: String, $last: Int, $before: String, $color: String) {
+        allCarKeyset(first: $first, after: $after, last: $last, before: $before, color: $color){
+            pageInfo{
+                hasNextPage
+                hasPreviousPage
+                startCursor
+                endCursor
+            }
+            edges{
+                node{
+                    id
+                    year
+                }
+            }
+        }
+    }
+    """
+
+
+class Keyset_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        CarFactory.create_batch(size=4, year=2000, color='RED')
+        CarFactory.create_batch(size=3, year=1990, color='BLUE')
+        CarFactory.create(year=None, color='RED')
+        CarFactory.create_batch(size=2, year=2010, color='BLUE')
+
+    def fetch_pages(self, **variables):
+        years = []
+        pages = 0
+        while True:
+            response = self.query(KEYSET_QUERY, variables=variables)
+            self.assertResponseNoErrors(response)
+            connection = json.loads(response.content)['data']['allCarKeyset']
+            years.extend(edge['node']['year'] for edge in connection['edges'])
+            pages += 1
+            if not connection['pageInfo']['hasNextPage']:
+                return years, pages
+            variables['after'] = connection['pageInfo']['endCursor']
+
+    def test_forward_pagination(self):
+        """
+        Page through every car three at a time and check that they come sorted by year, NULLs first.
+        """
+        years, pages = self.fetch_pages(first=3)
+        self.assertEquals(pages, 4)
+        self.assertEquals(years, [None, 1990, 1990, 1990, 2000, 2000, 2000, 2000, 2010, 2010])
+
+    def test_filtered_pagination(self):
+        """
+        Page through the cars of a single color and check that the filter still applies.
+        """
+        years, pages = self.fetch_pages(first=2, color='BLUE')
+        self.assertEquals(pages, 3)
+        self.assertEquals(years, [1990, 1990, 1990, 2010, 2010])
+
+    def test_backward_pagination(self):
+        """
+        Fetch the last page before a cursor and check that it holds the cars sorted right before it.
+        """
+        response = self.query(KEYSET_QUERY, variables={'first': 5})
+        connection = json.loads(response.content)['data']['allCarKeyset']
+        end_cursor = connection['pageInfo']['endCursor']
+
+        response = self.query(KEYSET_QUERY, variables={'last': 2, 'before': end_cursor})
+        self.assertResponseNoErrors(response)
+        connection = json.loads(response.content)['data']['allCarKeyset']
+        self.assertEquals([edge['node']['year'] for edge in connection['edges']], [1990, 1990])
+        self.assertTrue(connection['pageInfo']['hasPreviousPage'])
+
+    def test_invalid_cursor(self):
+        """
+        Send a cursor that was not issued by the connection and check that it is rejected.
+        """
+        response = self.query(KEYSET_QUERY, variables={'first': 2, 'after': 'bm90IGEgY3Vyc29y'})
+        self.assertResponseHasErrors(response)
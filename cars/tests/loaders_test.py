@@ -0,0 +1,172 @@
+import json
+from collections import Counter
+
+from django.db.models.signals import post_init
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import from_global_id, to_global_id
+from promise import Promise
+
+from cars.loaders import CarsByTrimLoader, TrimLoader
+from cars.models import Car, Make, Trim
+from cars.types import TrimNode
+
+from .factories import CarFactory, MakeFactory, ModelFactory, TrimFactory
+from .queries import QueryCountMixin
+
+
+class Loaders_Test(QueryCountMixin, GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        CarFactory.create_batch(size=10)
+
+    def test_object_loader(self):
+        """
+        Load several trims at once and check that they are fetched with a single query, in the order of the keys.
+        """
+        trims = list(Trim.objects.all())
+        keys = [trims[2].pk, trims[0].pk, str(trims[1].pk), 0]
+        # Loads are batched until the current promise callback returns, as they are during execution.
+        with self.assertNumQueries(1):
+            loaded = Promise.resolve(None).then(lambda _: TrimLoader().load_many(keys)).get()
+        self.assertEquals(loaded, [trims[2], trims[0], trims[1], None])
+
+    def test_related_list_loader(self):
+        """
+        Load the cars of several trims at once and check that they are fetched with a single query.
+        """
+        trims = list(Trim.objects.all())
+        keys = [trim.pk for trim in trims]
+        with self.assertNumQueries(1):
+            loaded = Promise.resolve(None).then(lambda _: CarsByTrimLoader().load_many(keys)).get()
+        for trim, cars in zip(trims, loaded):
+            self.assertEquals(cars, list(trim.cars.order_by('pk')))
+
+    def test_filtered_reverse_connection(self):
+        """
+        Filter a reverse connection and check that only the matching children are returned.
+        """
+        trim = TrimFactory.create()
+        CarFactory.create_batch(size=3, trim=trim, color='RED')
+        CarFactory.create(trim=trim, color='BLUE')
+
+        # The foreign key to the trim is fetched along with the page, not car by car.
+        response = self.assertMaxQueries(
+            2, self.query,
+            """
+            query($id: ID!) {
+                trim(id: $id){
+                    cars(color: "RED"){
+                        edges{
+                            node{
+                                color
+                            }
+                        }
+                    }
+                }
+            }
+            """,
+            variables={'id': to_global_id(TrimNode._meta.name, trim.pk)}
+        )
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        car_list = content['data']['trim']['cars']['edges']
+        self.assertEquals(len(car_list), 3)
+        for edge in car_list:
+            self.assertEquals(edge['node']['color'], 'RED')
+
+
+class Batching_Test(QueryCountMixin, GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        for make in MakeFactory.create_batch(size=2):
+            for model in ModelFactory.create_batch(size=3, make=make):
+                for trim in TrimFactory.create_batch(size=3, model=model):
+                    CarFactory.create_batch(size=3, trim=trim)
+
+    def query_rows(self, maximum, query):
+        """Runs `query` in at most `maximum` SQL queries, returning its data and the rows fetched by model."""
+        rows = Counter()
+
+        def count_row(sender, **kwargs):
+            rows[sender] += 1
+
+        post_init.connect(count_row, weak=False)
+        try:
+            response = self.assertMaxQueries(maximum, self.query, query)
+        finally:
+            post_init.disconnect(count_row)
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data'], rows
+
+    def test_forward_relations_are_batched(self):
+        """
+        Fetch every car with its trim, model and make and check that they are fetched along with the page.
+        """
+        data, rows = self.query_rows(
+            1,
+            """
+            query {
+                allCar{ edges{ node{ id trim{ name model{ name make{ name } } } } } }
+            }
+            """
+        )
+        car_list = data['allCar']['edges']
+        self.assertEquals(len(car_list), 54)
+        for edge, car in zip(car_list, Car.objects.order_by('pk')):
+            self.assertEquals(edge['node']['trim']['model']['make']['name'], car.trim.model.make.name)
+        self.assertEquals(rows[Car], 54)
+
+    def test_reverse_connections_are_limited(self):
+        """
+        Fetch the first child of every make, model and trim and check that each connection level costs a single
+        query, fetching no more than the row telling whether there is a next page for every parent.
+        """
+        data, rows = self.query_rows(
+            4,
+            """
+            query {
+                allMake{ edges{ node{
+                    models(first: 1){ pageInfo{ hasNextPage } edges{ node{
+                        trims(first: 1){ edges{ node{
+                            cars(first: 1){ edges{ node{ id } } }
+                        } } }
+                    } } }
+                } } }
+            }
+            """
+        )
+        makes = data['allMake']['edges']
+        self.assertEquals(len(makes), 2)
+        for make in makes:
+            models = make['node']['models']
+            self.assertTrue(models['pageInfo']['hasNextPage'])
+            self.assertEquals(len(models['edges']), 1)
+            trims = models['edges'][0]['node']['trims']['edges']
+            self.assertEquals(len(trims), 1)
+            self.assertEquals(len(trims[0]['node']['cars']['edges']), 1)
+        self.assertEquals(rows[Make], 2)
+        self.assertEquals(sum(rows.values()), 2 + 3 * 2 * 2)
+
+    def test_reverse_connection_pages(self):
+        """
+        Page through the cars of every trim and check that the limited rows give the same pages and totals.
+        """
+        data, rows = self.query_rows(
+            3,
+            """
+            query {
+                allTrim(first: 2){ edges{ node{
+                    id
+                    cars(first: 1, offset: 1){ pageInfo{ hasNextPage } edges{ node{ id } } }
+                    total: cars{ totalCount }
+                } } }
+            }
+            """
+        )
+        for edge in data['allTrim']['edges']:
+            trim = Trim.objects.get(pk=from_global_id(edge['node']['id'])[1])
+            cars = edge['node']['cars']
+            self.assertEquals([car['node']['id'] for car in cars['edges']],
+                              [to_global_id('CarNode', trim.cars.order_by('pk')[1].pk)])
+            self.assertTrue(cars['pageInfo']['hasNextPage'])
+            self.assertEquals(edge['node']['total']['totalCount'], 3)
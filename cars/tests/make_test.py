@@ -12,11 +12,12 @@ from cars.models import Make
 from cars.types import MakeNode, ModelNode
 
 from .factories import MakeFactory, MakeWithForeignFactory, ModelFactory
+from .queries import QueryCountMixin
 
 faker = Factory.create()
 
 
-class Make_Test(GraphQLTestCase):
+class Make_Test(QueryCountMixin, GraphQLTestCase):
     def setUp(self):
         self.GRAPHQL_URL = "/graphql"
         MakeFactory.create_batch(size=3)
@@ -52,7 +53,8 @@ class Make_Test(GraphQLTestCase):
         Create 3 objects, fetch all using allMake query and check that the 3 objects are returned following
         Relay standards.
         """
-        response = self.query(
+        response = self.assertMaxQueries(
+            1, self.query,
             """
             query {
                 allMake{
@@ -0,0 +1,170 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.metrics import MetricsStore, exposition, operation_label
+
+from .factories import MakeFactory
+
+ALL_MAKES = '''
+    query AllMakes {
+        allMake { edges { node { name } } }
+    }
+    '''
+
+
+def increment_in_process(path):
+    MetricsStore(path).increment([('graphql_requests_total', 'operation="AllMakes"', 1)])
+
+
+class Metrics_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(METRICS_DATABASE=os.path.join(directory.name, 'metrics.sqlite3'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        MakeFactory(name='Audi')
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        return {
+            line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in response.content.decode().splitlines() if not line.startswith('#')
+        }
+
+    def test_operation_metrics(self):
+        """Requests, latency, SQL queries and response size are recorded per operation"""
+        first = self.query(ALL_MAKES, op_name='AllMakes')
+        self.query(ALL_MAKES, op_name='AllMakes')
+
+        samples = self.scrape()
+        labels = '{operation="AllMakes"}'
+        self.assertEqual(samples[f'graphql_requests_total{labels}'], 2)
+        self.assertEqual(samples[f'graphql_request_duration_seconds_count{labels}'], 2)
+        self.assertEqual(samples['graphql_request_duration_seconds_bucket{operation="AllMakes",le="+Inf"}'], 2)
+        self.assertGreaterEqual(samples[f'graphql_sql_queries_total{labels}'], 2)
+        self.assertEqual(samples[f'graphql_response_size_bytes_total{labels}'], 2 * len(first.content))
+
+    def test_errors(self):
+        """Errors are counted by root field"""
+        self.query('query Broken { car(id: "TWFrZU5vZGU6MQ==") { owner } allMake { edges { node { name } } } }',
+                   op_name='Broken')
+
+        samples = self.scrape()
+        self.assertEqual(samples['graphql_resolver_errors_total{operation="Broken",field="car"}'], 1)
+
+    @override_settings(GRAPHQL_METRICS_EXTENSION=True)
+    def test_extension(self):
+        """The measures are added to the response on demand"""
+        response = self.query(ALL_MAKES, op_name='AllMakes', headers={'HTTP_X_GRAPHQL_METRICS': '1'})
+        metrics = json.loads(response.content)['extensions']['metrics']
+        self.assertEqual(metrics['operation'], 'AllMakes')
+        self.assertGreaterEqual(metrics['sqlQueries'], 1)
+
+        response = self.query(ALL_MAKES, op_name='AllMakes')
+        self.assertNotIn('metrics', json.loads(response.content)['extensions'])
+
+    @override_settings(METRICS_MAX_OPERATIONS=1)
+    def test_operation_limit(self):
+        """Operations past the first METRICS_MAX_OPERATIONS names are reported as other"""
+        self.query(ALL_MAKES, op_name='AllMakes')
+        self.query(ALL_MAKES.replace('AllMakes', 'Makes'), op_name='Makes')
+
+        samples = self.scrape()
+        self.assertEqual(samples['graphql_requests_total{operation="AllMakes"}'], 1)
+        self.assertEqual(samples['graphql_requests_total{operation="other"}'], 1)
+        self.assertNotIn('graphql_requests_total{operation="Makes"}', samples)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Nothing is recorded nor exposed when the metrics are disabled"""
+        self.query(ALL_MAKES, op_name='AllMakes')
+
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+
+class MetricsStore_Test(SimpleTestCase):
+    def test_processes(self):
+        """The increments of every process are added up"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.sqlite3')
+            store = MetricsStore(path)
+            store.increment([('graphql_requests_total', 'operation="AllMakes"', 1)])
+
+            context = multiprocessing.get_context('fork')
+            processes = [context.Process(target=increment_in_process, args=(path, )) for _ in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+            self.assertEqual(store.collect(), [('graphql_requests_total', 'operation="AllMakes"', 4.0)])
+
+    @override_settings(METRICS_FLUSH_INTERVAL=3600)
+    def test_buffering(self):
+        """Samples are buffered until the next flush, which a scrape triggers"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.sqlite3')
+            store = MetricsStore(path)
+            store.add([('graphql_requests_total', 'operation="AllMakes"', 1)])
+            store.add([('graphql_requests_total', 'operation="AllMakes"', 1)])
+
+            self.assertEqual(MetricsStore(path).collect(), [])
+            self.assertEqual(store.collect(), [('graphql_requests_total', 'operation="AllMakes"', 2.0)])
+
+    @override_settings(METRICS_FLUSH_INTERVAL=0)
+    def test_failed_flush(self):
+        """Samples that could not be written are kept for the next request, which writes them"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.sqlite3')
+            store = MetricsStore(path)
+            with mock.patch.object(store, 'increment', side_effect=sqlite3.OperationalError('database is locked')):
+                with self.assertRaises(sqlite3.OperationalError):
+                    store.add([('graphql_requests_total', 'operation="AllMakes"', 1)])
+
+            store.add([('graphql_requests_total', 'operation="AllMakes"', 1)])
+            self.assertEqual(MetricsStore(path).collect(), [('graphql_requests_total', 'operation="AllMakes"', 2.0)])
+
+    @override_settings(METRICS_MAX_OPERATIONS=2)
+    def test_operations_registered_by_every_process(self):
+        """The names registered by any process count towards the limit, and are only read once it is reached"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.sqlite3')
+            store = MetricsStore(path)
+            self.assertTrue(store.register_operation('AllMakes'))
+
+            other = MetricsStore(path)
+            self.assertTrue(other.register_operation('AllCars'))
+            self.assertFalse(other.register_operation('AllTrims'))
+            self.assertTrue(other.operations_full)
+
+            self.assertTrue(store.register_operation('AllCars'))
+            self.assertFalse(store.register_operation('AllTrims'))
+            self.assertTrue(store.register_operation('AllMakes'))
+
+    def test_exposition(self):
+        """Samples are grouped in families with their type"""
+        text = exposition([
+            ('graphql_request_duration_seconds_bucket', 'operation="A",le="+Inf"', 1.0),
+            ('graphql_request_duration_seconds_count', 'operation="A"', 1.0),
+            ('graphql_requests_total', 'operation="A"', 1.0),
+        ])
+
+        self.assertIn('# TYPE graphql_request_duration_seconds histogram\n', text)
+        self.assertIn('graphql_request_duration_seconds_bucket{operation="A",le="+Inf"} 1.0\n', text)
+        self.assertIn('# TYPE graphql_requests_total counter\n', text)
+
+    def test_operation_label(self):
+        """Operation names are only used as labels when they are plain names"""
+        self.assertEqual(operation_label('AllMakes'), 'AllMakes')
+        self.assertEqual(operation_label(None), 'anonymous')
+        self.assertEqual(operation_label('"} 1\nfake_metric{'), 'invalid')
@@ -17,11 +17,12 @@ from .factories import (
     ModelWithForeignFactory,
     TrimFactory,
 )
+from .queries import QueryCountMixin
 
 faker = Factory.create()
 
 
-class Model_Test(GraphQLTestCase):
+class Model_Test(QueryCountMixin, GraphQLTestCase):
     def setUp(self):
         self.GRAPHQL_URL = "/graphql"
         ModelFactory.create_batch(size=3)
@@ -63,7 +64,8 @@ class Model_Test(GraphQLTestCase):
         Create 3 objects, fetch all using allModel query and check that the 3 objects are returned following
         Relay standards.
         """
-        response = self.query(
+        response = self.assertMaxQueries(
+            1, self.query,
             """
             query {
                 allModel{
@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase, override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.models import Car
+from cars.n_plus_one import QueryDetector, RepeatedQueriesError, normalize_sql
+
+from .factories import CarFactory
+
+TOTAL_COUNTS = '''
+    query {
+        red: allCar(color: "RED") { totalCount }
+        alsoRed: allCar(color: "RED") { totalCount }
+    }
+    '''
+
+
+class NPlusOne_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        CarFactory.create_batch(size=3)
+
+    def test_detector(self):
+        """Statements run from the same place are counted under the same fingerprint"""
+        with QueryDetector(threshold=2) as detector:
+            for car in Car.objects.all():
+                car.trim
+
+        [((alias, sql, site), count)] = detector.repeated()
+        self.assertEqual(count, 3)
+        self.assertEqual(alias, 'default')
+        self.assertIn('FROM "trim"', sql)
+        self.assertIn('cars/tests/n_plus_one_test.py', site)
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=1)
+    def test_raised(self):
+        """Repeated statements make the operation fail in the tests"""
+        with self.assertRaisesMessage(RepeatedQueriesError, 'resolve_total_count'):
+            self.query(TOTAL_COUNTS)
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=1, N_PLUS_ONE_RAISE=False)
+    def test_logged(self):
+        """Repeated statements are logged otherwise"""
+        with self.assertLogs('cars.n_plus_one', 'WARNING') as logs:
+            response = self.query(TOTAL_COUNTS)
+
+        self.assertResponseNoErrors(response)
+        self.assertIn('2 times on default', logs.output[0])
+
+    def test_below_threshold(self):
+        """Statements repeated up to the threshold are fine"""
+        self.assertResponseNoErrors(self.query(TOTAL_COUNTS))
+
+
+class NormalizeSql_Test(SimpleTestCase):
+    def test_normalize_sql(self):
+        """Literals, parameters and lists of parameters are normalized"""
+        self.assertEqual(
+            normalize_sql('SELECT  "car"."id" FROM "car"\nWHERE "car"."owner" = \'Ann\' AND "car"."year" > 2000 '
+                          'AND "car"."trim_id" IN (%s, %s, %s) LIMIT %s'),
+            'SELECT "car"."id" FROM "car" WHERE "car"."owner" = ? AND "car"."year" > ? AND "car"."trim_id" IN (...) '
+            'LIMIT ?',
+        )
@@ -0,0 +1,73 @@
+import json
+
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import to_global_id
+
+from .factories import CarFactory, MakeFactory
+
+NODES_QUERY = """
+    query($ids: [ID!]!) {
+        nodes(ids: $ids) {
+            id
+            ... on MakeNode {
+                name
+            }
+            ... on CarNode {
+                owner
+                trim {
+                    name
+                }
+            }
+        }
+    }
+    """
+
+
+class Nodes_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        self.cars = CarFactory.create_batch(size=3)
+        self.makes = MakeFactory.create_batch(size=2)
+
+    def nodes(self, ids):
+        response = self.query(NODES_QUERY, variables={'ids': ids})
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']['nodes']
+
+    def test_nodes_in_requested_order(self):
+        """Nodes of different types are returned in the order of their IDs"""
+        ids = [
+            to_global_id('CarNode', self.cars[2].pk),
+            to_global_id('MakeNode', self.makes[0].pk),
+            to_global_id('CarNode', self.cars[0].pk),
+        ]
+
+        nodes = self.nodes(ids)
+
+        self.assertEqual([node['id'] for node in nodes], ids)
+        self.assertEqual(nodes[0]['owner'], self.cars[2].owner)
+        self.assertEqual(nodes[0]['trim']['name'], self.cars[2].trim.name)
+        self.assertEqual(nodes[1]['name'], self.makes[0].name)
+
+    def test_one_query_per_type(self):
+        """Every type is fetched with a single query whatever the number of IDs"""
+        ids = [to_global_id('CarNode', car.pk) for car in self.cars]
+        ids += [to_global_id('MakeNode', make.pk) for make in self.makes]
+
+        with self.assertNumQueries(2):
+            self.nodes(ids)
+
+    def test_missing_and_invalid_ids(self):
+        """Unknown, malformed and mistyped IDs resolve to null"""
+        ids = [
+            to_global_id('CarNode', 0),
+            'not-a-global-id',
+            to_global_id('UnknownNode', self.cars[0].pk),
+            to_global_id('CarNode', 'abc'),
+            to_global_id('MakeNode', self.makes[1].pk),
+        ]
+
+        nodes = self.nodes(ids)
+
+        self.assertEqual(nodes[:4], [None, None, None, None])
+        self.assertEqual(nodes[4]['name'], self.makes[1].name)
@@ -0,0 +1,126 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.models import Car
+
+from .factories import CarFactory
+
+
+class Optimizer_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        CarFactory.create_batch(size=10)
+
+    def test_forward_relations_are_joined(self):
+        """
+        Fetch every car with its trim, model and make and check that they are joined into the page query, which
+        only selects the requested columns.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(
+                """
+                query {
+                    allCar{
+                        edges{
+                            node{
+                                id
+                                trim{
+                                    name
+                                    model{
+                                        name
+                                        make{
+                                            name
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+                """
+            )
+        self.assertResponseNoErrors(response)
+        self.assertEquals(len(queries), 1)
+        self.assertNotIn('owner', queries[0]['sql'])
+        content = json.loads(response.content)
+        car_list = content['data']['allCar']['edges']
+        for edge, car in zip(car_list, Car.objects.all()):
+            self.assertEquals(edge['node']['trim']['model']['make']['name'], car.trim.model.make.name)
+
+    def test_reverse_connections_are_prefetched(self):
+        """
+        Fetch every make down to its cars and check that each connection level is prefetched with a single query.
+        """
+        with self.assertNumQueries(4):
+            response = self.query(
+                """
+                query {
+                    allMake(first: 10){
+                        edges{
+                            node{
+                                models(first: 10){
+                                    edges{
+                                        node{
+                                            trims(first: 10){
+                                                edges{
+                                                    node{
+                                                        cars(first: 10){
+                                                            edges{
+                                                                node{
+                                                                    id
+                                                                }
+                                                            }
+                                                        }
+                                                    }
+                                                }
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+                """
+            )
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        car_count = 0
+        for make in content['data']['allMake']['edges']:
+            for model in make['node']['models']['edges']:
+                for trim in model['node']['trims']['edges']:
+                    car_count += len(trim['node']['cars']['edges'])
+        self.assertEquals(car_count, Car.objects.count())
+
+    def test_fragments_are_followed(self):
+        """
+        Select the relations through named and inline fragments and check that they are still joined.
+        """
+        with self.assertNumQueries(1):
+            response = self.query(
+                """
+                query {
+                    allCar{
+                        edges{
+                            node{
+                                ...CarFields
+                            }
+                        }
+                    }
+                }
+                fragment CarFields on CarNode {
+                    year
+                    trim{
+                        ... on TrimNode {
+                            model{
+                                name
+                            }
+                        }
+                    }
+                }
+                """
+            )
+        self.assertResponseNoErrors(response)
@@ -0,0 +1,121 @@
+import json
+
+from django.test import SimpleTestCase
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.backend import PersistedDocumentBackend, document_hash
+from project.schema import schema
+
+from .factories import MakeFactory
+
+MAKE_QUERY = """
+    query {
+        allMake{
+            edges{
+                node{
+                    name
+                }
+            }
+        }
+    }
+    """
+
+
+class PersistedQuery_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        MakeFactory.create_batch(size=3)
+
+    def persisted_query(self, query=None, query_hash=None, method='post'):
+        extensions = {'persistedQuery': {'version': 1, 'sha256Hash': query_hash or document_hash(query)}}
+        if method == 'get':
+            params = {'extensions': json.dumps(extensions)}
+            if query is not None:
+                params['query'] = query
+            return self.client.get(self.GRAPHQL_URL, params, HTTP_ACCEPT='application/json')
+
+        body = {'extensions': extensions}
+        if query is not None:
+            body['query'] = query
+        return self.client.post(self.GRAPHQL_URL, json.dumps(body), content_type='application/json')
+
+    def test_unknown_hash(self):
+        """
+        Send the hash of a query that was never registered and check that the client is asked for the query.
+        """
+        response = self.persisted_query(query_hash=document_hash('query { unknown }'))
+        content = json.loads(response.content)
+        self.assertEquals(content['errors'][0]['message'], 'PersistedQueryNotFound')
+
+    def test_register_and_reuse(self):
+        """
+        Register a query along with its hash, then send the hash alone over POST and GET and check that the query
+        is executed.
+        """
+        response = self.persisted_query(query=MAKE_QUERY)
+        self.assertResponseNoErrors(response)
+        expected = json.loads(response.content)['data']
+
+        for method in ('post', 'get'):
+            response = self.persisted_query(query_hash=document_hash(MAKE_QUERY), method=method)
+            self.assertResponseNoErrors(response)
+            self.assertEquals(json.loads(response.content)['data'], expected)
+            self.assertEquals(len(expected['allMake']['edges']), 3)
+
+    def test_hash_mismatch(self):
+        """
+        Send a query along with the hash of another one and check that it is rejected.
+        """
+        response = self.persisted_query(query=MAKE_QUERY, query_hash=document_hash('query { allCar { totalCount } }'))
+        self.assertEquals(response.status_code, 400)
+
+    def test_malformed_extensions(self):
+        """
+        Send extensions that are valid JSON but not the expected objects and check that they are rejected.
+        """
+        for extensions in ([1], {'persistedQuery': 1}, {'persistedQuery': {'sha256Hash': ['a']}}):
+            for method in ('post', 'get'):
+                if method == 'get':
+                    response = self.client.get(self.GRAPHQL_URL, {'extensions': json.dumps(extensions)},
+                                               HTTP_ACCEPT='application/json')
+                else:
+                    response = self.client.post(self.GRAPHQL_URL, json.dumps({'extensions': extensions}),
+                                                content_type='application/json')
+                self.assertEquals(response.status_code, 400)
+
+
+class PersistedDocumentBackend_Test(SimpleTestCase):
+    def test_documents_are_cached(self):
+        """
+        Build the same document twice and check that the cached document is returned.
+        """
+        backend = PersistedDocumentBackend(max_size=2)
+        document = backend.document_from_string(schema, MAKE_QUERY)
+        self.assertIs(backend.document_from_string(schema, MAKE_QUERY), document)
+        self.assertIs(backend.get(document_hash(MAKE_QUERY)), document)
+
+    def test_least_recently_used_documents_are_evicted(self):
+        """
+        Build more documents than the cache holds and check that the least recently used one is evicted.
+        """
+        backend = PersistedDocumentBackend(max_size=2)
+        queries = ['query { allMake { totalCount } }', 'query { allModel { totalCount } }',
+                   'query { allTrim { totalCount } }']
+        backend.document_from_string(schema, queries[0])
+        backend.document_from_string(schema, queries[1])
+        backend.get(document_hash(queries[0]))
+        backend.document_from_string(schema, queries[2])
+
+        self.assertIsNotNone(backend.get(document_hash(queries[0])))
+        self.assertIsNone(backend.get(document_hash(queries[1])))
+        self.assertIsNotNone(backend.get(document_hash(queries[2])))
+
+    def test_invalid_documents_are_not_cached(self):
+        """
+        Build a document that does not validate and check that it reports the errors without being cached.
+        """
+        backend = PersistedDocumentBackend()
+        document = backend.document_from_string(schema, 'query { unknown }')
+        result = document.execute()
+        self.assertTrue(result.invalid)
+        self.assertIsNone(backend.get(document_hash('query { unknown }')))
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from cars.n_plus_one import QueryDetector
+
+
+class QueryCountMixin(object):
+    """
+    Query count assertions for `GraphQLTestCase`, pinning the maximum number
+    of SQL queries of a query shape so that a relation resolved row by row
+    makes the test fail with the repeated statements.
+    """
+
+    def assertMaxQueries(self, maximum, func=None, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        """
+        Fails when more than `maximum` queries are executed within the block
+        or, as `assertNumQueries`, by `func(*args, **kwargs)`, whose result is
+        returned.
+        """
+        context = self.capture_max_queries(maximum, using)
+        if func is None:
+            return context
+        with context:
+            return func(*args, **kwargs)
+
+    @contextmanager
+    def capture_max_queries(self, maximum, using):
+        detector = QueryDetector(threshold=1)
+        with CaptureQueriesContext(connections[using]) as queries, detector:
+            yield queries
+
+        if len(queries) > maximum:
+            details = '\n'.join(f'{index}. {query["sql"]}' for index, query in enumerate(queries, start=1))
+            repeated = detector.describe()
+            if repeated:
+                details += f'\nRepeated:\n{repeated}'
+            self.fail(f'{len(queries)} queries executed, at most {maximum} expected:\n{details}')
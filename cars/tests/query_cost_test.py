@@ -0,0 +1,106 @@
+import json
+
+from django.test import override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql.utils.introspection_query import introspection_query
+
+from .factories import MakeFactory
+
+NESTED_QUERY = """
+    query($first: Int) {
+        allMake(first: $first){
+            edges{
+                node{
+                    models(first: $first){
+                        edges{
+                            node{
+                                trims(first: $first){
+                                    edges{
+                                        node{
+                                            cars(first: $first){
+                                                edges{
+                                                    node{
+                                                        id
+                                                    }
+                                                }
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+    """
+
+
+class QueryCost_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        MakeFactory.create_batch(size=3)
+
+    def test_cost_is_reported(self):
+        """
+        Run a simple query and check that its estimated cost and depth are reported in the extensions.
+        """
+        response = self.query(
+            """
+            query {
+                allMake(first: 10){
+                    edges{
+                        node{
+                            id
+                            name
+                        }
+                    }
+                }
+            }
+            """
+        )
+        self.assertResponseNoErrors(response)
+        cost = json.loads(response.content)['extensions']['cost']
+        self.assertEquals(cost['requestedQueryCost'], 1 + 10 * 4)
+        self.assertEquals(cost['depth'], 2)
+
+    def test_expensive_operation_is_rejected(self):
+        """
+        Nest four connections of 100 nodes and check that the operation is rejected without being executed.
+        """
+        response = self.query(NESTED_QUERY, variables={'first': 100})
+        self.assertEquals(response.status_code, 400)
+        content = json.loads(response.content)
+        self.assertNotIn('data', content)
+        self.assertIn('estimated cost', content['errors'][0]['message'])
+
+    def test_variables_are_used(self):
+        """
+        Run the same nested operation with small pages and check that it is accepted.
+        """
+        response = self.query(NESTED_QUERY, variables={'first': 5})
+        self.assertResponseNoErrors(response)
+        cost = json.loads(response.content)['extensions']['cost']
+        self.assertEquals(cost['depth'], 5)
+
+    @override_settings(GRAPHQL_MAX_QUERY_DEPTH=3)
+    def test_deep_operation_is_rejected(self):
+        """
+        Lower the maximum depth and check that a deeper operation is rejected.
+        """
+        response = self.query(NESTED_QUERY, variables={'first': 1})
+        self.assertEquals(response.status_code, 400)
+        content = json.loads(response.content)
+        self.assertIn('depth of 5', content['errors'][0]['message'])
+
+    def test_introspection_is_free(self):
+        """
+        Run the standard introspection query, used by GraphiQL and client generators, and check that it is
+        neither rejected nor counted.
+        """
+        response = self.query(introspection_query)
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        self.assertIn('__schema', content['data'])
+        self.assertEquals(content['extensions']['cost']['requestedQueryCost'], 0)
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import include, path
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import to_global_id
+
+from cars.models import Car, Make
+from cars.replicas import (
+    STICKINESS_COOKIE,
+    ReplicaRouter,
+    ReplicaStickinessMiddleware,
+    reading_from,
+)
+
+from .factories import CarFactory, MakeFactory
+
+
+async def slow_view(request):
+    await asyncio.sleep(0.5)
+    return HttpResponse(ReplicaRouter().db_for_read(Car))
+
+
+urlpatterns = [
+    path('slow', slow_view),
+    path('', include('project.urls')),
+]
+
+
+@override_settings(REPLICA_DATABASES=['replica0', 'replica1'], REPLICA_STICKINESS_SECONDS=5)
+class ReplicaRouter_Test(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        """Returns the database the reads of `request` are routed to, and the response."""
+        databases = []
+
+        def view(request):
+            databases.append(self.router.db_for_read(Car))
+            return HttpResponse()
+
+        response = ReplicaStickinessMiddleware(view)(request)
+        return databases[0], response
+
+    def test_routing(self):
+        """Reads go to the replica picked for the request, and writes to the primary"""
+        with reading_from('replica1'):
+            self.assertEqual(self.router.db_for_read(Car), 'replica1')
+        self.assertEqual(self.router.db_for_write(Car), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'cars'))
+        self.assertFalse(self.router.allow_migrate('replica0', 'cars'))
+
+    def test_outside_requests(self):
+        """Reads made outside of a request, e.g. by the deletion jobs or the importer, go to the primary"""
+        self.assertEqual(self.router.db_for_read(Car), 'default')
+
+        with reading_from(None):
+            self.assertEqual(self.router.db_for_read(Car), 'default')
+
+    def test_instance_hint(self):
+        """Related objects are read from the database of their instance"""
+        car = Car()
+        car._state.db = 'replica1'
+
+        self.assertEqual(self.router.db_for_read(Make, instance=car), 'replica1')
+
+    def test_stickiness(self):
+        """Clients read from the primary until their stickiness cookie expires"""
+        database, response = self.route(self.factory.get('/graphql'))
+        self.assertIn(database, ['replica0', 'replica1'])
+        self.assertNotIn(STICKINESS_COOKIE, response.cookies)
+
+        request = self.factory.get('/graphql')
+        request.COOKIES[STICKINESS_COOKIE] = str(time.time() + 5)
+        self.assertEqual(self.route(request)[0], 'default')
+
+        request = self.factory.get('/graphql')
+        request.COOKIES[STICKINESS_COOKIE] = str(time.time() - 1)
+        self.assertIn(self.route(request)[0], ['replica0', 'replica1'])
+
+    def test_admin(self):
+        """The admin reads from the primary"""
+        database, response = self.route(self.factory.get('/admin/cars/car/'))
+
+        self.assertEqual(database, 'default')
+
+
+@override_settings(ROOT_URLCONF=__name__, REPLICA_DATABASES=['replica0'])
+class AsyncStickiness_Test(SimpleTestCase):
+    async def test_concurrent_requests(self):
+        """Under ASGI the middleware runs async, so that concurrent requests to async views are not serialized"""
+        client = AsyncClient()
+
+        started = time.monotonic()
+        responses = await asyncio.gather(*(client.get('/slow') for _ in range(4)))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([response.content for response in responses], [b'replica0'] * 4)
+        self.assertLess(elapsed, 1.5)
+
+    async def test_sticky_client(self):
+        """Sticky clients read from the primary under ASGI too"""
+        client = AsyncClient()
+        client.cookies[STICKINESS_COOKIE] = str(time.time() + 5)
+
+        response = await client.get('/slow')
+
+        self.assertEqual(response.content, b'default')
+
+
+class Stickiness_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        self.make = MakeFactory(name='Audi')
+
+    def test_mutation_sets_cookie(self):
+        """A mutation reads from the primary and makes the client read from it for a while"""
+        with mock.patch('cars.views.reading_from', wraps=reading_from) as routed:
+            response = self.query(
+                'mutation($input: UpdateMakeInput!) { updateMake(input: $input) { make { name } } }',
+                input_data={'id': to_global_id('MakeNode', self.make.pk), 'data': {'name': 'BMW'}},
+            )
+        self.assertResponseNoErrors(response)
+
+        routed.assert_called_once_with('default')
+        self.assertGreater(float(response.cookies[STICKINESS_COOKIE].value), time.time())
+
+    def test_query_does_not_set_cookie(self):
+        """Queries do not make the client sticky"""
+        response = self.query('{ allMake { edges { node { name } } } }')
+        self.assertResponseNoErrors(response)
+
+        self.assertNotIn(STICKINESS_COOKIE, response.cookies)
+
+
+class SnapshotReplicas_Test(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.target = os.path.join(self.directory.name, 'replica.sqlite3')
+
+    def count_cars(self):
+        replica = sqlite3.connect(self.target)
+        try:
+            return replica.execute('SELECT COUNT(*) FROM car').fetchone()[0]
+        finally:
+            replica.close()
+
+    def test_snapshot(self):
+        """Every snapshot replaces the content of the replica with the one of the primary"""
+        CarFactory()
+        call_command('snapshot_replicas', self.target, stdout=StringIO())
+        self.assertEqual(self.count_cars(), 1)
+
+        CarFactory()
+        call_command('snapshot_replicas', self.target, stdout=StringIO())
+        self.assertEqual(self.count_cars(), 2)
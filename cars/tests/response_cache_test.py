@@ -0,0 +1,154 @@
+import json
+
+from django.core.cache import caches
+from django.test import override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql import parse
+from graphql_relay import to_global_id
+
+from cars.models import Make, Model
+from cars.response_cache import bump_versions, get_versions, operation_tables
+from project.schema import schema
+
+from .factories import CarFactory, MakeFactory
+
+MAKE_QUERY = """
+    query {
+        allMake{
+            edges{
+                node{
+                    name
+                }
+            }
+        }
+    }
+    """
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'graphql': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-test'},
+})
+class ResponseCache_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        caches['graphql'].clear()
+        self.make = MakeFactory(name='Audi')
+
+    def make_names(self, response):
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        return [edge['node']['name'] for edge in content['data']['allMake']['edges']]
+
+    def test_catalog_query_is_served_from_cache(self):
+        """Repeating a catalog query does not query the database again"""
+        self.assertEqual(self.make_names(self.query(MAKE_QUERY)), ['Audi'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.make_names(self.query(MAKE_QUERY)), ['Audi'])
+
+    def test_mutation_invalidates_cached_responses(self):
+        """Writing through a mutation makes the next query see the change"""
+        self.make_names(self.query(MAKE_QUERY))
+
+        # The versions are bumped once the mutation commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.query(
+                """
+                mutation($input: UpdateMakeInput!){
+                    updateMake(input: $input) {
+                        make { name }
+                    }
+                }
+                """,
+                input_data={'id': to_global_id('MakeNode', self.make.pk), 'data': {'name': 'BMW'}}
+            )
+        self.assertResponseNoErrors(response)
+
+        self.assertEqual(self.make_names(self.query(MAKE_QUERY)), ['BMW'])
+
+    def test_direct_write_is_invalidated_by_bump(self):
+        """Writes outside the mutations are seen once the versions are bumped"""
+        self.make_names(self.query(MAKE_QUERY))
+
+        Make.objects.filter(pk=self.make.pk).update(name='BMW')
+        self.assertEqual(self.make_names(self.query(MAKE_QUERY)), ['Audi'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_versions(Make)
+        self.assertEqual(self.make_names(self.query(MAKE_QUERY)), ['BMW'])
+
+    def test_car_query_is_not_cached(self):
+        """Queries reading from the cars table always hit the database"""
+        CarFactory()
+        query = """
+            query {
+                allCar{
+                    edges{
+                        node{
+                            owner
+                        }
+                    }
+                }
+            }
+            """
+        self.assertResponseNoErrors(self.query(query))
+
+        with self.assertNumQueries(1):
+            self.assertResponseNoErrors(self.query(query))
+
+    def test_aggregate_query_is_not_cached(self):
+        """Root fields not backed by a model are never cached"""
+        query = """
+            query {
+                carStats(groupBy: [MAKE]) {
+                    make { name }
+                    count
+                }
+            }
+            """
+        counts = []
+        for _ in range(2):
+            CarFactory()
+            response = self.query(query)
+            self.assertResponseNoErrors(response)
+            counts.append(sum(bucket['count'] for bucket in json.loads(response.content)['data']['carStats']))
+
+        self.assertEqual(counts, [1, 2])
+
+    def test_bump_versions(self):
+        """Versions are read from the cache and replaced once the bumping transaction commits"""
+        tables = [Make._meta.db_table, Model._meta.db_table]
+        versions = get_versions(tables)
+        self.assertEqual(get_versions(tables), versions)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_versions(Make)
+        self.assertEqual(get_versions(tables), versions)
+
+        callbacks[0]()
+        bumped = get_versions(tables)
+        self.assertNotEqual(bumped[Make._meta.db_table], versions[Make._meta.db_table])
+        self.assertEqual(bumped[Model._meta.db_table], versions[Model._meta.db_table])
+
+    def test_operation_tables(self):
+        """The tables read by an operation follow its fragments and nested fields"""
+        document = parse("""
+            query Models {
+                allModel{
+                    edges{
+                        node{
+                            ...ModelFields
+                        }
+                    }
+                }
+            }
+            fragment ModelFields on ModelNode {
+                make { name }
+                trims { edges { node { name } } }
+            }
+            mutation Delete { deleteMake(input: {id: "x"}) { ok } }
+            """)
+
+        self.assertEqual(operation_tables(schema, document, 'Models'), {'make', 'model', 'trim'})
+        self.assertIsNone(operation_tables(schema, document, 'Delete'))
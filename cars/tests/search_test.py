@@ -0,0 +1,91 @@
+import json
+
+from graphene_django.utils.testing import GraphQLTestCase
+
+from cars.search import match_expression
+
+from .factories import CarFactory, MakeFactory, ModelFactory, TrimFactory
+
+SEARCH_QUERY = """
+    query($query: String!, $first: Int, $after: String) {
+        searchCars(query: $query, first: $first, after: $after) {
+            totalCount
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+            edges {
+                node {
+                    owner
+                }
+            }
+        }
+    }
+    """
+
+
+class SearchCars_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        audi = MakeFactory(name='Audi')
+        bmw = MakeFactory(name='BMW')
+        a4 = TrimFactory(model=ModelFactory(make=audi, name='A4'), name='Quattro')
+        x5 = TrimFactory(model=ModelFactory(make=bmw, name='X5'), name='xDrive')
+        CarFactory(trim=a4, owner='John Smith')
+        CarFactory(trim=x5, owner='Jane Smithers')
+        CarFactory(trim=x5, owner='Smith Smith')
+        CarFactory(trim=a4, owner='Eve Jones')
+
+    def search(self, query, **variables):
+        response = self.query(SEARCH_QUERY, variables={'query': query, **variables})
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']['searchCars']
+
+    def owners(self, connection):
+        return [edge['node']['owner'] for edge in connection['edges']]
+
+    def test_search_by_owner_prefix(self):
+        """Owners are matched by word prefix and ranked by relevance"""
+        connection = self.search('smith')
+
+        self.assertEqual(connection['totalCount'], 3)
+        self.assertEqual(self.owners(connection)[0], 'Smith Smith')
+        self.assertEqual(set(self.owners(connection)), {'John Smith', 'Jane Smithers', 'Smith Smith'})
+
+    def test_search_by_catalog_names(self):
+        """Make, model and trim names are searched along with the owner"""
+        self.assertEqual(set(self.owners(self.search('audi'))), {'John Smith', 'Eve Jones'})
+        self.assertEqual(self.owners(self.search('bmw jane')), ['Jane Smithers'])
+        self.assertEqual(self.owners(self.search('quattro eve')), ['Eve Jones'])
+
+    def test_index_follows_renames(self):
+        """Renaming a make reindexes the cars of that make"""
+        make = MakeFactory(name='Skoda')
+        CarFactory(trim=TrimFactory(model=ModelFactory(make=make)), owner='Ann')
+        make.name = 'Tatra'
+        make.save()
+
+        self.assertEqual(self.owners(self.search('tatra')), ['Ann'])
+        self.assertEqual(self.owners(self.search('skoda')), [])
+
+    def test_pagination(self):
+        """Pages follow each other through the cursors without overlapping"""
+        first_page = self.search('smith', first=2)
+        self.assertTrue(first_page['pageInfo']['hasNextPage'])
+
+        second_page = self.search('smith', first=2, after=first_page['pageInfo']['endCursor'])
+        self.assertFalse(second_page['pageInfo']['hasNextPage'])
+
+        owners = self.owners(first_page) + self.owners(second_page)
+        self.assertEqual(sorted(owners), ['Jane Smithers', 'John Smith', 'Smith Smith'])
+
+    def test_invalid_cursor(self):
+        """An invalid cursor is reported as an error"""
+        response = self.query(SEARCH_QUERY, variables={'query': 'smith', 'after': 'invalid'})
+        self.assertResponseHasErrors(response)
+
+    def test_match_expression(self):
+        """FTS syntax in the query text is neutralized"""
+        self.assertEqual(match_expression('john "smi'), '"john"* "smi"*')
+        self.assertEqual(match_expression('  -*  '), '')
+        self.assertEqual(self.search('-*')['edges'], [])
@@ -0,0 +1,156 @@
+import json
+import os
+import tempfile
+from importlib import import_module
+from unittest import mock
+
+from django.db import OperationalError, connection, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from graphql.execution import ExecutionResult
+
+from cars.models import Make
+from cars.retry import backoff_delays, execute_with_retries
+from cars.transactions import atomic
+from project.sqlite.base import DatabaseWrapper
+
+wal_journal = import_module('cars.migrations.0013_wal_journal')
+
+
+class SQLiteBackend_Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.name = os.path.join(self.directory.name, 'db.sqlite3')
+
+    def wrapper(self, **pragmas):
+        settings_dict = dict(connection.settings_dict, NAME=self.name)
+        settings_dict['OPTIONS'] = {'pragmas': dict(connection.settings_dict['OPTIONS']['pragmas'], **pragmas)}
+        wrapper = DatabaseWrapper(settings_dict)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """Every connection is opened with the configured pragmas"""
+        wrapper = self.wrapper()
+
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 5000)
+
+    def test_wal_journal(self):
+        """The migration switches the database file to the WAL journal, which the next connections keep"""
+        wrapper = self.wrapper()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+        with wrapper.schema_editor(atomic=False) as editor:
+            wal_journal.set_journal_mode('WAL')(None, editor)
+        wrapper.close()
+
+        self.assertEqual(self.pragma(self.wrapper(), 'journal_mode'), 'wal')
+
+    def test_begin_immediate(self):
+        """Immediate transactions take the write lock as soon as they start, the others only when they write"""
+        writer = self.wrapper()
+        other = self.wrapper(busy_timeout=0)
+        writer.ensure_connection()
+        other.ensure_connection()
+
+        writer.begin_immediate = True
+        writer._start_transaction_under_autocommit()
+        try:
+            other._start_transaction_under_autocommit()
+            other.connection.rollback()
+
+            other.begin_immediate = True
+            with self.assertRaisesRegex(OperationalError, 'locked'):
+                other._start_transaction_under_autocommit()
+        finally:
+            writer.connection.rollback()
+
+        other._start_transaction_under_autocommit()
+        other.connection.rollback()
+
+
+class Transactions_Test(TransactionTestCase):
+    def begin_statements(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('BEGIN')]
+
+    def test_atomic(self):
+        """Only the blocks declared as writing open their transaction with BEGIN IMMEDIATE"""
+        with CaptureQueriesContext(connection) as queries:
+            with atomic(immediate=True):
+                Make.objects.create(name='Audi')
+            with atomic():
+                Make.objects.count()
+            with transaction.atomic():
+                Make.objects.count()
+
+        self.assertEqual(self.begin_statements(queries), ['BEGIN IMMEDIATE', 'BEGIN', 'BEGIN'])
+        self.assertFalse(connection.begin_immediate)
+
+    def test_mutations(self):
+        """Mutations open their transaction with BEGIN IMMEDIATE"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql', json.dumps({
+                'query': 'mutation { createMake(input: {data: {name: "Audi"}}) { make { id } } }'
+            }), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('errors', response.json())
+
+        self.assertEqual(self.begin_statements(queries), ['BEGIN IMMEDIATE'])
+
+
+@override_settings(DATABASE_LOCK_RETRIES=2, DATABASE_LOCK_RETRY_DELAY=0.01, DATABASE_LOCK_RETRY_MAX_DELAY=0.01)
+class LockRetry_Test(SimpleTestCase):
+    def locked(self):
+        return ExecutionResult(errors=[OperationalError('database is locked')], invalid=True)
+
+    def test_retries(self):
+        """Operations rejected because the database was locked are executed again"""
+        execute = mock.Mock(side_effect=[self.locked(), ExecutionResult(data={'ok': True})])
+
+        with mock.patch('cars.retry.time.sleep') as sleep:
+            result = execute_with_retries(execute)
+
+        self.assertEqual(result.data, {'ok': True})
+        self.assertEqual(execute.call_count, 2)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_gives_up(self):
+        """The lock error is returned once the retries are exhausted"""
+        execute = mock.Mock(side_effect=lambda: self.locked())
+
+        with mock.patch('cars.retry.time.sleep'):
+            result = execute_with_retries(execute)
+
+        self.assertTrue(result.invalid)
+        self.assertEqual(execute.call_count, 3)
+
+    def test_other_errors(self):
+        """Other errors are not retried"""
+        execute = mock.Mock(return_value=ExecutionResult(errors=[OperationalError('no such table: car')], invalid=True))
+
+        result = execute_with_retries(execute)
+
+        self.assertTrue(result.invalid)
+        self.assertEqual(execute.call_count, 1)
+
+    def test_backoff_delays(self):
+        """Delays double up to the maximum"""
+        delays = list(backoff_delays(5, 0.1, 0.5))
+
+        self.assertEqual(len(delays), 5)
+        for delay, bound in zip(delays, [0.1, 0.2, 0.4, 0.5, 0.5]):
+            self.assertTrue(bound / 2 <= delay <= bound)
@@ -0,0 +1,76 @@
+import json
+
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import to_global_id
+
+from .factories import CarFactory, MakeFactory, ModelFactory, TrimFactory
+
+STATS_QUERY = """
+    query($groupBy: [CarStatsGroupBy!]!, $filter: CarFilterInput) {
+        carStats(groupBy: $groupBy, filter: $filter) {
+            color
+            year
+            make {
+                name
+            }
+            model {
+                name
+            }
+            count
+            minYear
+            maxYear
+        }
+    }
+    """
+
+
+class CarStats_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        audi = MakeFactory(name='Audi')
+        bmw = MakeFactory(name='BMW')
+        self.a4 = TrimFactory(model=ModelFactory(make=audi, name='A4'))
+        self.x5 = TrimFactory(model=ModelFactory(make=bmw, name='X5'))
+        CarFactory(trim=self.a4, color='RED', year=2010)
+        CarFactory(trim=self.a4, color='RED', year=2014)
+        CarFactory(trim=self.a4, color='BLUE', year=2012)
+        CarFactory(trim=self.x5, color='RED', year=2020)
+
+    def stats(self, group_by, filter=None):
+        response = self.query(STATS_QUERY, variables={'groupBy': group_by, 'filter': filter})
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']['carStats']
+
+    def test_group_by_color(self):
+        """Cars are counted per color along with their year range"""
+        buckets = self.stats(['COLOR'])
+
+        self.assertEqual(
+            [(bucket['color'], bucket['count'], bucket['minYear'], bucket['maxYear']) for bucket in buckets],
+            [('BLUE', 1, 2012, 2012), ('RED', 3, 2010, 2020)]
+        )
+
+    def test_group_by_make_and_color(self):
+        """Catalog groups resolve to their nodes, batched into one query per type"""
+        with self.assertNumQueries(2):
+            buckets = self.stats(['MAKE', 'COLOR'])
+
+        self.assertEqual(
+            [(bucket['make']['name'], bucket['color'], bucket['count']) for bucket in buckets],
+            [('Audi', 'BLUE', 1), ('Audi', 'RED', 2), ('BMW', 'RED', 1)]
+        )
+        self.assertIsNone(buckets[0]['model'])
+
+    def test_filter(self):
+        """Stats use the allCar filters, including global IDs and catalog names"""
+        buckets = self.stats(['MODEL'], {'color': 'RED', 'makeName': 'Audi'})
+        self.assertEqual([(bucket['model']['name'], bucket['count']) for bucket in buckets], [('A4', 2)])
+
+        buckets = self.stats(['YEAR'], {'trim': to_global_id('TrimNode', self.x5.pk)})
+        self.assertEqual([(bucket['year'], bucket['count']) for bucket in buckets], [(2020, 1)])
+
+    def test_no_group(self):
+        """Without grouping a single bucket covers every matching car"""
+        buckets = self.stats([], {'color': 'RED'})
+        self.assertEqual(len(buckets), 1)
+        self.assertEqual((buckets[0]['count'], buckets[0]['minYear'], buckets[0]['maxYear']), (3, 2010, 2020))
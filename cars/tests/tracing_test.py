@@ -0,0 +1,63 @@
+import json
+
+from django.test import override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+
+from .factories import CarFactory
+
+ALL_CARS = '''
+    query {
+        allCar { edges { node { owner trim { name } } } }
+    }
+    '''
+
+
+@override_settings(GRAPHQL_TRACING_HEADER=True)
+class Tracing_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        CarFactory(owner='Ann')
+        CarFactory(owner='Bob')
+
+    def tracing(self, response):
+        return json.loads(response.content)['extensions'].get('tracing')
+
+    def test_header(self):
+        """The resolvers of the requests sending the header are traced"""
+        tracing = self.tracing(self.query(ALL_CARS, headers={'HTTP_X_GRAPHQL_TRACING': '1'}))
+
+        self.assertEqual(tracing['version'], 1)
+        self.assertGreater(tracing['duration'], 0)
+        self.assertIn('parsing', tracing)
+        self.assertIn('validation', tracing)
+        resolvers = {tuple(resolver['path']): resolver for resolver in tracing['execution']['resolvers']}
+        all_car = resolvers[('allCar', )]
+        self.assertEqual(all_car['parentType'], 'Query')
+        self.assertEqual(all_car['returnType'], 'CarNodeConnection')
+        trim = resolvers['allCar', 'edges', 1, 'node', 'trim']
+        self.assertEqual(trim['fieldName'], 'trim')
+        self.assertEqual(trim['parentType'], 'CarNode')
+        self.assertGreaterEqual(trim['startOffset'], all_car['startOffset'])
+        self.assertGreaterEqual(trim['duration'], 0)
+        self.assertIn(('allCar', 'edges', 1, 'node', 'trim', 'name'), resolvers)
+
+    def test_not_sampled(self):
+        """Other requests are not traced"""
+        self.assertIsNone(self.tracing(self.query(ALL_CARS)))
+
+    @override_settings(GRAPHQL_TRACING_SAMPLE_RATE=1)
+    def test_sample_rate(self):
+        """Requests are traced at the sample rate"""
+        self.assertIsNotNone(self.tracing(self.query(ALL_CARS)))
+
+    @override_settings(GRAPHQL_TRACING_HEADER=False)
+    def test_header_disabled(self):
+        """The header is ignored when disabled"""
+        self.assertIsNone(self.tracing(self.query(ALL_CARS, headers={'HTTP_X_GRAPHQL_TRACING': '1'})))
+
+    def test_errors(self):
+        """Failing resolvers are traced"""
+        response = self.query('{ car(id: "TWFrZU5vZGU6MQ==") { owner } }', headers={'HTTP_X_GRAPHQL_TRACING': '1'})
+
+        resolvers = self.tracing(response)['execution']['resolvers']
+        self.assertEqual([resolver['path'] for resolver in resolvers], [['car']])
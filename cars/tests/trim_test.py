@@ -17,11 +17,12 @@ from .factories import (
     TrimFactory,
     TrimWithForeignFactory,
 )
+from .queries import QueryCountMixin
 
 faker = Factory.create()
 
 
-class Trim_Test(GraphQLTestCase):
+class Trim_Test(QueryCountMixin, GraphQLTestCase):
     def setUp(self):
         self.GRAPHQL_URL = "/graphql"
         TrimFactory.create_batch(size=3)
@@ -63,7 +64,8 @@ class Trim_Test(GraphQLTestCase):
         Create 3 objects, fetch all using allTrim query and check that the 3 objects are returned following
         Relay standards.
         """
-        response = self.query(
+        response = self.assertMaxQueries(
+            1, self.query,
             """
             query {
                 allTrim{
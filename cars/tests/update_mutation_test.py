@@ -0,0 +1,105 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql_relay import to_global_id
+
+from cars.models import Car, CarSearch, Make
+
+from .factories import CarFactory, MakeFactory
+
+UPDATE_CAR = """
+    mutation($input: UpdateCarInput!) {
+        updateCar(input: $input) {
+            car { owner version }
+        }
+    }
+    """
+
+UPDATE_CAR_WITHOUT_CAR = """
+    mutation($input: UpdateCarInput!) {
+        updateCar(input: $input) {
+            clientMutationId
+        }
+    }
+    """
+
+UPDATE_MAKE = """
+    mutation($input: UpdateMakeInput!) {
+        updateMake(input: $input) {
+            make { name version }
+        }
+    }
+    """
+
+
+class UpdateMutation_Test(GraphQLTestCase):
+    def setUp(self):
+        self.GRAPHQL_URL = "/graphql"
+        self.car = CarFactory(owner='Ann', color='RED')
+        self.car_id = to_global_id('CarNode', self.car.pk)
+
+    def test_single_update_of_changed_fields(self):
+        """Only the given fields are written, by a single UPDATE"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(UPDATE_CAR, input_data={'id': self.car_id, 'data': {'owner': 'Bob'}})
+        self.assertResponseNoErrors(response)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "car"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"owner"', updates[0])
+        self.assertNotIn('"color"', updates[0])
+
+        car = json.loads(response.content)['data']['updateCar']['car']
+        self.assertEqual(car, {'owner': 'Bob', 'version': 1})
+        self.assertEqual(Car.objects.get(pk=self.car.pk).color, 'RED')
+        self.assertEqual(CarSearch.objects.get(car=self.car).owner, 'Bob')
+
+    def test_payload_fetched_only_when_selected(self):
+        """The updated car is not read back when the payload does not select it"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(UPDATE_CAR_WITHOUT_CAR, input_data={'id': self.car_id, 'data': {'year': 2001}})
+        self.assertResponseNoErrors(response)
+
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT "car"."id", "car"."owner"')]
+        # Only car_search is synchronized, with its own joined SELECT.
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(Car.objects.get(pk=self.car.pk).year, 2001)
+
+    def test_not_found(self):
+        """Updating a missing row is an error instead of creating it"""
+        response = self.query(UPDATE_CAR, input_data={'id': to_global_id('CarNode', 0), 'data': {'owner': 'Bob'}})
+
+        self.assertResponseHasErrors(response)
+        content = json.loads(response.content)
+        self.assertEqual(content['errors'][0]['message'], 'Car matching query does not exist.')
+        self.assertFalse(Car.objects.filter(pk=0).exists())
+
+    def test_expected_version(self):
+        """Updates carrying a stale version are rejected"""
+        make = MakeFactory(name='Audi')
+        make_id = to_global_id('MakeNode', make.pk)
+
+        response = self.query(UPDATE_MAKE, input_data={'id': make_id, 'expectedVersion': 0, 'data': {'name': 'BMW'}})
+        self.assertResponseNoErrors(response)
+        self.assertEqual(json.loads(response.content)['data']['updateMake']['make'], {'name': 'BMW', 'version': 1})
+
+        response = self.query(UPDATE_MAKE, input_data={'id': make_id, 'expectedVersion': 0, 'data': {'name': 'Kia'}})
+        self.assertResponseHasErrors(response)
+        content = json.loads(response.content)
+        self.assertEqual(content['errors'][0]['message'], 'Make has been modified since version 0.')
+        self.assertEqual(Make.objects.get(pk=make.pk).name, 'BMW')
+
+    def test_renamed_row_fetched_once(self):
+        """A renamed make is read once, both to reindex its cars and for the payload"""
+        make = MakeFactory(name='Audi')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(UPDATE_MAKE, input_data={'id': to_global_id('MakeNode', make.pk),
+                                                           'data': {'name': 'BMW'}})
+        self.assertResponseNoErrors(response)
+
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT "make"."id", "make"."name"')]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(json.loads(response.content)['data']['updateMake']['make'], {'name': 'BMW', 'version': 1})
@@ -0,0 +1,110 @@
+"""
+Resolver-level tracing of the GraphQL operations, reported in the Apollo
+tracing format (`extensions.tracing`).
+
+Only the sampled requests are traced: those sending the `X-GraphQL-Tracing`
+header when `GRAPHQL_TRACING_HEADER` is set, as it is with `DEBUG`, and a
+`GRAPHQL_TRACING_SAMPLE_RATE` fraction of the others. The other requests
+execute without the middleware.
+"""
+
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from functools import partial
+
+from django.conf import settings
+from promise import Promise
+
+TRACING_VERSION = 1
+
+
+def is_sampled(request):
+    if settings.GRAPHQL_TRACING_HEADER and request.META.get('HTTP_X_GRAPHQL_TRACING'):
+        return True
+    return random.random() < settings.GRAPHQL_TRACING_SAMPLE_RATE
+
+
+def trace_phase(request, name):
+    """Times the phase `name` of the operation when the request is traced."""
+    tracer = getattr(request, 'tracer', None)
+    return tracer.phase(name) if tracer else nullcontext()
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class Tracer(object):
+    """
+    Graphene middleware timing every resolver of an operation, from its call
+    to the resolution of its value, as offsets in nanoseconds from the start
+    of the request. The value of a DataLoader field resolves when its batch
+    is loaded, so its duration includes the wait for the batch.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.started = time.perf_counter_ns()
+        self.phases = {}
+        self.resolvers = []
+
+    def resolve(self, next, root, info, **args):
+        # Kept to the minimum, every field of every traced operation goes through it: the records are only turned
+        # into the tracing format by extension().
+        record = [info, time.perf_counter_ns(), None]
+        self.resolvers.append(record)
+        try:
+            result = next(root, info, **args)
+        finally:
+            record[2] = time.perf_counter_ns()
+        if isinstance(result, Promise) and not result.is_fulfilled:
+            return result.then(partial(self.resolved, record), partial(self.rejected, record))
+        return result
+
+    @staticmethod
+    def resolved(record, value):
+        record[2] = time.perf_counter_ns()
+        return value
+
+    @staticmethod
+    def rejected(record, error):
+        record[2] = time.perf_counter_ns()
+        raise error
+
+    @contextmanager
+    def phase(self, name):
+        """Times the `parsing` or `validation` of the operation."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases[name] = {'startOffset': start - self.started, 'duration': time.perf_counter_ns() - start}
+
+    def reset(self):
+        # Executed again, e.g. after a lock error: only the last execution is reported.
+        self.resolvers = []
+
+    def extension(self):
+        duration = time.perf_counter_ns() - self.started
+        return {
+            'version': TRACING_VERSION,
+            'startTime': format_time(self.started_at),
+            'endTime': format_time(self.started_at + duration / 1e9),
+            'duration': duration,
+            **self.phases,
+            'execution': {
+                'resolvers': [
+                    {
+                        'path': info.path,
+                        'parentType': str(info.parent_type),
+                        'fieldName': info.field_name,
+                        'returnType': str(info.return_type),
+                        'startOffset': start - self.started,
+                        'duration': end - start,
+                    }
+                    for info, start, end in self.resolvers
+                ],
+            },
+        }
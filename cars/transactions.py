@@ -0,0 +1,32 @@
+"""
+Transactions taking the SQLite write lock up front.
+
+Transactions are opened with a deferred `BEGIN`, which only takes a read
+lock, so that read-only blocks never wait on a writer. A transaction that
+is to write is better opened with `BEGIN IMMEDIATE` (see project.sqlite): it
+waits up to `busy_timeout` for the write lock instead of failing with
+"database is locked" when it cannot upgrade its read lock midway through.
+"""
+
+from contextlib import contextmanager, nullcontext
+
+from django.db import transaction
+
+
+@contextmanager
+def begin_immediate(using=None):
+    """Opens the transactions started in the block with `BEGIN IMMEDIATE`, on the backends supporting it."""
+    connection = transaction.get_connection(using)
+    previous = getattr(connection, 'begin_immediate', False)
+    connection.begin_immediate = True
+    try:
+        yield
+    finally:
+        connection.begin_immediate = previous
+
+
+@contextmanager
+def atomic(using=None, savepoint=True, immediate=False):
+    """`transaction.atomic`, whose transaction takes the write lock as soon as it starts when `immediate` is set."""
+    with begin_immediate(using) if immediate else nullcontext(), transaction.atomic(using, savepoint):
+        yield
@@ -1,41 +1,126 @@
 import graphene
+from django.db.models import QuerySet
 from graphene import relay
 from graphene_django import DjangoObjectType
+from graphene_django.filter.utils import get_filtering_args_from_filterset
 
-from .models import Car, Make, Model, Trim
+from .fields import RelatedConnectionField
+from .filters import CarFilter, car_filterset_class
+from .loaders import (
+    CarsByTrimLoader,
+    MakeLoader,
+    ModelLoader,
+    ModelsByMakeLoader,
+    TrimLoader,
+    TrimsByModelLoader,
+    load_related,
+)
+from .models import Car, DeletionJob, Make, Model, Trim
+from .optimizer import optimize_queryset
+from .statistics import estimate_row_count
 
 
-class MakeNode(DjangoObjectType):
+class CountableConnection(relay.Connection):
+    """Connection whose totals are only computed when they are selected."""
+
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int(description='Exact number of nodes in the connection.')
+    approximate_total_count = graphene.Int(
+        description='Number of nodes in the connection, estimated from the table statistics when it is not filtered.'
+    )
+
+    def resolve_total_count(self, info):
+        if isinstance(self.iterable, QuerySet):
+            return self.iterable.count()
+        return len(self.iterable)
+
+    def resolve_approximate_total_count(self, info):
+        if isinstance(self.iterable, QuerySet) and not self.iterable.query.where:
+            estimate = estimate_row_count(self.iterable.model)
+            if estimate is not None:
+                return estimate
+        return self.resolve_total_count(info)
+
+
+class OptimizedNode(DjangoObjectType):
+    """Node whose querysets are shaped after the selection set."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return optimize_queryset(queryset, info)
+
+
+class MakeNode(OptimizedNode):
+    models = RelatedConnectionField(lambda: ModelNode, loader=ModelsByMakeLoader, required=True)
 
     class Meta:
         model = Make
         interfaces = (relay.Node, )
-        fields = ['id', 'name', 'models']
-        filter_fields = ['id', 'name', 'models']
+        connection_class = CountableConnection
+        fields = ['id', 'name', 'models', 'version']
+        filter_fields = ['id', 'name', 'models', 'version']
 
 
-class ModelNode(DjangoObjectType):
+class ModelNode(OptimizedNode):
+    trims = RelatedConnectionField(lambda: TrimNode, loader=TrimsByModelLoader, required=True)
 
     class Meta:
         model = Model
         interfaces = (relay.Node, )
-        fields = ['id', 'name', 'trims', 'make']
-        filter_fields = ['id', 'name', 'trims', 'make']
+        connection_class = CountableConnection
+        fields = ['id', 'name', 'trims', 'make', 'version']
+        filter_fields = ['id', 'name', 'trims', 'make', 'version']
+
+    def resolve_make(self, info):
+        return load_related(info, self, 'make', MakeLoader)
 
 
-class TrimNode(DjangoObjectType):
+class TrimNode(OptimizedNode):
+    cars = RelatedConnectionField(lambda: CarNode, loader=CarsByTrimLoader, required=True)
 
     class Meta:
         model = Trim
         interfaces = (relay.Node, )
-        fields = ['id', 'name', 'cars', 'model']
-        filter_fields = ['id', 'name', 'cars', 'model']
+        connection_class = CountableConnection
+        fields = ['id', 'name', 'cars', 'model', 'version']
+        filter_fields = ['id', 'name', 'cars', 'model', 'version']
+
+    def resolve_model(self, info):
+        return load_related(info, self, 'model', ModelLoader)
 
 
-class CarNode(DjangoObjectType):
+class CarNode(OptimizedNode):
 
     class Meta:
         model = Car
         interfaces = (relay.Node, )
-        fields = ['id', 'owner', 'color', 'year', 'trim']
-        filter_fields = ['id', 'owner', 'color', 'year', 'trim']
+        connection_class = CountableConnection
+        fields = ['id', 'owner', 'color', 'year', 'trim', 'version']
+        filterset_class = CarFilter
+
+    def resolve_trim(self, info):
+        return load_related(info, self, 'trim', TrimLoader)
+
+
+class DeletionJobNode(DjangoObjectType):
+    """Progress of the background deletion of a make, model or trim."""
+
+    class Meta:
+        model = DeletionJob
+        interfaces = (relay.Node, )
+        fields = [
+            'id', 'table', 'object_id', 'status', 'cars_deleted', 'trims_deleted', 'models_deleted', 'error',
+            'created_at', 'updated_at', 'finished_at',
+        ]
+
+
+# The `allCar` filters, as an input of the fields filtering cars outside of a connection.
+CarFilterInput = type('CarFilterInput', (graphene.InputObjectType, ), {
+    name: graphene.InputField(argument.type, description=argument.description)
+    for name, argument in get_filtering_args_from_filterset(car_filterset_class, CarNode).items()
+})
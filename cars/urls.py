@@ -1,6 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
 from django.urls import path
-from graphene_django.views import GraphQLView
+
+from .backend import PersistedDocumentBackend
+from .views import CarsGraphQLView, export_cars, metrics, offload_view
+
+document_backend = PersistedDocumentBackend(max_size=settings.PERSISTED_QUERIES_CACHE_SIZE)
+
+graphql_view = CarsGraphQLView.as_view(graphiql=True, backend=document_backend)
+if settings.GRAPHQL_ASYNC:
+    graphql_view = offload_view(
+        graphql_view, ThreadPoolExecutor(max_workers=settings.GRAPHQL_ASYNC_THREADS, thread_name_prefix='graphql')
+    )
 
 urlpatterns = [
-    path('graphql', GraphQLView.as_view(graphiql=True)),
+    path('graphql', graphql_view),
+    path('export/cars', export_cars),
+    path('metrics', metrics),
 ]
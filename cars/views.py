@@ -0,0 +1,264 @@
+import asyncio
+import json
+from contextlib import nullcontext
+from functools import partial
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotFound,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import validate
+from graphql.execution import ExecutionResult
+from graphql.execution.middleware import MiddlewareManager
+
+from .backend import document_hash
+from .export import filter_cars, iter_csv, iter_ndjson, iter_rows
+from .metrics import OperationMetrics, exposition, get_store
+from .n_plus_one import QueryDetector
+from .query_cost import QueryCostRule
+from .replicas import reading_from
+from .response_cache import execute_cached
+from .retry import execute_with_retries
+from .tracing import Tracer, is_sampled, trace_phase
+from .transactions import begin_immediate
+
+
+class CarsGraphQLView(GraphQLView):
+    """
+    GraphQL view implementing automatic persisted queries: clients may send
+    the SHA-256 hash of a query (`extensions.persistedQuery.sha256Hash`)
+    instead of its text, over POST or GET. Unknown hashes are answered with
+    a `PersistedQueryNotFound` error, upon which the client sends the hash
+    along with the query text to register it.
+
+    Operations whose estimated cost or depth exceed `GRAPHQL_MAX_QUERY_COST`
+    or `GRAPHQL_MAX_QUERY_DEPTH` are rejected before execution, and the
+    estimate is reported in the `extensions` of the response.
+
+    Queries reading only from the catalog tables are served from the
+    response cache, and operations rejected because the database was locked
+    are executed again after a backoff. Queries read from the database
+    picked by `ReplicaStickinessMiddleware`, mutations from the primary.
+
+    The resolvers of the sampled requests are timed by a `Tracer`, whose
+    trace is reported in `extensions.tracing`, and the SQL statements
+    repeated within an operation are reported by a `QueryDetector`.
+    """
+
+    def get_middleware(self, request):
+        tracer = getattr(request, 'tracer', None)
+        if tracer is None:
+            return self.middleware
+        tracer.reset()
+        # Innermost, so that only the resolvers are timed, and without wrapping every value in a promise.
+        return MiddlewareManager(tracer, *(self.middleware or []), wrap_in_promise=False)
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super(CarsGraphQLView, self).get_graphql_params(request, data)
+
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+
+        if extensions is not None and not isinstance(extensions, dict):
+            raise HttpError(HttpResponseBadRequest('Extensions must be an object.'))
+
+        persisted_query = (extensions or {}).get('persistedQuery')
+        if not persisted_query:
+            return query, variables, operation_name, id
+        if not isinstance(persisted_query, dict) or not isinstance(persisted_query.get('sha256Hash'), str):
+            raise HttpError(HttpResponseBadRequest('persistedQuery must be an object with a sha256Hash string.'))
+
+        key = persisted_query.get('sha256Hash')
+        if query:
+            if document_hash(query) != key:
+                raise HttpError(HttpResponseBadRequest('Provided sha256Hash does not match query.'))
+            return query, variables, operation_name, id
+
+        document = self.get_backend(request).get(key)
+        if document is None:
+            raise HttpError(HttpResponse(status=200), 'PersistedQueryNotFound')
+
+        return document.document_string, variables, operation_name, id
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        execute = partial(
+            execute_with_retries,
+            partial(
+                super(CarsGraphQLView, self).execute_graphql_request,
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        )
+        if not query:
+            return execute()
+
+        try:
+            with trace_phase(request, 'parsing'):
+                document = self.get_backend(request).document_from_string(self.schema, query)
+        except Exception as e:
+            return ExecutionResult(errors=[e], invalid=True)
+
+        costs = {}
+        rule = partial(
+            QueryCostRule,
+            operation_name=operation_name,
+            variables=variables,
+            default_page_size=graphene_settings.RELAY_CONNECTION_MAX_LIMIT,
+            max_cost=settings.GRAPHQL_MAX_QUERY_COST,
+            max_depth=settings.GRAPHQL_MAX_QUERY_DEPTH,
+            costs=costs,
+        )
+        with trace_phase(request, 'validation'):
+            errors = validate(self.schema, document.document_ast, [rule])
+        if errors:
+            return ExecutionResult(errors=errors, invalid=True)
+
+        mutation = document.get_operation_type(operation_name) == 'mutation'
+        # Set again as the view may execute in another thread than the middleware. The transaction of a mutation
+        # takes the write lock up front.
+        read_database = DEFAULT_DB_ALIAS if mutation else getattr(request, 'read_database', None)
+        with reading_from(read_database), begin_immediate() if mutation else nullcontext():
+            result = execute_cached(self.schema, document, operation_name, variables, execute)
+        if mutation and result is not None and not result.invalid:
+            request.wrote_to_primary = True
+
+        if result is not None and len(costs) == 1:
+            cost = next(iter(costs.values()))
+            result.extensions['cost'] = {
+                'requestedQueryCost': cost.cost,
+                'maximumAvailable': settings.GRAPHQL_MAX_QUERY_COST,
+                'depth': cost.depth,
+                'maximumDepth': settings.GRAPHQL_MAX_QUERY_DEPTH,
+            }
+
+        return result
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        request.tracer = Tracer() if is_sampled(request) else None
+        metrics = OperationMetrics(operation_name) if settings.METRICS_ENABLED else None
+        detector = QueryDetector() if settings.N_PLUS_ONE_DETECTION else None
+        with metrics or nullcontext(), detector or nullcontext():
+            execution_result = self.execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        if detector:
+            detector.report(operation_name)
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        if not execution_result:
+            return None, 200
+
+        status_code = 200
+        response = {}
+
+        if execution_result.errors:
+            set_rollback()
+            response['errors'] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.invalid:
+            status_code = 400
+        else:
+            response['data'] = execution_result.data
+
+        if metrics and settings.GRAPHQL_METRICS_EXTENSION and request.META.get('HTTP_X_GRAPHQL_METRICS'):
+            execution_result.extensions['metrics'] = metrics.extension()
+
+        if request.tracer:
+            execution_result.extensions['tracing'] = request.tracer.extension()
+
+        if execution_result.extensions:
+            response['extensions'] = execution_result.extensions
+
+        if self.batch:
+            response['id'] = id
+            response['status'] = status_code
+
+        content = self.json_encode(request, response, pretty=show_graphiql)
+        if metrics:
+            metrics.record(execution_result.errors, len(content.encode('utf-8')))
+        return content, status_code
+
+
+def offload_view(view, executor):
+    """
+    Returns an async view running the sync `view` in `executor`, a bounded
+    thread pool, so that the event loop of an ASGI worker keeps accepting
+    requests while the pool threads wait on the database.
+
+    Every pool thread holds its own database connection, which is released
+    or reused after `CONN_MAX_AGE` as Django does around a request.
+    """
+    def run(request):
+        close_old_connections()
+        try:
+            return view(request)
+        finally:
+            close_old_connections()
+
+    async def async_view(request):
+        return await asyncio.get_running_loop().run_in_executor(executor, run, request)
+
+    async_view.csrf_exempt = getattr(view, 'csrf_exempt', False)
+    return async_view
+
+
+@require_GET
+def metrics(request):
+    """Exposes the metrics of the GraphQL operations of every server process, in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        return HttpResponseNotFound()
+    return HttpResponse(exposition(get_store().collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
+
+
+@require_GET
+def export_cars(request):
+    """
+    Streams the cars matching the `allCar` filters given as query parameters,
+    ordered by id, as NDJSON (the default) or CSV (`format=csv`). An
+    interrupted export is resumed with `after_id`, the id of the last car
+    received.
+    """
+    params = request.GET.dict()
+    export_format = params.pop('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f'Unknown export format {export_format}.')
+
+    after_id = params.pop('after_id', None)
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            return HttpResponseBadRequest('after_id must be an integer.')
+
+    filterset = filter_cars(params, request)
+    if not filterset.is_valid():
+        return JsonResponse({'errors': filterset.errors}, status=400)
+
+    serialize, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(serialize(iter_rows(filterset.qs, after_id)), content_type=content_type)
+    if export_format == 'csv':
+        response['Content-Disposition'] = 'attachment; filename="cars.csv"'
+    return response
@@ -0,0 +1,126 @@
+"""
+Gunicorn configuration, read from the working directory by `gunicorn`.
+
+The application and the GraphQL schema are loaded once by the master before
+the workers are forked, so that the workers share their memory pages
+through copy-on-write instead of each building its own copy. The loaded
+objects are moved out of the garbage collector's reach (`gc.freeze()`),
+whose passes would otherwise write to, and thereby copy, every page holding
+a tracked object.
+
+Every setting may be overridden through the GUNICORN_* environment
+variables below, or on the command line.
+"""
+
+import gc
+import multiprocessing
+import os
+import time
+from distutils.util import strtobool
+
+ASGI_WORKER_CLASSES = {'uvicorn.workers.UvicornWorker', 'uvicorn.workers.UvicornH11Worker'}
+
+# Operation executed by every worker before it accepts requests, so that the first requests do not pay for the
+# lazily initialized parts of Django, graphene and the database connection.
+WARMUP_QUERY = '{ allMake(first: 1) { edges { node { id name } } } }'
+
+boot_started = time.monotonic()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# `gthread` serves `threads` requests per worker from a thread pool; the uvicorn workers serve the async view of
+# project/asgi.py, but are slower than `gthread` in the `benchmark_http` runs; `sync` serves one request at a time.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+wsgi_app = 'project.asgi:application' if worker_class in ASGI_WORKER_CLASSES else 'project.wsgi:application'
+workers = int(os.environ.get('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', default=4))
+
+preload_app = bool(strtobool(os.environ.get('GUNICORN_PRELOAD', default='True')))
+
+# Workers are recycled after about `max_requests` requests, the jitter keeping them from all restarting at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', default=2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', default=200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', default=30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', default=30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', default=5))
+
+warmup = bool(strtobool(os.environ.get('GUNICORN_WARMUP', default='True')))
+
+
+def memory_usage():
+    """
+    Returns the resident, proportional (shared pages split between the
+    processes sharing them) and private memory of this process in MiB, as
+    reported by /proc/self/smaps_rollup.
+    """
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            for line in smaps:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return None
+
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {name: round(kilobytes / 1024, 1) for name, kilobytes in (
+        ('rss', fields.get('Rss', 0)), ('pss', fields.get('Pss', 0)), ('private', private)
+    )}
+
+
+def format_memory():
+    usage = memory_usage()
+    if usage is None:
+        return 'memory usage unavailable'
+    return 'RSS {rss} MiB, PSS {pss} MiB, private {private} MiB'.format(**usage)
+
+
+def load_schema():
+    """Imports the URLconf, and thereby the GraphQL schema and views."""
+    from django.db import connections
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    # A connection opened by the master must not be shared with the workers.
+    connections.close_all()
+
+
+def warm_up():
+    from django.db import connections
+
+    from project.schema import schema
+
+    result = schema.execute(WARMUP_QUERY)
+    connections.close_all()
+    return result.errors
+
+
+def when_ready(server):
+    if preload_app:
+        load_schema()
+        gc.freeze()
+    server.log.info('Master ready in %.2fs, %s', time.monotonic() - boot_started, format_memory())
+
+
+def post_fork(server, worker):
+    worker.booted_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    if warmup:
+        if not preload_app:
+            load_schema()
+        errors = warm_up()
+        if errors:
+            worker.log.warning('Warm-up query failed: %s', errors)
+    worker.log.info('Worker %s ready in %.2fs, %s', worker.pid, time.monotonic() - worker.booted_at, format_memory())
+
+
+def worker_exit(server, worker):
+    # Writes the metrics buffered since the last flush, e.g. when the worker is recycled by max_requests.
+    from django.conf import settings
+    if settings.configured and settings.METRICS_ENABLED:
+        from cars.metrics import get_store
+        get_store().flush()
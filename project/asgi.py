@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+# Serve `/graphql` with the async view offloading the executions to a thread pool.
+os.environ.setdefault('GRAPHQL_ASYNC', 'True')
 
-application = get_asgi_application()
+# As django.core.asgi.get_asgi_application(), with the handler streaming the exports from a worker thread.
+django.setup(set_prefix=False)
+
+from cars.asgi import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
@@ -27,6 +27,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'cars.replicas.ReplicaStickinessMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -56,16 +57,75 @@ WSGI_APPLICATION = 'project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# Applied to every new connection. The WAL journal is persistent, and set once by the `cars` migrations.
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', default=5000)),
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024)),
+    # In KiB when negative.
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', default=64 * 1024)),
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'project.sqlite',
         'NAME': BASE_DIR / 'mydatabase',
-
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', default=600)),
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+        },
     }
 }
 
-if 'test' in sys.argv or 'test_coverage' in sys.argv:
-    DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
+# Read replicas, given as comma-separated SQLite files kept up to date by `manage.py snapshot_replicas`. Queries read
+# from a replica, except for REPLICA_STICKINESS_SECONDS after a client wrote to the primary.
+DATABASE_REPLICAS = [name for name in os.environ.get('DATABASE_REPLICAS', default='').split(',') if name]
+REPLICA_DATABASES = []
+for index, name in enumerate(DATABASE_REPLICAS):
+    REPLICA_DATABASES.append(f'replica{index}')
+    DATABASES[f'replica{index}'] = dict(DATABASES['default'], NAME=name, TEST={'MIRROR': 'default'})
+DATABASE_ROUTERS = ['cars.replicas.ReplicaRouter']
+REPLICA_STICKINESS_SECONDS = int(os.environ.get('REPLICA_STICKINESS_SECONDS', default=5))
+
+# Operations whose transaction could not start because another process held the write lock past busy_timeout are
+# executed again up to DATABASE_LOCK_RETRIES times, after an exponential backoff from DATABASE_LOCK_RETRY_DELAY up
+# to DATABASE_LOCK_RETRY_MAX_DELAY seconds.
+DATABASE_LOCK_RETRIES = int(os.environ.get('DATABASE_LOCK_RETRIES', default=3))
+DATABASE_LOCK_RETRY_DELAY = float(os.environ.get('DATABASE_LOCK_RETRY_DELAY', default=0.05))
+DATABASE_LOCK_RETRY_MAX_DELAY = float(os.environ.get('DATABASE_LOCK_RETRY_MAX_DELAY', default=1))
+
+# The `graphql` cache holds the responses to catalog queries, shared by every process of the server.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'graphql': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('GRAPHQL_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'graphql')),
+        'TIMEOUT': int(os.environ.get('GRAPHQL_CACHE_TIMEOUT', default=3600)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('GRAPHQL_CACHE_MAX_ENTRIES', default=10000)),
+        },
+    },
+}
+
+# Metrics of the GraphQL operations, added up in a SQLite file shared by the server processes and exposed on
+# `/metrics`. GRAPHQL_METRICS_EXTENSION lets the clients sending the `X-GraphQL-Metrics` header read the measures of
+# their operation in the `extensions` of the response.
+METRICS_ENABLED = bool(strtobool(os.environ.get('METRICS_ENABLED', default='True')))
+METRICS_DATABASE = os.environ.get('METRICS_DATABASE', default=str(BASE_DIR / 'cache' / 'metrics.sqlite3'))
+# Seconds each process buffers its samples for before writing them to METRICS_DATABASE.
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', default=1))
+# Distinct operation names used as labels, the next ones being reported as `other`.
+METRICS_MAX_OPERATIONS = int(os.environ.get('METRICS_MAX_OPERATIONS', default=100))
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+TESTING = 'test' in sys.argv or 'test_coverage' in sys.argv
+
+if TESTING:
+    METRICS_DATABASE = ':memory:'
+    CACHES['graphql'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -116,3 +176,27 @@ SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', default='#um2g($a1-#2d(enmn!3pm
 ENV_ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS')
 ALLOWED_HOSTS = ENV_ALLOWED_HOSTS.split(',') if ENV_ALLOWED_HOSTS is not None else []
 DEBUG = bool(strtobool(os.environ.get('DEBUG', default='True')))
+GRAPHQL_METRICS_EXTENSION = bool(strtobool(os.environ.get('GRAPHQL_METRICS_EXTENSION', default=str(DEBUG))))
+# Resolver tracing in the Apollo tracing format, reported in the `extensions` of the responses to the requests
+# sending the `X-GraphQL-Tracing` header (when GRAPHQL_TRACING_HEADER is on, as in development) and of a
+# GRAPHQL_TRACING_SAMPLE_RATE fraction of the others. In production, sample rather than let any client trace.
+GRAPHQL_TRACING_HEADER = bool(strtobool(os.environ.get('GRAPHQL_TRACING_HEADER', default=str(DEBUG))))
+GRAPHQL_TRACING_SAMPLE_RATE = float(os.environ.get('GRAPHQL_TRACING_SAMPLE_RATE', default=0))
+# N+1 queries: a SQL statement run from the same place more than N_PLUS_ONE_THRESHOLD times within a GraphQL
+# operation is logged when N_PLUS_ONE_DETECTION is on (with DEBUG and in the tests), and raised with N_PLUS_ONE_RAISE.
+N_PLUS_ONE_DETECTION = bool(strtobool(os.environ.get('N_PLUS_ONE_DETECTION', default=str(DEBUG or TESTING))))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', default=5))
+N_PLUS_ONE_RAISE = bool(strtobool(os.environ.get('N_PLUS_ONE_RAISE', default=str(TESTING))))
+
+# Maximum number of parsed and validated GraphQL documents kept by each process.
+PERSISTED_QUERIES_CACHE_SIZE = int(os.environ.get('PERSISTED_QUERIES_CACHE_SIZE', default=1000))
+
+# Operations whose estimated cost (resolved fields, multiplied by the page size of every enclosing connection) or
+# depth exceed these limits are rejected before execution.
+GRAPHQL_MAX_QUERY_COST = int(os.environ.get('GRAPHQL_MAX_QUERY_COST', default=100000))
+GRAPHQL_MAX_QUERY_DEPTH = int(os.environ.get('GRAPHQL_MAX_QUERY_DEPTH', default=10))
+
+# Under ASGI (see project/asgi.py) `/graphql` is an async view executing the operations in a pool of
+# GRAPHQL_ASYNC_THREADS threads, which bounds the number of concurrent executions and database connections.
+GRAPHQL_ASYNC = bool(strtobool(os.environ.get('GRAPHQL_ASYNC', default='False')))
+GRAPHQL_ASYNC_THREADS = int(os.environ.get('GRAPHQL_ASYNC_THREADS', default=8))
@@ -0,0 +1,31 @@
+"""
+SQLite backend tuned for concurrent gunicorn workers.
+
+Every new connection is configured with the pragmas of
+`OPTIONS['pragmas']`, e.g. the `busy_timeout` writers wait for the lock.
+The WAL journal, under which readers never block on a writer, is persistent
+and set once by a migration. Transactions are opened with `BEGIN IMMEDIATE`
+while `begin_immediate` is set, see `cars.transactions`.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    begin_immediate = False
+
+    def get_connection_params(self):
+        kwargs = super(DatabaseWrapper, self).get_connection_params()
+        kwargs.pop('pragmas', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super(DatabaseWrapper, self).get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if not self.begin_immediate:
+            return super(DatabaseWrapper, self)._start_transaction_under_autocommit()
+        self.cursor().execute('BEGIN IMMEDIATE')